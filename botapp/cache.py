@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    """Легкий знімок профілю користувача для обробників бота
+
+    Містить лише поля, які потрібні обробникам, тож не тримає в пам'яті
+    хеш пароля та інші дані моделі User.
+    """
+    id: int
+    username: str
+    email: str
+    bio: str
+    is_creator: bool
+
+    @property
+    def pk(self):
+        return self.id
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.pk,
+            username=user.username,
+            email=user.email,
+            bio=user.bio,
+            is_creator=user.is_creator,
+        )
+
+
+class UserProfileCache:
+    """Обмежений LRU-кеш профілів за telegram id з часом життя записів
+
+    Кеш живе в пам'яті процесу бота. Записи витісняються, коли їх більше
+    ніж `maxsize`, або вважаються недійсними через `ttl` секунд. Для інвалідації
+    за id користувача (наприклад, після виходу, коли telegram_id вже очищено)
+    зберігається зворотна відповідність id користувача → telegram id.
+    """
+
+    def __init__(self, maxsize:int, ttl:float):
+        """
+        Args:
+            maxsize (int): Максимальна кількість профілів у кеші
+            ttl (float): Час життя запису в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._telegram_ids = {}
+        self._lock = threading.Lock()
+
+    def get(self, telegram_id:int) -> UserProfile | None:
+        """Повертає профіль з кешу або None, якщо його нема чи він застарів"""
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(telegram_id)
+                self.hits += 1
+                return entry[0]
+
+            if entry is not None:
+                self._pop(telegram_id)
+            self.misses += 1
+            return None
+
+    def set(self, telegram_id:int, profile:UserProfile):
+        """Зберігає профіль та витісняє найдавніше використаний, якщо кеш заповнений"""
+        with self._lock:
+            self._pop(telegram_id)
+            previous = self._telegram_ids.get(profile.id)
+            if previous is not None:
+                self._pop(previous)
+
+            self._entries[telegram_id] = (profile, time.monotonic() + self.ttl)
+            self._telegram_ids[profile.id] = telegram_id
+
+            while len(self._entries) > self.maxsize:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._telegram_ids.pop(evicted.id, None)
+
+    def invalidate(self, telegram_id:int):
+        """Видаляє профіль за telegram id"""
+        with self._lock:
+            self._pop(telegram_id)
+
+    def invalidate_user(self, user_id:int):
+        """Видаляє профіль за id користувача"""
+        with self._lock:
+            telegram_id = self._telegram_ids.get(user_id)
+            if telegram_id is not None:
+                self._pop(telegram_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._telegram_ids.clear()
+
+    def _pop(self, telegram_id):
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None:
+            self._telegram_ids.pop(entry[0].id, None)
+
+    def stats(self) -> dict:
+        """Повертає розмір кешу, лічильники влучань та промахів"""
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+
+user_profile_cache = UserProfileCache(
+    maxsize=settings.BOT_PROFILE_CACHE_SIZE,
+    ttl=settings.BOT_PROFILE_CACHE_TTL,
+)
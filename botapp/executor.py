@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+
+# Позначка потоків пулу БД бота
+_pool_thread = threading.local()
+
+
+def begin_immediate_in_pool(sender, connection, **kwargs):
+    """Вмикає BEGIN IMMEDIATE для нових з'єднань SQLite у потоках пулу
+
+    SQLite задає режим транзакцій під час кожного підключення з OPTIONS бази,
+    тому він встановлюється після підключення, а не один раз для потоку.
+    """
+    if getattr(_pool_thread, "active", False) and connection.vendor == "sqlite":
+        connection.transaction_mode = "IMMEDIATE"
+
+
+connection_created.connect(begin_immediate_in_pool)
+
+
+class DatabaseExecutor(ThreadPoolExecutor):
+    """Пул потоків для запитів до БД з обробників бота
+
+    За замовчуванням `sync_to_async` виконує весь синхронний код в одному
+    потоці, тож повільний запит одного користувача блокує всі чати.
+    Цей пул має N потоків, кожен з власним з'єднанням Django. Перед і після
+    кожного завдання закриваються застарілі або зламані з'єднання
+    (`close_old_connections`), тож з'єднання живе не довше за BOT_DB_CONN_MAX_AGE.
+    Веб-запити з'єднання не перевикористовують (CONN_MAX_AGE = 0), тому строк
+    життя з'єднань пулу задається окремо.
+
+    Транзакції в потоках пулу починаються з BEGIN IMMEDIATE: сервіси бота
+    спершу читають, а потім пишуть, і відкладена транзакція SQLite отримала б
+    "database is locked" одразу, без очікування `timeout`. Транзакції веб-запитів
+    залишаються відкладеними, тож атомарні блоки лише з читанням не блокують запис.
+
+    Пул рахує глибину черги (завдання, що ще чекають вільного потоку),
+    кількість завдань у роботі та час очікування в черзі.
+    """
+
+    def __init__(self, max_workers:int):
+        super().__init__(max_workers=max_workers, thread_name_prefix="bot-db", initializer=self._init_thread)
+        self._stats_lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @staticmethod
+    def _init_thread():
+        _pool_thread.active = True
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted_at = time.monotonic()
+        with self._stats_lock:
+            self.queued += 1
+
+        def run():
+            wait = time.monotonic() - submitted_at
+            with self._stats_lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+            close_old_connections()
+            opened = connection.connection is None
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if opened and connection.connection is not None:
+                    # Нове з'єднання отримало close_at за CONN_MAX_AGE веб-запитів
+                    connection.close_at = time.monotonic() + settings.BOT_DB_CONN_MAX_AGE
+                close_old_connections()
+                with self._stats_lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        return super().submit(run)
+
+    def stats(self) -> dict:
+        """Повертає розмір пулу, глибину черги та час очікування завдань у секундах"""
+        with self._stats_lock:
+            return {
+                "workers": self._max_workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait": self.total_wait / self.completed if self.completed else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+db_executor = DatabaseExecutor(max_workers=settings.BOT_DB_WORKERS)
+
+
+def db_sync_to_async(func):
+    """Аналог `sync_to_async`, що виконує функцію в пулі `db_executor`
+
+    Може використовуватись як декоратор або як обгортка: `await db_sync_to_async(func)(...)`.
+    """
+    return sync_to_async(func, thread_sensitive=False, executor=db_executor)
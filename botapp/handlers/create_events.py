@@ -203,6 +203,8 @@ create_event_conv_handler = ConversationHandler(
     fallbacks=[
         CommandHandler('cancel', cancel_creation)
     ],
+    name="create_event",
+    persistent=True,
     per_message=False,
     allow_reentry=True
 )
\ No newline at end of file
@@ -90,11 +90,10 @@ async def edit_title(update:Update, context:ContextTypes.DEFAULT_TYPE):
         - Викликає зовнішню функцію `edit_event_field` для оновлення поля `title` події.
         - Відправляє користувачеві повідомлення про статус оновлення.
     """
-    events = context.user_data.get('events')
-    index = context.user_data.get("event_index")
+    browse = context.user_data.get('browse', {})
 
     title = update.message.text
-    msg = await edit_event_field(events[index].title, title, 'title')
+    msg = await edit_event_field(browse.get('event_id'), title, 'title')
 
     await update.message.reply_text(msg)
     return ConversationHandler.END
@@ -114,11 +113,10 @@ async def edit_description(update:Update, context:ContextTypes.DEFAULT_TYPE):
         - Викликає зовнішню функцію `edit_event_field` для оновлення поля `description` події.
         - Відправляє користувачеві повідомлення про статус оновлення.
     """
-    events = context.user_data.get('events')
-    index = context.user_data.get("event_index")
+    browse = context.user_data.get('browse', {})
 
     description = update.message.text
-    msg = await edit_event_field(events[index].title, description, 'description')
+    msg = await edit_event_field(browse.get('event_id'), description, 'description')
 
     await update.message.reply_text(msg)
     return ConversationHandler.END
@@ -138,11 +136,10 @@ async def edit_start_time(update:Update, context:ContextTypes.DEFAULT_TYPE):
         - Викликає зовнішню функцію `edit_event_field` для оновлення поля `start_time` події.
         - Відправляє користувачеві повідомлення про статус оновлення.
     """
-    events = context.user_data.get('events')
-    index = context.user_data.get("event_index")
+    browse = context.user_data.get('browse', {})
 
     start_time = update.message.text
-    msg = await edit_event_field(events[index].title, start_time, 'start_time')
+    msg = await edit_event_field(browse.get('event_id'), start_time, 'start_time')
 
     await update.message.reply_text(msg)
     return ConversationHandler.END
@@ -162,11 +159,10 @@ async def edit_address(update:Update, context:ContextTypes.DEFAULT_TYPE):
         - Викликає зовнішню функцію `edit_event_field` для оновлення поля `address` події.
         - Відправляє користувачеві повідомлення про статус оновлення.
     """
-    events = context.user_data.get('events')
-    index = context.user_data.get("event_index")
+    browse = context.user_data.get('browse', {})
 
     address = update.message.text
-    msg = await edit_event_field(events[index].title, address, 'address')
+    msg = await edit_event_field(browse.get('event_id'), address, 'address')
 
     await update.message.reply_text(msg)
     return ConversationHandler.END
@@ -185,11 +181,10 @@ async def edit_category(update:Update, context:ContextTypes.DEFAULT_TYPE):
         - Викликає зовнішню функцію `edit_event_field` для оновлення поля `category` події.
         - Відправляє користувачеві повідомлення про статус оновлення.
     """
-    events = context.user_data.get('events')
-    index = context.user_data.get("event_index")
+    browse = context.user_data.get('browse', {})
 
     category = update.message.text
-    msg = await edit_event_field(events[index].title, category, 'category')
+    msg = await edit_event_field(browse.get('event_id'), category, 'category')
 
     await update.message.reply_text(msg)
     return ConversationHandler.END
@@ -240,6 +235,8 @@ edit_event_conv_handler = ConversationHandler(
     fallbacks=[
         CommandHandler("cancel", cancel_editing)
     ],
+    name="edit_event",
+    persistent=True,
     per_message=False,
     allow_reentry=True
     
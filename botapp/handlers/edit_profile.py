@@ -169,6 +169,8 @@ edit_profile_conv_handler = ConversationHandler(
     fallbacks=[
         CommandHandler('cancel', cancel_editing)
     ],
+    name="edit_profile",
+    persistent=True,
     per_message=False,
     allow_reentry=True
 )
\ No newline at end of file
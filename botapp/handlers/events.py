@@ -1,29 +1,65 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from ..services import get_all_events, take_part_in_event, get_events_created_by_user, get_user_profile, delete_event, get_all_categories, get_event_by_category
+from ..services import get_event_window, take_part_in_event, get_user_profile, delete_event, get_all_categories
 from telegram.error import BadRequest
+from events.models import JoinStatus
 
-async def get_events(update:Update, context:ContextTypes.DEFAULT_TYPE):
-    """Отримує та відображає всі доступні події.
+
+def remember_event(context:ContextTypes.DEFAULT_TYPE, event, has_prev:bool, has_next:bool):
+    """Зберігає позицію перегляду подій у user_data
+
+    У `context.user_data['browse']` зберігаються лише фільтр, курсор поточної події
+    (start_time, id) та ознаки наявності сусідніх подій, а не самі події.
+
+    Args:
+        context (ContextTypes.DEFAULT_TYPE): Контекст бота
+        event (Event): Поточна подія
+        has_prev (bool): Чи є попередня подія
+        has_next (bool): Чи є наступна подія
+    """
+    context.user_data['browse'].update(
+        cursor=[event.start_time.isoformat(), event.pk],
+        event_id=event.pk,
+        has_prev=has_prev,
+        has_next=has_next,
+    )
+
+async def browse_events(update:Update, context:ContextTypes.DEFAULT_TYPE, filters:dict, empty_message:str = "Подій поки нема"):
+    """Починає перегляд подій з першої події, що відповідає фільтру
 
     Args:
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
+        filters (dict): Умови фільтрації подій
+        empty_message (str): Повідомлення, якщо подій нема
     Side Effects:
-       - Викликає функцію "get_all_events"
-       - Якщо подій нема, відправляє повідомлення: "Подій поки нема" 
-       - Викликає "show_events" для відображення подій
+        - Викликає функцію "get_event_window" для отримання першої події
+        - Якщо подій нема, відправляє повідомлення `empty_message`
+        - Зберігає фільтр та позицію в `context.user_data['browse']`
+        - Викликає "show_events" для відображення події
     """
-    events = await get_all_events()
+    event, has_next = await get_event_window(filters)
 
-    if not events:
-        await update.message.reply_text("Подій поки нема")
+    if event is None:
+        context.user_data.pop('browse', None)
+        await update.effective_message.reply_text(empty_message)
         return
 
-    context.user_data['events'] = events
-    context.user_data['event_index'] = 0 
+    context.user_data['browse'] = {'filters': filters}
+    remember_event(context, event, has_prev=False, has_next=has_next)
 
-    await show_events(update, context, events[0], 0)
+    await show_events(update, context, event)
+
+async def get_events(update:Update, context:ContextTypes.DEFAULT_TYPE):
+    """Отримує та відображає всі доступні події.
+
+    Args:
+        update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
+        context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
+    Side Effects:
+       - Викликає функцію "browse_events" без фільтра
+    """
+    await browse_events(update, context, {})
 
 async def get_created_events(update:Update, context:ContextTypes.DEFAULT_TYPE):
     """Отримує та відображає всі доступні події, створені поточним користувачем.
@@ -33,33 +69,21 @@ async def get_created_events(update:Update, context:ContextTypes.DEFAULT_TYPE):
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
         - Викликає функцію `get_user_profile` для отримання профілю
-        - Викликає функцію "get_events_created_by_user"
-        - Якщо подій нема, відправляє повідомлення: "Подій поки нема" 
-        - Викликає "show_events" для відображення подій
+        - Викликає функцію "browse_events" з фільтром за автором
     """
     user = await get_user_profile(update.effective_user.id)
-    events = await get_events_created_by_user(user)
+    await browse_events(update, context, {'creator_id': user.pk})
 
-    if not events:
-        await update.message.reply_text("Подій поки нема")
-        return
-
-    context.user_data['events'] = events
-    context.user_data['event_index'] = 0 
-
-    await show_events(update, context, events[0], 0)
 
-
-async def show_events(update:Update, context:ContextTypes.DEFAULT_TYPE, event, index):
+async def show_events(update:Update, context:ContextTypes.DEFAULT_TYPE, event):
     """Форматує та відображає інформацію про конкретну подію
     Args:
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
         event (Event): Об'єкт події, який потрібно відобразити.
-        index (int): Поточний індекс події у списку подій.
     Side Effects:
         - Форматує текст повідомлення з деталями події (назва, опис, дата, адреса, категорія, автор, учасники).
-        - Створює кнопки "⬅️ Попередня" та "➡️ Наступна"
+        - Створює кнопки "⬅️ Попередня" та "➡️ Наступна", якщо в `context.user_data['browse']` є сусідні події
         - Викликає функцію `get_user_profile` для визначення ролі користувача.
         - Якщо користувач не є автором, додає кнопку "Взяти участь!".
     """
@@ -70,13 +94,14 @@ async def show_events(update:Update, context:ContextTypes.DEFAULT_TYPE, event, i
         f"📍 *Адреса:* {event.address}\n"
         f"📂 *Категорія:* {event.category.name}\n"
         f"👤 *Автор:* {event.creator.username}\n"
-        f"👥 *Кількість учасників:* {event.participants.count()}"
+        f"👥 *Кількість учасників:* {event.participants_count}"
     )
 
+    browse = context.user_data.get('browse', {})
     keyboard = []
-    if index > 0:
+    if browse.get('has_prev'):
         keyboard.append(InlineKeyboardButton("⬅️ Попередня", callback_data="prev_event"))
-    if index < len(context.user_data['events']) - 1:
+    if browse.get('has_next'):
         keyboard.append(InlineKeyboardButton("➡️ Наступна", callback_data="next_event"))
 
     user = await get_user_profile(update.effective_user.id)
@@ -103,23 +128,32 @@ async def paginate_event(update:Update, context:ContextTypes.DEFAULT_TYPE):
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
-        - Оновлює `context.user_data['event_index']` на основі натиснутої кнопки.
-        - Викликає `show_events` для відображення нової події за оновленим індексом.
+        - Викликає `get_event_window` для отримання сусідньої події за курсором з `context.user_data['browse']`.
+        - Оновлює курсор та ознаки наявності сусідніх подій.
+        - Викликає `show_events` для відображення нової події.
     """
     query = update.callback_query
     await query.answer()
 
-    index = context.user_data.get('event_index', 0)
-    events = context.user_data.get("events", [])
+    browse = context.user_data.get('browse')
+    if browse is None:
+        await query.message.reply_text("Список подій застарів, відкрийте його знову")
+        return
+
+    reverse = query.data == "prev_event"
+    event, has_more = await get_event_window(browse['filters'], browse['cursor'], reverse=reverse)
 
-    if query.data == "prev_event":
-        index -= 1
-    elif query.data == "next_event":
-        index += 1
+    if event is None:
+        browse['has_prev' if reverse else 'has_next'] = False
+        await query.message.reply_text("Подій більше нема")
+        return
 
-    context.user_data['event_index'] = index
+    if reverse:
+        remember_event(context, event, has_prev=has_more, has_next=True)
+    else:
+        remember_event(context, event, has_prev=True, has_next=has_more)
 
-    await show_events(update=update, context=context, event=events[index], index=index)
+    await show_events(update=update, context=context, event=event)
 
 
 async def take_part(update:Update, context:ContextTypes.DEFAULT_TYPE):
@@ -128,23 +162,62 @@ async def take_part(update:Update, context:ContextTypes.DEFAULT_TYPE):
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
-        - Отримує `user_id` поточного користувача та заголовок поточної події.
+        - Отримує `user_id` поточного користувача та id поточної події.
         - Викликає зовнішню функцію `take_part_in_event` для реєстрації участі користувача.
-        - Оновлює список всіх подій у `context.user_data['events']` для відображення актуальної кількості учасників.
+        - Повідомляє користувача, якщо він вже є учасником або місць більше немає.
+        - Повторно відображає лише картку поточної події з актуальною кількістю учасників.
     """
     query = update.callback_query
     await query.answer()
 
     user_id = query.from_user.id
-    index = context.user_data.get('event_index', 0)
-    current_event = context.user_data.get("events")[index]
+    browse = context.user_data.get('browse')
+    if browse is None:
+        await query.message.reply_text('Подію не знайдено')
+        return
+
+    status, event = await take_part_in_event(user_id=user_id, event_id=browse['event_id'])
+
+    match status:
+        case JoinStatus.JOINED:
+            await query.message.reply_text('Ви взяли участь в цій події')
+        case JoinStatus.ALREADY_JOINED:
+            await query.message.reply_text('Ви вже є учасником цієї події')
+        case JoinStatus.FULL:
+            await query.message.reply_text('Усі місця на цю подію вже зайняті')
+        case _:
+            await query.message.reply_text('Подію не знайдено')
 
-    await take_part_in_event(user_id=user_id, event_title=current_event.title)
-    events = await get_all_events()
-    context.user_data['events'] = events
+    if event is not None:
+        await show_events(update=update, context=context, event=event)
 
-    await query.message.reply_text('Ви взяли участь в цій події')
-    await show_events(update=update, context=context, event=events[index], index=index)
+async def show_neighbour_event(update:Update, context:ContextTypes.DEFAULT_TYPE, empty_message:str):
+    """Відображає сусідню подію після того, як поточна зникла зі списку
+
+    Спочатку шукається наступна подія за курсором, а якщо її нема — попередня,
+    тож перегляд продовжується з того ж місця без перезавантаження списку.
+
+    Args:
+        update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
+        context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
+        empty_message (str): Повідомлення, якщо подій більше нема
+    """
+    browse = context.user_data['browse']
+
+    event, has_next = await get_event_window(browse['filters'], browse['cursor'])
+    if event is not None:
+        remember_event(context, event, has_prev=browse['has_prev'], has_next=has_next)
+        await show_events(update, context, event)
+        return
+
+    event, has_prev = await get_event_window(browse['filters'], browse['cursor'], reverse=True)
+    if event is not None:
+        remember_event(context, event, has_prev=has_prev, has_next=False)
+        await show_events(update, context, event)
+        return
+
+    context.user_data.pop('browse', None)
+    await update.effective_message.reply_text(empty_message)
 
 async def handle_delete_event(update:Update, context:ContextTypes.DEFAULT_TYPE):
     """Видаляє подію
@@ -152,28 +225,23 @@ async def handle_delete_event(update:Update, context:ContextTypes.DEFAULT_TYPE):
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
-        - Отримує індекс та об'єкт поточної події.
+        - Отримує id поточної події з `context.user_data['browse']`.
         - Викликає зовнішню функцію `delete_event` для видалення події з бази даних.
         - Відправляє користувачеві повідомлення про результат видалення.
+        - Викликає `show_neighbour_event` для відображення сусідньої події.
     """
     query = update.callback_query
     await query.answer()
 
-    index = context.user_data.get('event_index')
-    events = context.user_data.get('events')
+    browse = context.user_data.get('browse')
+    if browse is None:
+        await query.message.reply_text("Подія вже видалена!")
+        return
 
-    message = await delete_event(events[index].title)
+    message = await delete_event(browse['event_id'])
     await query.message.reply_text(message)
 
-    user = await get_user_profile(query.from_user.id)
-    events = await get_events_created_by_user(user)
-    context.user_data['events'] = events
-    
-    
-    if events:
-        await show_events(update, context, events[0], 0)
-    else:
-         await query.message.reply_text("У вас більше немає створених подій.")
+    await show_neighbour_event(update, context, empty_message="У вас більше немає створених подій.")
 
 
 async def choose_category(update:Update, context:ContextTypes.DEFAULT_TYPE):
@@ -199,20 +267,9 @@ async def filter_events_by_category(update:Update, context:ContextTypes.DEFAULT_
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
         - Витягує назву категорії з `callback_data`.
-        - Викликає зовнішню функцію `get_event_by_category` для отримання відфільтрованих подій.
-        - Якщо відфільтрованих подій немає, відправляє повідомлення "Подій поки нема".
-        - Викликає `show_events` для відображення першої відфільтрованої події.
+        - Викликає `browse_events` з фільтром за назвою категорії.
     """
     query = update.callback_query
     await query.answer()
 
-    events = await get_event_by_category(query.data.split(":")[1])
-
-    if not events:
-        await query.message.reply_text("Подій поки нема")
-        return
-
-    context.user_data['events'] = events
-    context.user_data['event_index'] = 0 
-
-    await show_events(update, context, events[0], 0)
+    await browse_events(update, context, {'category__name': query.data.split(":")[1]})
@@ -1,7 +1,6 @@
-from telegram.ext import ConversationHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler
+from telegram.ext import ConversationHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler, CommandHandler
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
 from ..services import login_user, get_user_profile, logout_user
-from asgiref.sync import sync_to_async
 from users.models import User
 
 USERNAME, PASSWORD = range(2)
@@ -56,12 +55,9 @@ async def get_password(update:Update, context:ContextTypes.DEFAULT_TYPE):
     await update.effective_message.delete()
     username = context.user_data.get('username')
 
-    user = await login_user(username=username, password=password)
+    user, error = await login_user(username=username, password=password, telegram_id=update.effective_user.id)
 
     if user:
-        user.telegram_id = update.effective_user.id
-        await sync_to_async(user.save)()
-
         if user.is_creator:
             keyboard = [
                 ["Створити подію", "Мої події"],
@@ -78,8 +74,22 @@ async def get_password(update:Update, context:ContextTypes.DEFAULT_TYPE):
 
 
     else:
-        await update.message.reply_text(f"Неправельний логін або пароль")
+        await update.message.reply_text(error)
+
+    return ConversationHandler.END
 
+async def cancel_login(update:Update, context:ContextTypes.DEFAULT_TYPE):
+    """Скасовує вхід в профіль
+
+    Args:
+        update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
+        context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
+    Side Effects:
+       - Скасовує вхід
+       - Очищає user_data
+    """
+    context.user_data.clear()
+    await update.message.reply_text("Вхід скасовано!")
     return ConversationHandler.END
 
 async def get_profile(update:Update, context:ContextTypes.DEFAULT_TYPE):
@@ -126,7 +136,11 @@ login_conv_handler = ConversationHandler(
         USERNAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_login)],
         PASSWORD: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_password)]
     },
-    fallbacks=[],
+    fallbacks=[
+        CommandHandler('cancel', cancel_login)
+    ],
+    name="login",
+    persistent=True,
     per_message=False
     
 )
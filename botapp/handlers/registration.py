@@ -1,4 +1,4 @@
-from telegram.ext import ConversationHandler, MessageHandler, ContextTypes, CallbackQueryHandler, filters
+from telegram.ext import ConversationHandler, MessageHandler, ContextTypes, CallbackQueryHandler, CommandHandler, filters
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup
 from ..services import register_user
 
@@ -51,6 +51,23 @@ async def get_password(update:Update, context:ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Повторіть пароль: ")
     return PASSWORD2
 
+async def ask_password_again(update:Update, context:ContextTypes.DEFAULT_TYPE):
+    """Повертає розмову до введення пароля, якщо його нема в user_data
+
+    Пароль не зберігається на диск (див. TRANSIENT_KEYS у botapp.persistence),
+    тож після перезапуску бота або вивантаження даних користувача розмова
+    відновлюється без нього.
+
+    Args:
+        update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
+        context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
+    Side Effects:
+       - Запитує пароль користувача
+       - Змінює стан на PASSWORD
+    """
+    await update.effective_message.reply_text("Реєстрацію було перервано. Введіть пароль ще раз: ")
+    return PASSWORD
+
 async def repeat_password(update:Update, context:ContextTypes.DEFAULT_TYPE):
     """Обробляє повторне введення пароля, порівнює його з першим введеним паролем.
 
@@ -60,11 +77,15 @@ async def repeat_password(update:Update, context:ContextTypes.DEFAULT_TYPE):
     Side Effects:
        - Змінює стан на "EMAIL", якщо паролі співпадають
        - Пропонує повторити споробу або завершити реєстрацію, якщо паролі не співпадають
+       - Повертає до введення пароля, якщо його нема в user_data
     """
     password = context.user_data.get('password')
     password2 = update.message.text
     await update.message.delete()
 
+    if password is None:
+        return await ask_password_again(update, context)
+
     keyboard = [
         [InlineKeyboardButton('Повторити спробу', callback_data="repeat password")],
         [InlineKeyboardButton('Завершити', callback_data="cancel")]
@@ -101,15 +122,16 @@ async def cancel_registration(update:Update, context:ContextTypes.DEFAULT_TYPE):
         update (Update):Об'єкт оновлення від Telegram, що містить інформацію про повідомлення.
         context (ContextTypes.DEFAULT_TYPE): Контекст бота, що дозволяє отримувати доступ до додаткових функцій та даних.
     Side Effects:
-       - Сковує реєстарацію
+       - Сковує реєстарацію (кнопкою або командою /cancel)
        - Очищає user_data
     """
     query = update.callback_query
-    await query.answer()
+    if query:
+        await query.answer()
 
     context.user_data.clear()
 
-    await query.message.reply_text("Реєстрація скасована!")
+    await update.effective_message.reply_text("Реєстрація скасована!")
     return ConversationHandler.END
 
 async def get_email(update:Update, context:ContextTypes.DEFAULT_TYPE):
@@ -122,7 +144,11 @@ async def get_email(update:Update, context:ContextTypes.DEFAULT_TYPE):
        - Отримує електронну адресу та зберігає її в user_data
        - Просить користувача написати про себе додаткову інформацію
        - Змінює стан на BIO
+       - Повертає до введення пароля, якщо його нема в user_data
     """
+    if 'password' not in context.user_data:
+        return await ask_password_again(update, context)
+
     context.user_data['email'] = update.message.text
 
     await update.message.reply_text("Напишіть про себе:")
@@ -139,7 +165,11 @@ async def get_bio(update:Update, context:ContextTypes.DEFAULT_TYPE):
        - Отримує додаткову інфо
        - Відображає інлайн-клавіатуру з двома кнопками для вибору ролі: "Тільки шукати наявні" та "Створювати власні івенти".
        - Змінює стан на CREATOR
+       - Повертає до введення пароля, якщо його нема в user_data
     """
+    if 'password' not in context.user_data:
+        return await ask_password_again(update, context)
+
     context.user_data['bio'] = update.message.text
     
     keyboard = [
@@ -200,10 +230,16 @@ async def handle_register_user(update:Update, context:ContextTypes.DEFAULT_TYPE)
        - Викликає зовнішню функцію register_user
        - Повідомялє користувача про статус помилки
        - Відображає персоналізовану клавіатуру
+       - Завершує реєстрацію без створення акаунта, якщо пароля нема в user_data
     """
     query = update.callback_query
     await query.answer()
 
+    if 'password' not in context.user_data:
+        context.user_data.clear()
+        await query.message.reply_text("Реєстрацію було перервано, пароль не збережено. Почніть реєстрацію знову.")
+        return ConversationHandler.END
+
     user, error = await register_user(
         username=context.user_data.get('username'),
         password=context.user_data.get('password'),
@@ -258,8 +294,11 @@ registration_conv_handler = ConversationHandler(
         ],
     },
     fallbacks=[
-        CallbackQueryHandler(cancel_registration, pattern='^cancel$')
+        CallbackQueryHandler(cancel_registration, pattern='^cancel$'),
+        CommandHandler('cancel', cancel_registration)
     ],
+    name="registration",
+    persistent=True,
     per_message=False
     
 )
\ No newline at end of file
@@ -0,0 +1,141 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+def _init_worker(settings_module:str):
+    """Налаштовує Django в процесі пулу, щоб були доступні PASSWORD_HASHERS"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+    django.setup()
+
+
+def _make_password(password:str) -> str:
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def _check_password(password:str, encoded:str):
+    """Перевіряє пароль та, якщо хеш застарів (змінився алгоритм або кількість ітерацій), обчислює новий
+
+    Returns:
+        tuple: (чи правильний пароль, новий хеш або None)
+    """
+    from django.contrib.auth.hashers import check_password, make_password
+
+    # Django викликає setter лише для правильного пароля, якщо хеш потрібно оновити
+    new_encoded = []
+    is_valid = check_password(password, encoded, setter=lambda raw: new_encoded.append(make_password(raw)))
+    return is_valid, new_encoded[0] if new_encoded else None
+
+
+class PasswordHasherPool:
+    """Обмежений пул процесів для хешування та перевірки паролів
+
+    PBKDF2 займає сотні мілісекунд процесорного часу і в потоці блокує GIL
+    для всього бота, тому обчислення виконуються в окремих процесах.
+    Кількість одночасних завдань обмежена розміром пулу, решта чекає
+    в циклі подій, не заповнюючи чергу пулу.
+    """
+
+    def __init__(self, max_workers:int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "get_together.settings"),),
+                )
+            return self._executor
+
+    async def run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def make_password(self, password:str) -> str:
+        """Повертає хеш пароля для збереження в User.password"""
+        return await self.run(_make_password, password)
+
+    async def check_password(self, password:str, encoded:str):
+        """Перевіряє пароль за збереженим хешем
+
+        Returns:
+            tuple: (чи правильний пароль, новий хеш, якщо збережений потрібно оновити, або None)
+        """
+        return await self.run(_check_password, password, encoded)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+class AttemptThrottle:
+    """Обмежує кількість спроб за ковзним вікном часу для кожного ключа
+
+    Зберігає час спроб не більше ніж для `max_keys` ключів, найдавніше
+    використані ключі витісняються.
+    """
+
+    def __init__(self, max_attempts:int, window:float, max_keys:int = 10000):
+        """
+        Args:
+            max_attempts (int): Дозволена кількість спроб у вікні
+            window (float): Тривалість вікна в секундах
+            max_keys (int): Максимальна кількість ключів, для яких зберігаються спроби
+        """
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key) -> bool:
+        """Реєструє спробу та повертає False, якщо ліміт спроб для ключа вичерпано"""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.pop(key, None) or deque()
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+
+            allowed = len(attempts) < self.max_attempts
+            if allowed:
+                attempts.append(now)
+            if attempts:
+                self._attempts[key] = attempts
+
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+            return allowed
+
+    def reset(self, key):
+        """Скидає спроби для ключа, наприклад, після успішного входу"""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+password_hasher = PasswordHasherPool(max_workers=settings.BOT_HASHING_WORKERS)
+
+password_throttle = AttemptThrottle(
+    max_attempts=settings.BOT_PASSWORD_ATTEMPTS,
+    window=settings.BOT_PASSWORD_ATTEMPTS_WINDOW,
+)
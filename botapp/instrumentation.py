@@ -0,0 +1,198 @@
+import functools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from telegram.ext import Application, BaseHandler, ConversationHandler
+from telegram.request import HTTPXRequest
+
+from get_together.instrumentation import collect_queries, report_queries, should_sample
+from get_together.metrics import registry, cache_collector
+
+from .cache import user_profile_cache
+from .executor import db_executor
+
+logger = logging.getLogger(__name__)
+
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds", "Час виконання обробника бота", ("handler",),
+)
+HANDLER_DB_DURATION = registry.histogram(
+    "bot_handler_db_duration_seconds", "Час запитів до БД за один виклик обробника", ("handler",),
+)
+HANDLER_API_DURATION = registry.histogram(
+    "bot_handler_api_duration_seconds", "Час запитів до Bot API за один виклик обробника", ("handler",),
+)
+HANDLER_CALLS = registry.counter(
+    "bot_handler_calls_total", "Кількість викликів обробника", ("handler", "outcome"),
+)
+HANDLER_DB_QUERIES = registry.counter(
+    "bot_handler_db_queries_total", "Кількість запитів до БД з обробника", ("handler",),
+)
+API_DURATION = registry.histogram(
+    "bot_api_request_duration_seconds", "Час запиту до Telegram Bot API", ("method",),
+)
+API_REQUESTS = registry.counter(
+    "bot_api_requests_total", "Кількість запитів до Telegram Bot API", ("method", "status"),
+)
+
+DB_EXECUTOR_QUEUE = registry.gauge(
+    "bot_db_executor_queue_depth", "Завдання, що чекають вільного потоку пулу БД бота",
+)
+DB_EXECUTOR_RUNNING = registry.gauge(
+    "bot_db_executor_running", "Завдання, що виконуються в пулі БД бота",
+)
+DB_EXECUTOR_MAX_WAIT = registry.gauge(
+    "bot_db_executor_max_wait_seconds", "Найдовше очікування завдання в черзі пулу БД бота",
+)
+
+
+def collect_db_executor():
+    stats = db_executor.stats()
+    DB_EXECUTOR_QUEUE.set(stats["queue_depth"])
+    DB_EXECUTOR_RUNNING.set(stats["running"])
+    DB_EXECUTOR_MAX_WAIT.set(stats["max_wait"])
+
+
+registry.register_collector(collect_db_executor)
+registry.register_collector(cache_collector("bot_profiles", user_profile_cache.stats))
+
+# Сумарний час запитів до Bot API в поточному виклику обробника
+_api_time:ContextVar[list | None] = ContextVar("bot_api_time", default=None)
+
+
+class HandlerSummary:
+    """Агрегати викликів обробників за інтервал для періодичного рядка в лозі"""
+
+    def __init__(self):
+        self._entries = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, handler:str, duration:float, db:float, api:float, error:bool):
+        with self._lock:
+            entry = self._entries.setdefault(handler, [0, 0, 0.0, 0.0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += error
+            entry[2] += duration
+            entry[3] = max(entry[3], duration)
+            entry[4] += db
+            entry[5] += api
+
+    def drain(self) -> tuple:
+        """Повертає тривалість інтервалу та агрегати і починає новий інтервал"""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            started, self._started = self._started, time.monotonic()
+        return time.monotonic() - started, entries
+
+    def log(self, limit:int = 10):
+        """Записує в лог найповільніші за сумарним часом обробники за інтервал"""
+        interval, entries = self.drain()
+        if not entries:
+            return
+
+        parts = []
+        for handler, (count, errors, total, worst, db, api) in sorted(entries.items(), key=lambda item: -item[1][2])[:limit]:
+            parts.append(
+                f"{handler} n={count} err={errors} avg={total / count * 1000:.0f}ms "
+                f"max={worst * 1000:.0f}ms db={db / count * 1000:.0f}ms api={api / count * 1000:.0f}ms"
+            )
+        logger.info("Bot handlers in last %.0fs: %s", interval, "; ".join(parts))
+
+
+handler_summary = HandlerSummary()
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest, що вимірює запити до Bot API (sendMessage, editMessageText, ...)
+
+    Час запиту додається також до обробника, з якого його викликано.
+    """
+
+    async def do_request(self, url:str, method:str, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        status = "error"
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+            status = str(code)
+            return code, payload
+        finally:
+            duration = time.perf_counter() - started
+            API_DURATION.observe(duration, method=api_method)
+            API_REQUESTS.inc(method=api_method, status=status)
+            api_time = _api_time.get()
+            if api_time is not None:
+                api_time[0] += duration
+
+
+def iter_handlers(handler:BaseHandler):
+    """Повертає всі обробники, включно з вкладеними в ConversationHandler"""
+    if isinstance(handler, ConversationHandler):
+        nested = [*handler.entry_points, *handler.fallbacks]
+        for state_handlers in handler.states.values():
+            nested.extend(state_handlers)
+        for child in nested:
+            yield from iter_handlers(child)
+    else:
+        yield handler
+
+
+def handler_label(callback) -> str:
+    """Повертає назву обробника для метрик, наприклад `events.paginate_event`"""
+    return f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__qualname__}"
+
+
+def instrument_callback(callback):
+    """Обгортає колбек обробника вимірюванням часу, запитів до БД та до Bot API
+
+    Для кожного виклику записує час обробника, час у БД (включно з запитами
+    в пулі `db_executor`) та час запитів до Bot API. Для вибраної частки
+    оновлень також перевіряє бюджет запитів до БД, як QueryInstrumentationMiddleware.
+    Значення, яке повертає колбек (наступний стан розмови), не змінюється.
+    """
+    if getattr(callback, "instrumented", False):
+        return callback
+
+    label = handler_label(callback)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        sampled = should_sample()
+        api_time = [0.0]
+        token = _api_time.set(api_time)
+        error = False
+        started = time.perf_counter()
+        try:
+            with collect_queries(track_fingerprints=sampled) as stats:
+                return await callback(update, context)
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            _api_time.reset(token)
+
+            HANDLER_DURATION.observe(duration, handler=label)
+            HANDLER_DB_DURATION.observe(stats.duration, handler=label)
+            HANDLER_API_DURATION.observe(api_time[0], handler=label)
+            HANDLER_DB_QUERIES.inc(stats.count, handler=label)
+            HANDLER_CALLS.inc(handler=label, outcome="error" if error else "ok")
+            handler_summary.record(label, duration, stats.duration, api_time[0], error)
+
+            if sampled:
+                report_queries(stats, f"bot {label}")
+            registry.maybe_flush()
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_handlers(application:Application):
+    """Додає вимірювання до всіх зареєстрованих обробників, включно з вкладеними в розмови"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            for child in iter_handlers(handler):
+                child.callback = instrument_callback(child.callback)
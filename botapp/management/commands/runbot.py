@@ -1,8 +1,22 @@
+import asyncio
+
 from django.core.management.base import BaseCommand
-from botapp.telegram_bot import run_bot
+from botapp.telegram_bot import run_bot, set_webhook, WEBHOOK_URL
 
 class Command(BaseCommand):
     help = "Запуск Telegram бота"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--set-webhook",
+            action="store_true",
+            help="Лише зареєструвати вебхук для обробки оновлень у процесі Django (ASGI) та завершити роботу",
+        )
+
     def handle(self, *args, **kwargs):
-        run_bot()
\ No newline at end of file
+        if kwargs["set_webhook"]:
+            asyncio.run(set_webhook())
+            self.stdout.write(self.style.SUCCESS(f"Вебхук зареєстровано: {WEBHOOK_URL}"))
+            return
+
+        run_bot()
@@ -0,0 +1,452 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from get_together.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STATE_EXPIRED = registry.counter(
+    "bot_state_expired_total", "Розмови та user_data, видалені після тривалої неактивності", ("kind",),
+)
+STATE_RECLAIMED_BYTES = registry.counter(
+    "bot_state_reclaimed_bytes_total", "Розмір серіалізованого стану бота, видаленого після неактивності",
+)
+
+# Ключі user_data, що не зберігаються на диск (пароль під час реєстрації)
+TRANSIENT_KEYS = frozenset({"password"})
+
+# Внутрішні атрибути Application, без яких не можна вивантажити user_data з пам'яті
+# та завершити розмову. Їх немає в публічному API, тому версія python-telegram-bot
+# зафіксована в requirements.txt, а тести перевіряють, що атрибути існують
+APPLICATION_INTERNALS = ("_user_data", "_conversation_handler_conversations")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_data_updated_at ON user_data (updated_at);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (name, key)
+);
+CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at);
+"""
+
+_SKIP = object()
+
+
+class StateLockedError(RuntimeError):
+    """Файл стану бота вже використовує інший процес"""
+
+
+def to_primitive(value):
+    """Залишає лише значення, що без втрат зберігаються в JSON
+
+    Рядки, числа, bool, None, списки та словники з рядковими ключами
+    зберігаються, об'єкти (наприклад, моделі ORM) відкидаються.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [item for item in map(to_primitive, value) if item is not _SKIP]
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = to_primitive(item)
+            if isinstance(key, str) and item is not _SKIP:
+                result[key] = item
+        return result
+    return _SKIP
+
+
+def dump_user_data(data:dict) -> str:
+    data = {key: value for key, value in data.items() if key not in TRANSIENT_KEYS}
+    return json.dumps(to_primitive(data), ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLitePersistence(BasePersistence):
+    """Зберігає стани ConversationHandler та user_data в окремому файлі SQLite
+
+    - Зберігаються лише примітивні значення у вигляді компактного JSON,
+      ключі з TRANSIENT_KEYS не потрапляють на диск.
+    - PTB передає змінені дані раз на `update_interval` секунд. Вони
+      записуються однією транзакцією, незмінені дані пропускаються.
+    - user_data завантажується ліниво, при першому оновленні від користувача,
+      а не вся таблиця під час запуску.
+    - `evict_idle` вивантажує з пам'яті user_data користувачів, що давно не писали боту.
+    - `expire_idle` завершує покинуті розмови та видаляє давно не використані user_data.
+      Давність визначається за індексами `updated_at` у файлі та впорядкованим
+      за часом останньої активності `_last_seen` у пам'яті.
+
+    Усі звернення до SQLite виконуються в одному окремому потоці, щоб не блокувати цикл подій.
+    """
+
+    def __init__(self, path, update_interval:float = 60):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.path = Path(path)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bot-state")
+        self._connection = None
+        self._dirty_users = {}
+        self._dirty_conversations = {}
+        self._saved_hashes = {}
+        # Користувачі, чиї оновлення оброблені або обробляються, але ще не передані в update_user_data
+        self._unsaved_users = set()
+        # user_id -> час останнього оновлення, від найдавнішого до найновішого
+        self._last_seen = OrderedDict()
+        self._pending_flush = None
+        self._lock_file = None
+
+    def acquire(self):
+        """Закріплює файл стану за поточним процесом
+
+        Два процеси з власними Application на одному файлі мали б різні стани
+        розмов у пам'яті, а оновлення одного чату оброблялись би в обох без
+        спільного порядку. Блокування знімається в `flush` під час зупинки бота.
+
+        Raises:
+            StateLockedError: Якщо файл стану вже використовує інший процес
+        """
+        if fcntl is None or self._lock_file is not None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path.with_name(self.path.name + ".lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise StateLockedError(f"Bot state {self.path} is used by another process")
+        self._lock_file = lock_file
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Робота з SQLite (лише в потоці self._executor)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _load_user(self, user_id:int):
+        row = self._connect().execute("SELECT data FROM user_data WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def _load_conversations(self, name:str) -> list:
+        return self._connect().execute("SELECT key, state FROM conversations WHERE name = ?", (name,)).fetchall()
+
+    def _write(self, users:dict, conversations:dict):
+        now = time.time()
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO user_data (user_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(user_id, data, now) for user_id, data in users.items() if data is not None],
+            )
+            connection.executemany(
+                "DELETE FROM user_data WHERE user_id = ?",
+                [(user_id,) for user_id, data in users.items() if data is None],
+            )
+            connection.executemany(
+                "INSERT INTO conversations (name, key, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name, key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                [(name, key, state, now) for (name, key), state in conversations.items() if state is not None],
+            )
+            connection.executemany(
+                "DELETE FROM conversations WHERE name = ? AND key = ?",
+                [(name, key) for (name, key), state in conversations.items() if state is None],
+            )
+
+    def _touch_users(self, last_seen:dict):
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "UPDATE user_data SET updated_at = MAX(updated_at, ?) WHERE user_id = ?",
+                [(seen, user_id) for user_id, seen in last_seen.items()],
+            )
+
+    def _find_expired(self, users_deadline:float, conversations_deadline:float) -> tuple:
+        connection = self._connect()
+        users = connection.execute(
+            "SELECT user_id, length(CAST(data AS BLOB)) FROM user_data WHERE updated_at < ?",
+            (users_deadline,),
+        ).fetchall()
+        conversations = connection.execute(
+            "SELECT name, key, length(CAST(key AS BLOB)) + length(CAST(state AS BLOB)) "
+            "FROM conversations WHERE updated_at < ?",
+            (conversations_deadline,),
+        ).fetchall()
+        return users, conversations
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # Пакетний запис
+
+    async def _flush_soon(self):
+        """Записує всі змінені дані однією транзакцією
+
+        PTB викликає update_* для всіх змінених ключів одночасно (asyncio.gather),
+        тож перший виклик планує запис, а решта встигає додати свої ключі до нього.
+        """
+        if self._pending_flush is None:
+            self._pending_flush = asyncio.ensure_future(self._flush_batch())
+        await asyncio.shield(self._pending_flush)
+
+    async def _flush_batch(self):
+        await asyncio.sleep(0)
+        self._pending_flush = None
+        users, self._dirty_users = self._dirty_users, {}
+        conversations, self._dirty_conversations = self._dirty_conversations, {}
+        if not users and not conversations:
+            return
+        try:
+            await self._run(self._write, users, conversations)
+        except Exception:
+            # Незаписані дані повертаються в чергу, якщо їх ще не змінили новіші
+            for user_id, data in users.items():
+                self._dirty_users.setdefault(user_id, data)
+            for key, state in conversations.items():
+                self._dirty_conversations.setdefault(key, state)
+            raise
+
+    def _mark_user(self, user_id:int, data:str | None):
+        digest = hash(data)
+        if self._saved_hashes.get(user_id) == digest and user_id not in self._dirty_users:
+            return False
+        self._saved_hashes[user_id] = digest
+        self._dirty_users[user_id] = data
+        return True
+
+    # BasePersistence
+
+    async def get_user_data(self) -> dict:
+        # user_data завантажується ліниво в refresh_user_data
+        return {}
+
+    async def refresh_user_data(self, user_id:int, user_data:dict):
+        self._unsaved_users.add(user_id)
+        self._last_seen[user_id] = time.time()
+        self._last_seen.move_to_end(user_id)
+        if user_id in self._saved_hashes:
+            return
+
+        data = await self._run(self._load_user, user_id)
+        self._saved_hashes[user_id] = hash(data)
+        if data is not None:
+            for key, value in json.loads(data).items():
+                user_data.setdefault(key, value)
+
+    async def update_user_data(self, user_id:int, data:dict):
+        self._unsaved_users.discard(user_id)
+        if not data and user_id not in self._saved_hashes:
+            # Дані користувача не завантажувались (або вивантажені), порожній словник
+            # у пам'яті не означає, що їх треба видалити з диска
+            return
+        serialized = dump_user_data(data) if data else None
+        if serialized == "{}":
+            serialized = None
+        if self._mark_user(user_id, serialized):
+            await self._flush_soon()
+
+    async def drop_user_data(self, user_id:int):
+        self._unsaved_users.discard(user_id)
+        self._last_seen.pop(user_id, None)
+        if self._mark_user(user_id, None):
+            await self._flush_soon()
+
+    async def get_conversations(self, name:str) -> dict:
+        rows = await self._run(self._load_conversations, name)
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def update_conversation(self, name:str, key:tuple, new_state):
+        self._dirty_conversations[(name, json.dumps(list(key)))] = None if new_state is None else json.dumps(new_state)
+        await self._flush_soon()
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_chat_data(self, chat_id:int, data:dict):
+        pass
+
+    async def update_bot_data(self, data:dict):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id:int):
+        pass
+
+    async def refresh_chat_data(self, chat_id:int, chat_data:dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data:dict):
+        pass
+
+    async def flush(self):
+        """Записує незбережені дані та закриває файл під час зупинки бота"""
+        if self._pending_flush is not None:
+            await asyncio.shield(self._pending_flush)
+        await self._flush_batch()
+        await self._run(self._close)
+        self.release()
+
+    # Вивантаження та видалення неактивних даних
+
+    def _idle_users(self, deadline:float) -> list:
+        """Повертає користувачів, неактивних з `deadline`, проходячи лише початок `_last_seen`"""
+        idle = []
+        for user_id, seen in self._last_seen.items():
+            if seen >= deadline:
+                break
+            idle.append(user_id)
+        return idle
+
+    def _is_pending(self, user_id:int) -> bool:
+        # PTB викликає refresh_user_data перед обробкою оновлення, а update_user_data — при
+        # наступному update_persistence після неї, тож між ними зміни user_data ще не записані
+        return user_id in self._dirty_users or user_id in self._unsaved_users
+
+    async def evict_idle(self, application, max_idle:float) -> int:
+        """Вивантажує з пам'яті user_data користувачів, неактивних довше за `max_idle` секунд
+
+        Дані спершу записуються на диск і завантажаться знову при наступному
+        оновленні від користувача.
+
+        Returns:
+            int: Кількість вивантажених користувачів
+        """
+        deadline = time.time() - max_idle
+        if not self._idle_users(deadline):
+            return 0
+
+        await application.update_persistence()
+
+        evicted = {}
+        # Після очікування користувач міг знову написати боту, тож час перевіряється ще раз
+        for user_id in self._idle_users(deadline):
+            if self._is_pending(user_id):
+                continue
+            # Application.drop_user_data видалив би дані і з persistence, тому вони
+            # вивантажуються через внутрішній атрибут (див. APPLICATION_INTERNALS)
+            application._user_data.pop(user_id, None)
+            evicted[user_id] = self._last_seen.pop(user_id)
+            self._saved_hashes.pop(user_id, None)
+
+        if evicted:
+            # Час останньої активності зберігається у файлі, щоб expire_idle не видалив
+            # дані користувача, який лише читав і нічого не змінював
+            await self._run(self._touch_users, evicted)
+        return len(evicted)
+
+    async def expire_idle(self, application, conversation_ttl:float, user_data_ttl:float) -> dict:
+        """Завершує покинуті розмови та видаляє user_data неактивних користувачів
+
+        Розмова завершується, якщо її стан не змінювався і користувач не писав боту
+        довше за `conversation_ttl` секунд (обробник може залишити розмову в тому ж
+        стані, наприклад при неспівпадінні паролів). Разом з нею з user_data
+        прибираються ключі TRANSIENT_KEYS (пароль).
+        user_data видаляється з пам'яті та з файлу, якщо користувач не писав боту
+        довше за `user_data_ttl` секунд. Кандидати вибираються за індексами
+        `updated_at` у файлі та з початку `_last_seen` у пам'яті, без перебору
+        всіх розмов і користувачів.
+
+        Returns:
+            dict: Кількість завершених розмов, видалених user_data та розмір
+                їхнього серіалізованого стану в байтах
+        """
+        started = time.time()
+        users_deadline = started - user_data_ttl
+        conversations_deadline = started - conversation_ttl
+        await application.update_persistence()
+
+        stored_users, stored_conversations = await self._run(
+            self._find_expired, users_deadline, conversations_deadline,
+        )
+        report = {"conversations": 0, "users": 0, "bytes": 0}
+
+        # Application не має публічного доступу до станів розмов, а ConversationHandler.conversation_timeout
+        # без JobQueue ігнорується, тому розмови завершуються через внутрішні словники Application
+        # (див. APPLICATION_INTERNALS)
+        for name, raw_key, size in stored_conversations:
+            key = tuple(json.loads(raw_key))
+            if self._last_seen.get(key[-1], 0) >= conversations_deadline:
+                # Користувач продовжує писати боту, хоча стан розмови не змінюється
+                continue
+            states = application._conversation_handler_conversations.get(name)
+            if states is not None and key in states:
+                # Видалення з TrackingDict потрапить у persistence при наступному update_persistence
+                states.pop(key)
+            else:
+                self._dirty_conversations[(name, raw_key)] = None
+            if key[-1] in application.user_data:
+                for transient in TRANSIENT_KEYS:
+                    application.user_data[key[-1]].pop(transient, None)
+            report["conversations"] += 1
+            report["bytes"] += size
+
+        candidates = dict(stored_users)
+        for user_id in self._idle_users(users_deadline):
+            candidates.setdefault(user_id, 0)
+        expired = []
+        for user_id, size in candidates.items():
+            if self._last_seen.get(user_id, 0) >= users_deadline or self._is_pending(user_id):
+                continue
+            if user_id in application.user_data:
+                size = len(json.dumps(to_primitive(application.user_data[user_id]), ensure_ascii=False).encode())
+            application.drop_user_data(user_id)
+            self._last_seen.pop(user_id, None)
+            expired.append(user_id)
+            report["users"] += 1
+            report["bytes"] += size
+
+        await application.update_persistence()
+        await self._flush_soon()
+        for user_id in expired:
+            if user_id not in self._last_seen:
+                self._saved_hashes.pop(user_id, None)
+
+        STATE_EXPIRED.inc(report["conversations"], kind="conversation")
+        STATE_EXPIRED.inc(report["users"], kind="user_data")
+        STATE_RECLAIMED_BYTES.inc(report["bytes"])
+        return report
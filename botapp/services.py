@@ -1,10 +1,14 @@
-from django.contrib.auth import authenticate, get_user_model
-from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
 from users.models import User
 from django.core.validators import validate_email
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils.timezone import make_aware
-from events.models import Event, Category
+from events.models import Event, Category, JoinStatus
+from events.pagination import keyset_filter, invert_ordering
+from .cache import UserProfile, user_profile_cache
+from .executor import db_sync_to_async
+from .hashing import password_hasher, password_throttle
 from typing import List
 from datetime import datetime
 from typing import Literal
@@ -12,40 +16,90 @@ from typing import Literal
 
 User = get_user_model()
 
-def login_user(username:str, password:str): 
-    """Авторизація користувача за іменем та паролем
+async def login_user(username:str, password:str, telegram_id:int): 
+    """Авторизація користувача за іменем та паролем і прив'язка telegram id
+
+    Пароль перевіряється в пулі процесів `password_hasher`, а кількість спроб
+    для одного telegram id обмежена `password_throttle`.
 
     Args:
         username (str): Ім'я користувача
         password (str): Пароль
+        telegram_id (int): Telegram id, до якого прив'язується профіль
 
     Returns:
-       Об'єкм User, якщо авторизація успішна, None якщо ні
-    """    ''''''
-    return  sync_to_async(authenticate)(username=username, password=password)
+       Об'єкт User, None якщо авторизація успішна. None, рядок з помилкою, якщо ні
+    """
+    if not password_throttle.allow(telegram_id):
+        return None, "Забагато спроб. Спробуйте пізніше."
+
+    user = await db_sync_to_async(User.objects.filter(username=username).first)()
+
+    if user is None:
+        # Хешування все одно виконується, щоб час відповіді не видавав, чи існує користувач
+        await password_hasher.make_password(password)
+        return None, "Неправельний логін або пароль"
+
+    is_valid, new_password = await password_hasher.check_password(password, user.password)
+    if not is_valid or not user.is_active:
+        return None, "Неправельний логін або пароль"
+
+    def login():
+        update_fields = ['telegram_id']
+        if new_password is not None:
+            user.password = new_password
+            update_fields.append('password')
+
+        with transaction.atomic():
+            user.telegram_id = telegram_id
+            user.save(update_fields=update_fields)
+
+    await db_sync_to_async(login)()
+    password_throttle.reset(telegram_id)
+    user_profile_cache.invalidate(telegram_id)
+    return user, None
 
-async def get_user_profile(telegram_id:int):
+async def get_user_profile(telegram_id:int) -> UserProfile:
     """Повертає профіль користувача за telegram id
 
+    Профіль береться з `user_profile_cache`, запит до БД виконується лише
+    при промаху кешу.
+
     Args:
         telegram_id (int): telegram id користувача
 
     Returns:
-        Об'єкт User, якщо проффіль існує, None якщо не існує
-    """    ''''''
-    user = sync_to_async(User.objects.get)(telegram_id=telegram_id)
-    return await user
+        UserProfile: Знімок профілю користувача
+
+    Raises:
+        User.DoesNotExist: Якщо користувача з таким telegram id не існує
+    """
+    profile = user_profile_cache.get(telegram_id)
+    if profile is None:
+        user = await db_sync_to_async(
+            User.objects.only('id', 'username', 'email', 'bio', 'is_creator').get
+        )(telegram_id=telegram_id)
+        profile = UserProfile.from_user(user)
+        user_profile_cache.set(telegram_id, profile)
+    return profile
 
 async def logout_user(telegram_id:int):
     """Вихід з профілю за telegram id
 
     Args:
         telegram_id (int): telegram id користувача
-    """    ''''''
-    user = await sync_to_async(User.objects.get)(telegram_id=telegram_id)
-    user.telegram_id = None
-    
-    await sync_to_async(user.save)()
+
+    Raises:
+        User.DoesNotExist: Якщо користувач не авторизований
+    """
+    def logout():
+        with transaction.atomic():
+            user = User.objects.get(telegram_id=telegram_id)
+            user.telegram_id = None
+            user.save(update_fields=['telegram_id'])
+
+    await db_sync_to_async(logout)()
+    user_profile_cache.invalidate(telegram_id)
 
 async def register_user(username:str, password:str, email:str, bio:str, is_creator:bool, telegram_id:int):
     """Реєстарація користувача
@@ -62,43 +116,77 @@ async def register_user(username:str, password:str, email:str, bio:str, is_creat
         Об'єкт User, None, якщо реєстрація доступна. None, рядок з помилокою, якщо виникла помилка при реєестрації
     """    ''''''
 
-    is_username_exist = await sync_to_async(User.objects.filter(username=username).exists)()
+    if not password:
+        # make_password(None) повертає непридатний хеш, і в такий акаунт неможливо увійти
+        return None, "Пароль не вказано."
 
-    if is_username_exist:
-        return None, 'Користувач з таким іменем уже існує.'
-    
     try:
         validate_email(email)
     except ValidationError:
         return None, "Введено некоректну адресу електронної пошти."
 
+    if not password_throttle.allow(telegram_id):
+        return None, "Забагато спроб. Спробуйте пізніше."
 
-    try:
-        user = await sync_to_async(User.objects.create)(
+    encoded_password = await password_hasher.make_password(password)
+
+    def register():
+        user = User(
             username=username,
             email=email,
             bio=bio,
             is_creator=is_creator,
-            telegram_id=telegram_id
+            telegram_id=telegram_id,
+            password=encoded_password,
         )
 
-        await sync_to_async(user.set_password)(password)
-        await sync_to_async(user.save)()
-
+        with transaction.atomic():
+            if User.objects.filter(username=username).exists():
+                return None, 'Користувач з таким іменем уже існує.'
+            user.save()
         return user, None
+
+    try:
+        return await db_sync_to_async(register)()
     except Exception as e:
         return None, e
 
-@sync_to_async
-def get_all_events() -> List[Event]:
-    """Повератає всі події
+EVENT_BROWSE_ORDERING = ("start_time", "id")
+
+# Колонки, потрібні для картки події в боті
+EVENT_CARD_FIELDS = (
+    "title", "description", "start_time", "address", "participants_count",
+    "category__name", "creator__username",
+)
+
+@db_sync_to_async
+def get_event_window(filters:dict, cursor:list | None = None, reverse:bool = False):
+    """Повертає одну подію для перегляду за курсором
+
+    Замість завантаження всього списку подій читає не більше двох рядків
+    після (або перед) поточною подією за індексом (start_time, id).
+
+    Args:
+        filters (dict): Умови фільтрації подій (наприклад, {"category__name": "Спорт"})
+        cursor (list | None): [start_time в ISO форматі, id] поточної події, None для першої події
+        reverse (bool): True, щоб отримати попередню подію
 
     Returns:
-        List[Event]: спиоск всіх подій
-    """    ''''''
-    return list(Event.objects.select_related('category', 'creator').prefetch_related('participants').all())
+        tuple: Об'єкт Event або None, якщо подій нема, та ознака наявності подій далі в цьому напрямку
+    """
+    queryset = Event.objects.filter(**filters).select_related('category', 'creator').only(*EVENT_CARD_FIELDS)
+
+    if cursor is not None:
+        start_time, event_id = cursor
+        queryset = queryset.filter(
+            keyset_filter(EVENT_BROWSE_ORDERING, (datetime.fromisoformat(start_time), event_id), reverse=reverse)
+        )
+
+    ordering = invert_ordering(EVENT_BROWSE_ORDERING) if reverse else EVENT_BROWSE_ORDERING
+    events = list(queryset.order_by(*ordering)[:2])
+    return (events[0] if events else None), len(events) > 1
 
-@sync_to_async
+@db_sync_to_async
 def get_all_categories() -> List[Category]:
     """Повератає всі категорії
 
@@ -108,41 +196,32 @@ def get_all_categories() -> List[Category]:
     return list(Category.objects.all())
 
 
-async def get_event_by_category(category_name: str):
-    """Повертає всі події за назвою категорії
+async def take_part_in_event(user_id:int, event_id:int):
+    """Взяти участь у події
+
+    Завантажує лише картку події, до якої приєднується користувач, і після
+    успішного приєднання оновлює в ній кількість учасників без повторного запиту.
 
     Args:
-        category_name (str): Назва категорії
+        user_id (int): telegram id користувача
+        event_id (int): id події
 
     Returns:
-        List[Event]: Список всі подій в певній категорї
+        tuple: JoinStatus та оновлений об'єкт Event для відображення. None, None якщо події не існує
     """
-    category = await sync_to_async(Category.objects.get)(name=category_name)
-
-    return await sync_to_async(
-        lambda: list(
-            Event.objects.filter(category=category)
-            .select_related('category', 'creator')
-            .prefetch_related('participants')
-            .all()
-        )
-    )()
+    profile = await get_user_profile(user_id)
 
-async def take_part_in_event(user_id, event_title):
-    """Взяти участь у події
+    def join():
+        event = Event.objects.select_related('category', 'creator').only(*EVENT_CARD_FIELDS).filter(pk=event_id).first()
+        if event is None:
+            return None, None
 
-    Args:
-        user_id (int): telegram id користувача
-        event_title (str): Назва події
+        status = event.add_participant(User(pk=profile.id))
+        if status == JoinStatus.JOINED:
+            event.participants_count += 1
+        return status, event
 
-    """
-    user = await get_user_profile(user_id)
-    try:
-        event = await sync_to_async(Event.objects.get)(title=event_title)
-        await sync_to_async(event.participants.add)(user)
-        return True
-    except ObjectDoesNotExist:
-        return False
+    return await db_sync_to_async(join)()
     
 async def create_event(title:str, description:str, start_time:str, address:str, category_name:str, creator_id:int):
     """Створення подій з вхідними данмими
@@ -158,108 +237,102 @@ async def create_event(title:str, description:str, start_time:str, address:str,
     Returns:
         Об'єкт User, None якщо успішно створено. None, рядок з помилокою в разі виникнення помилки
     """
-    is_title_exist = await sync_to_async(Event.objects.filter(title=title).exists)()
-    if is_title_exist:
-        return None, "Подія з такою назвою вже існує"
-    
     try:
-        start_time_parsed = datetime.strptime(start_time, "%d.%m.%Y %H:%M")
-    except:
+        start_time_parsed = make_aware(datetime.strptime(start_time, "%d.%m.%Y %H:%M"))
+    except ValueError:
         return None, "Неправильний формат дати."
 
-
     user = await get_user_profile(creator_id)
-    
 
-    category, _ = await sync_to_async(Category.objects.get_or_create)(name=category_name)
-
-    new_event = await sync_to_async(Event.objects.create)(
-        title=title,
-        description=description,
-        start_time=make_aware(start_time_parsed),
-        address=address,
-        creator=user,
-        category=category
-    )
-
-    return new_event, None
+    def create():
+        with transaction.atomic():
+            if Event.objects.filter(title=title).exists():
+                return None, "Подія з такою назвою вже існує"
+
+            category, _ = Category.objects.get_or_create(name=category_name)
+            new_event = Event.objects.create(
+                title=title,
+                description=description,
+                start_time=start_time_parsed,
+                address=address,
+                creator_id=user.id,
+                category=category
+            )
+        return new_event, None
+
+    return await db_sync_to_async(create)()
     
-@sync_to_async
-def get_events_created_by_user(user) -> List[Event]:
-    """Повертає список подій за власником події
+async def delete_event(event_id:int):
+    """Видалення події за її id
 
     Args:
-        user (_type_): Об'єк User
-
-    Returns:
-        List[Event]: Список подій відвільтрованих за власником
-    """
-    return list(Event.objects.filter(creator=user).select_related('category', 'creator').prefetch_related('participants').all())
-
-async def delete_event(event_title:str):
-    """Видалення події за її назвою
-
-    Args:
-        event_title (str): Назва події для видалення
+        event_id (int): id події для видалення
 
     Returns:
         str: Рядок з статусом видалення ("Подія успішно видалена!" або "Подія вже видалена!").
     """
-    try:
-        event = await sync_to_async(Event.objects.get)(title=event_title)
-        await sync_to_async(event.delete)()
+    def delete():
+        with transaction.atomic():
+            deleted, _ = Event.objects.filter(pk=event_id).delete()
+        return deleted
+
+    if await db_sync_to_async(delete)():
         return "Подія успішно видалена!"
-    except ObjectDoesNotExist:
-        return "Подія вже видалена!"
+    return "Подія вже видалена!"
     
 async def edit_event_field(
-    event_title:str,
+    event_id:int,
     new_value:str, 
     filed: Literal["username", 'description', 'start_time', 'address', 'category']
 ):
     """Редагування довільного поля події
 
     Args:
-        event_title (str): Назва події для редагування
+        event_id (int): id події для редагування
         new_value (str): Нове значення
         filed (Literal[&quot;username&quot;, &#39;description&#39;, &#39;start_time&#39;, &#39;address&#39;, &#39;category&#39;]): Поле для редагування
 
     Returns:
         str: Статус редагування
     """
-    is_event_exist = await sync_to_async(Event.objects.filter(title=event_title).exists)()
-    if is_event_exist == False:
-        return False
-    
-    event = await sync_to_async(Event.objects.get)(title=event_title)
-
     match filed:
-        case "title":
-            event.title = new_value
-            msg = "Назву успішно змінена"
-        case "description":
-            event.description = new_value
-            msg = "Опис успішно змінений"
         case "start_time":
             try:
-                start_time_parsed = datetime.strptime(new_value, "%d.%m.%Y %H:%M")
-                event.start_time = make_aware(start_time_parsed)
-                msg = "Дата початку успішно змінена"
-            except:
-                msg = "Неправильний формат дати!"
-        case "address":
-            event.address = new_value
-            msg = "Адреса успішно змінена"
-        case "category":
-            category, _ = await sync_to_async(Category.objects.get_or_create)(name=new_value)
-            event.category = category
-            msg = "Категарія успішно змінена"
-
+                new_value = make_aware(datetime.strptime(new_value, "%d.%m.%Y %H:%M"))
+            except ValueError:
+                return "Неправильний формат дати!"
+        case "title" | "description" | "address" | "category":
+            pass
         case _:
-            msg = "Невідоме поле!"
-        
-    await sync_to_async(event.save)()
-    return msg
+            return "Невідоме поле!"
+
+    def edit():
+        with transaction.atomic():
+            event = Event.objects.select_for_update().filter(pk=event_id).first()
+            if event is None:
+                return "Подію не знайдено"
+
+            match filed:
+                case "title":
+                    event.title = new_value
+                    msg = "Назву успішно змінена"
+                case "description":
+                    event.description = new_value
+                    msg = "Опис успішно змінений"
+                case "start_time":
+                    event.start_time = new_value
+                    msg = "Дата початку успішно змінена"
+                case "address":
+                    event.address = new_value
+                    msg = "Адреса успішно змінена"
+                case "category":
+                    event.category, _ = Category.objects.get_or_create(name=new_value)
+                    msg = "Категарія успішно змінена"
+
+            event.save()
+        return msg
+
+    return await db_sync_to_async(edit)()
         
 async def edit_profile_field(
     user_telegram_id:int, 
@@ -276,28 +349,26 @@ async def edit_profile_field(
     Returns:
         str: Статус редагування
     """
-    user = await get_user_profile(user_telegram_id)
-
-
     match field_name:
         case "username":
-            user.username = new_value
             msg = "Ім'я користувача успішно змінено"
         case "bio":
-            user.bio = new_value
             msg = "Додаткова інформація успішно змінена"
         case "email":
-             
             try:
                 validate_email(new_value)
             except ValidationError:
                 return "Введено некоректну адресу електронної пошти."
-
-            user.email = new_value
             msg = "Електронна адреса успішно змінена"
         case _:
             return "Невідоме поле"
 
-    await sync_to_async(user.save)()
-    return msg
+    def edit():
+        with transaction.atomic():
+            user = User.objects.select_for_update().get(telegram_id=user_telegram_id)
+            setattr(user, field_name, new_value)
+            user.save(update_fields=[field_name])
 
+    await db_sync_to_async(edit)()
+    user_profile_cache.invalidate(user_telegram_id)
+    return msg
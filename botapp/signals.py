@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import user_profile_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    """Видаляє з кешу бота профіль користувача після його зміни або видалення"""
+    user_profile_cache.invalidate_user(instance.pk)
+    if instance.telegram_id is not None:
+        user_profile_cache.invalidate(instance.telegram_id)
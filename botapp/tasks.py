@@ -0,0 +1,49 @@
+import asyncio
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Фонове завдання, що викликає функцію кожні `interval` секунд у циклі подій бота
+
+    Замінює JobQueue, якому потрібна додаткова залежність APScheduler.
+    Помилка у функції записується в лог і не зупиняє завдання.
+    """
+
+    def __init__(self, interval:float, callback, name:str):
+        """
+        Args:
+            interval (float): Інтервал між викликами в секундах
+            callback: Функція або корутинна функція без аргументів
+            name (str): Назва завдання для логів
+        """
+        self.interval = interval
+        self.callback = callback
+        self.name = name
+        self._task = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = self.callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
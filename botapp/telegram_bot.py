@@ -1,3 +1,4 @@
+from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 from .handlers.start import start
 from .handlers.login import login_conv_handler, get_profile, logout
@@ -7,8 +8,21 @@ from .handlers.events import paginate_event, take_part, handle_delete_event, fil
 from .handlers.create_events import create_event_conv_handler
 from .handlers.edit_event import edit_event_conv_handler
 from .handlers.edit_profile import edit_profile_conv_handler
+from .cache import user_profile_cache
+from .executor import db_executor
+from .hashing import password_hasher
+from .instrumentation import instrument_handlers, handler_summary, InstrumentedHTTPXRequest
+from .tasks import PeriodicTask
+from .updates import ChatLaneUpdateProcessor
+from .persistence import SQLitePersistence
+from django.conf import settings
+from get_together.metrics import registry
+import asyncio
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 TOKEN = os.environ.get("TELEGRAM_TOKEN", "").strip().lstrip("=")
 RAILWAY_DOMAIN = os.environ.get("RAILWAY_STATIC_URL", "your-project.up.railway.app")
 
@@ -16,10 +30,82 @@ WEBHOOK_PATH = f"/webhook/{TOKEN}"
 WEBHOOK_URL = f"https://{RAILWAY_DOMAIN}{WEBHOOK_PATH}"
 PORT = int(os.environ.get("PORT", 8443))
 
-app = ApplicationBuilder().token(TOKEN).build()
+def log_summary():
+    """Записує в лог підсумок обробників за інтервал та зберігає метрики процесу бота"""
+    handler_summary.log()
+    registry.flush()
+
+summary_task = PeriodicTask(settings.BOT_METRICS_SUMMARY_INTERVAL, log_summary, name="bot-metrics-summary")
+
+persistence = SQLitePersistence(settings.BOT_STATE_PATH, update_interval=settings.BOT_STATE_FLUSH_INTERVAL)
+
+async def sweep_state():
+    """Завершує покинуті розмови, видаляє старі user_data та вивантажує з пам'яті неактивних користувачів"""
+    app = get_application()
+    expired = await persistence.expire_idle(app, settings.BOT_CONVERSATION_TTL, settings.BOT_USER_DATA_TTL)
+    if expired["conversations"] or expired["users"]:
+        logger.info(
+            "Expired idle bot state: %s conversations, %s user_data, %s bytes",
+            expired["conversations"], expired["users"], expired["bytes"],
+        )
+
+    evicted = await persistence.evict_idle(app, settings.BOT_STATE_IDLE_TIMEOUT)
+    if evicted:
+        logger.info("Evicted idle user_data: %s users", evicted)
+
+sweep_task = PeriodicTask(settings.BOT_STATE_SWEEP_INTERVAL, sweep_state, name="bot-state-sweep")
+
+async def startup(application):
+    """Запускає періодичний підсумок метрик обробників та очищення неактивного стану розмов"""
+    summary_task.start()
+    sweep_task.start()
+
+async def shutdown(application):
+    """Записує в лог статистику кешу профілів та пулу БД і зупиняє пули під час зупинки бота"""
+    await summary_task.stop()
+    await sweep_task.stop()
+    log_summary()
+    logger.info("User profile cache: %s", user_profile_cache.stats())
+    logger.info("Database executor: %s", db_executor.stats())
+    db_executor.shutdown(wait=True)
+    password_hasher.shutdown()
+
+def build_application():
+    """Створює Application бота
+
+    Викликається лише процесом, що обробляє оновлення: ApplicationBuilder
+    перевіряє TELEGRAM_TOKEN, тож API Django імпортує модуль і без токена.
+    """
+    return (
+        ApplicationBuilder()
+        .token(TOKEN)
+        # Власний request замінює пул ApplicationBuilder, тож розмір пулу задається явно, таймаути — як у PTB
+        .request(InstrumentedHTTPXRequest(connection_pool_size=settings.BOT_API_CONNECTION_POOL_SIZE))
+        # Обмежена черга: коли бот не встигає, вебхук відповідає 429 і Telegram повторить доставку пізніше
+        .update_queue(asyncio.Queue(maxsize=settings.BOT_UPDATE_QUEUE_SIZE))
+        # Чати обробляються паралельно, кроки розмови в одному чаті — по черзі
+        .concurrent_updates(ChatLaneUpdateProcessor(settings.BOT_CONCURRENT_UPDATES))
+        # Стани розмов та user_data переживають перезапуск бота
+        .persistence(persistence)
+        .post_init(startup)
+        .post_shutdown(shutdown)
+        .build()
+    )
+
+_application = None
+
+def get_application():
+    """Повертає Application бота, створюючи його при першому виклику"""
+    global _application
+    if _application is None:
+        _application = build_application()
+    return _application
+
+def setup_handlers(app):
+    """Реєструє обробники бота. Повторні виклики нічого не змінюють"""
+    if app.handlers:
+        return
 
-def run_bot():
-    
     app.add_handler(CommandHandler('start', start))
     app.add_handler(CommandHandler('profile', get_profile))
     app.add_handler(CommandHandler('logout', logout))
@@ -38,10 +124,28 @@ def run_bot():
     app.add_handler(CallbackQueryHandler(handle_delete_event, pattern='^delete_event$'))
     app.add_handler(CallbackQueryHandler(filter_events_by_category, pattern="^category:"))
 
+    instrument_handlers(app)
+
+def run_bot():
+    """Запускає бота окремим процесом з власним вебхук-сервером"""
+    persistence.acquire()
+    app = get_application()
+    setup_handlers(app)
     
     app.run_webhook(
         listen="0.0.0.0",
         port=PORT,
         url_path=WEBHOOK_PATH,
         webhook_url=WEBHOOK_URL,
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET or None,
     )
+
+async def set_webhook():
+    """Реєструє в Telegram вебхук на WEBHOOK_URL для обробки оновлень у процесі Django"""
+    bot = get_application().bot
+    async with bot:
+        await bot.set_webhook(
+            url=WEBHOOK_URL,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES,
+        )
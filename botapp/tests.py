@@ -0,0 +1,698 @@
+import asyncio
+import contextlib
+import sqlite3
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from telegram import Update
+from telegram.error import NetworkError
+from telegram.ext import ApplicationBuilder, CommandHandler, ConversationHandler, MessageHandler, filters
+from telegram.request import HTTPXRequest
+
+from events.models import Category, Event, JoinStatus
+from users.models import User
+from .cache import UserProfile, UserProfileCache, user_profile_cache
+from .executor import db_executor
+from .hashing import AttemptThrottle
+from .instrumentation import (
+    API_REQUESTS, HANDLER_API_DURATION, HANDLER_CALLS, HandlerSummary, InstrumentedHTTPXRequest, instrument_callback,
+    instrument_handlers,
+)
+from .persistence import APPLICATION_INTERNALS, SQLitePersistence
+from .services import (
+    create_event, delete_event, edit_event_field, edit_profile_field, get_event_window, get_user_profile, login_user,
+    logout_user, register_user, take_part_in_event,
+)
+from .updates import ChatLaneUpdateProcessor
+from .webhook import WebhookBridge
+
+USER_ID = 7
+NAME, PASSWORD = range(2)
+
+
+def telegram_api(request):
+    """Відповідає на запити бота до Telegram без мережі"""
+    if request.url.path.endswith("/getMe"):
+        return httpx.Response(200, json={"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"}})
+    return httpx.Response(200, json={"ok": True, "result": {"message_id": 1, "date": 0, "chat": {"id": USER_ID, "type": "private"}}})
+
+
+class MockRequest(HTTPXRequest):
+    async def initialize(self):
+        self._client = httpx.AsyncClient(transport=httpx.MockTransport(telegram_api))
+
+
+async def start(update, context):
+    context.user_data["username"] = update.message.text
+    context.user_data["user"] = object()
+    return NAME
+
+
+async def get_password(update, context):
+    context.user_data["password"] = update.message.text
+    return PASSWORD
+
+
+async def finish(update, context):
+    return ConversationHandler.END
+
+
+class SQLitePersistenceTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "bot_state.sqlite3"
+        self.update_id = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @contextlib.asynccontextmanager
+    async def running_application(self):
+        """Запускає Application зі сховищем стану в тимчасовому файлі та зупиняє його навіть після невдалої перевірки"""
+        persistence = SQLitePersistence(self.path, update_interval=60)
+        application = (
+            ApplicationBuilder().token("1:test")
+            .request(MockRequest()).get_updates_request(MockRequest())
+            .persistence(persistence).build()
+        )
+        application.add_handler(ConversationHandler(
+            entry_points=[CommandHandler("register", start)],
+            states={
+                NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_password)],
+                PASSWORD: [MessageHandler(filters.TEXT & ~filters.COMMAND, finish)],
+            },
+            fallbacks=[],
+            name="registration",
+            persistent=True,
+        ))
+        await application.initialize()
+        await application.start()
+        try:
+            yield application, persistence
+        finally:
+            await application.stop()
+            await application.shutdown()
+
+    async def send(self, application, text):
+        self.update_id += 1
+        entities = [{"type": "bot_command", "offset": 0, "length": len(text)}] if text.startswith("/") else []
+        update = Update.de_json({
+            "update_id": self.update_id,
+            "message": {
+                "message_id": self.update_id, "date": 0, "text": text, "entities": entities,
+                "chat": {"id": USER_ID, "type": "private"},
+                "from": {"id": USER_ID, "is_bot": False, "first_name": "user"},
+            },
+        }, application.bot)
+        await application.process_update(update)
+
+    def query(self, sql):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(sql).fetchall()
+
+    async def test_restore_after_restart(self):
+        async with self.running_application() as (application, _):
+            await self.send(application, "/register")
+            await self.send(application, "secret")
+
+        async with self.running_application() as (application, _):
+            self.assertEqual(dict(application.user_data), {})
+            self.assertEqual(
+                dict(application._conversation_handler_conversations["registration"]), {(USER_ID, USER_ID): PASSWORD},
+            )
+
+            # user_data завантажується при першому оновленні, розмова продовжується з того ж стану
+            await self.send(application, "done")
+            self.assertEqual(application.user_data[USER_ID]["username"], "/register")
+            self.assertEqual(dict(application._conversation_handler_conversations["registration"]), {})
+        self.assertEqual(self.query("SELECT name, key FROM conversations"), [])
+
+    async def test_transient_keys_are_not_stored(self):
+        async with self.running_application() as (application, _):
+            await self.send(application, "/register")
+            await self.send(application, "secret")
+            self.assertEqual(application.user_data[USER_ID]["password"], "secret")
+
+        # Пароль та об'єкти, що не зберігаються в JSON, не потрапляють у файл
+        self.assertEqual(self.query("SELECT user_id, data FROM user_data"), [(USER_ID, '{"username":"/register"}')])
+
+    async def test_application_internals(self):
+        # Якщо оновлення python-telegram-bot прибере ці атрибути, вивантаження та завершення розмов зламаються
+        async with self.running_application() as (application, _):
+            for name in APPLICATION_INTERNALS:
+                self.assertIsInstance(getattr(application, name, None), dict, name)
+            self.assertIn("registration", application._conversation_handler_conversations)
+
+    def make_idle(self, persistence, seconds):
+        """Зсуває час останньої активності користувача та змін у файлі в минуле"""
+        persistence._last_seen[USER_ID] -= seconds
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("UPDATE conversations SET updated_at = updated_at - ?", (seconds,))
+            connection.execute("UPDATE user_data SET updated_at = updated_at - ?", (seconds,))
+
+    async def test_evict_idle_user_data(self):
+        async with self.running_application() as (application, persistence):
+            await self.send(application, "/register")
+            await self.send(application, "secret")
+
+            self.assertEqual(await persistence.evict_idle(application, 900), 0)
+            self.make_idle(persistence, 3600)
+            self.assertEqual(await persistence.evict_idle(application, 900), 1)
+            self.assertNotIn(USER_ID, application.user_data)
+            self.assertEqual(self.query("SELECT user_id FROM user_data"), [(USER_ID,)])
+
+            # Дані завантажуються з файлу при наступному оновленні
+            await self.send(application, "done")
+            self.assertEqual(application.user_data[USER_ID]["username"], "/register")
+
+    async def test_pending_user_data_is_not_evicted(self):
+        async with self.running_application() as (application, persistence):
+            await self.send(application, "/register")
+            await application.update_persistence()
+
+            # Оновлення користувача ще обробляється: refresh_user_data вже викликано, update_user_data — ні
+            await persistence.refresh_user_data(USER_ID, application.user_data[USER_ID])
+            self.make_idle(persistence, 3600)
+            self.assertEqual(await persistence.evict_idle(application, 900), 0)
+            self.assertIn(USER_ID, application.user_data)
+
+    async def test_expire_stale_conversation(self):
+        async with self.running_application() as (application, persistence):
+            await self.send(application, "/register")
+            await self.send(application, "secret")
+            await application.update_persistence()
+
+            report = await persistence.expire_idle(application, 900, 86400)
+            self.assertEqual(report["conversations"], 0)
+
+            self.make_idle(persistence, 3600)
+            report = await persistence.expire_idle(application, 900, 86400)
+            self.assertEqual((report["conversations"], report["users"]), (1, 0))
+            self.assertEqual(dict(application._conversation_handler_conversations["registration"]), {})
+            self.assertNotIn("password", application.user_data[USER_ID])
+
+        self.assertEqual(self.query("SELECT name, key FROM conversations"), [])
+        self.assertEqual(self.query("SELECT user_id FROM user_data"), [(USER_ID,)])
+
+    async def test_expire_idle_user_data(self):
+        async with self.running_application() as (application, persistence):
+            await self.send(application, "/register")
+            await application.update_persistence()
+
+            self.make_idle(persistence, 2 * 86400)
+            report = await persistence.expire_idle(application, 900, 86400)
+            self.assertEqual((report["conversations"], report["users"]), (1, 1))
+            self.assertGreater(report["bytes"], 0)
+            self.assertNotIn(USER_ID, application.user_data)
+
+        self.assertEqual(self.query("SELECT user_id FROM user_data"), [])
+
+
+class UserProfileCacheTests(SimpleTestCase):
+    def profile(self, user_id):
+        return UserProfile(id=user_id, username=f"user{user_id}", email="", bio="", is_creator=False)
+
+    def test_lru_eviction(self):
+        cache = UserProfileCache(maxsize=2, ttl=60)
+        for telegram_id in (100, 200):
+            cache.set(telegram_id, self.profile(telegram_id // 100))
+        cache.get(100)
+        cache.set(300, self.profile(3))
+
+        self.assertIsNone(cache.get(200))
+        self.assertEqual(cache.get(100).id, 1)
+        self.assertEqual(cache.get(300).id, 3)
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 3, "misses": 1, "hit_ratio": 0.75})
+
+    def test_expired_entry(self):
+        cache = UserProfileCache(maxsize=2, ttl=0)
+        cache.set(100, self.profile(1))
+        self.assertIsNone(cache.get(100))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_invalidate_user(self):
+        cache = UserProfileCache(maxsize=2, ttl=60)
+        cache.set(100, self.profile(1))
+        # Користувач увійшов з іншого акаунта Telegram, старий запис видаляється
+        cache.set(200, self.profile(1))
+        self.assertIsNone(cache.get(100))
+
+        cache.invalidate_user(1)
+        self.assertIsNone(cache.get(200))
+
+
+class UserProfileServiceTests(TransactionTestCase):
+    def setUp(self):
+        user_profile_cache.clear()
+        self.user = User.objects.create_user(username="member", telegram_id=200)
+
+    def tearDown(self):
+        user_profile_cache.clear()
+
+    async def test_profile_is_cached(self):
+        self.assertEqual((await get_user_profile(200)).username, "member")
+        misses = user_profile_cache.stats()["misses"]
+        await User.objects.filter(pk=self.user.pk).aupdate(bio="Оновлено без сигналу")
+
+        self.assertEqual((await get_user_profile(200)).bio, "")
+        self.assertEqual(user_profile_cache.stats()["misses"], misses)
+
+    async def test_invalidated_on_change(self):
+        await get_user_profile(200)
+        self.user.bio = "Бігаю щоранку"
+        await self.user.asave(update_fields=['bio'])
+        self.assertEqual((await get_user_profile(200)).bio, "Бігаю щоранку")
+
+        await logout_user(200)
+        with self.assertRaises(User.DoesNotExist):
+            await get_user_profile(200)
+
+
+class AttemptThrottleTests(SimpleTestCase):
+    def test_limit_and_reset(self):
+        throttle = AttemptThrottle(max_attempts=2, window=60)
+        self.assertEqual([throttle.allow(100) for _ in range(3)], [True, True, False])
+        self.assertTrue(throttle.allow(200))
+
+        throttle.reset(100)
+        self.assertTrue(throttle.allow(100))
+
+    def test_window(self):
+        throttle = AttemptThrottle(max_attempts=1, window=0)
+        self.assertTrue(all(throttle.allow(100) for _ in range(3)))
+
+    def test_max_keys(self):
+        throttle = AttemptThrottle(max_attempts=1, window=60, max_keys=2)
+        for key in (100, 200, 300):
+            throttle.allow(key)
+        # Найдавніший ключ витіснено разом з його спробами
+        self.assertTrue(throttle.allow(100))
+        self.assertFalse(throttle.allow(300))
+
+
+class PasswordHashingTests(TransactionTestCase):
+    """Паролі хешуються та перевіряються в окремих процесах password_hasher"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="member")
+        self.user.password = make_password("secret", hasher="pbkdf2_sha1")
+        self.user.save(update_fields=['password'])
+        throttle = mock.patch("botapp.services.password_throttle", AttemptThrottle(max_attempts=2, window=60))
+        throttle.start()
+        self.addCleanup(throttle.stop)
+
+    async def test_login_upgrades_outdated_hash(self):
+        user, error = await login_user("member", "secret", 300)
+        self.assertEqual((user.pk, error), (self.user.pk, None))
+
+        await self.user.arefresh_from_db()
+        self.assertEqual(self.user.telegram_id, 300)
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(self.user.check_password("secret"))
+
+    async def test_wrong_password_is_throttled(self):
+        self.assertEqual(await login_user("member", "wrong", 300), (None, "Неправельний логін або пароль"))
+        self.assertEqual(await login_user("unknown", "secret", 300), (None, "Неправельний логін або пароль"))
+        self.assertEqual(await login_user("member", "secret", 300), (None, "Забагато спроб. Спробуйте пізніше."))
+
+    async def test_register_hashes_password(self):
+        user, error = await register_user("runner", "secret", "runner@example.com", "", False, 400)
+        self.assertIsNone(error)
+        await user.arefresh_from_db()
+        self.assertTrue(user.check_password("secret"))
+
+        self.assertEqual(
+            await register_user("runner", "secret", "runner@example.com", "", False, 400),
+            (None, "Користувач з таким іменем уже існує."),
+        )
+
+
+class EventServicesTests(TransactionTestCase):
+    """Сервіси бота виконуються в пулі db_executor з власними з'єднаннями, тому дані комітяться"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", telegram_id=100, is_creator=True)
+        self.member = User.objects.create_user(username="member", telegram_id=200)
+        category = Category.objects.create(name="Спорт")
+        start = timezone.now() + timedelta(days=1)
+        self.events = [
+            Event.objects.create(
+                title=f"Подія {i}", description="Опис", start_time=start + timedelta(hours=i), address="Київ",
+                category=category, creator=self.creator, capacity=1,
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        for telegram_id in (100, 200):
+            user_profile_cache.invalidate(telegram_id)
+
+    def cursor(self, event):
+        return [event.start_time.isoformat(), event.pk]
+
+    async def test_event_window(self):
+        first, second, third = self.events
+
+        event, has_next = await get_event_window({})
+        self.assertEqual((event.pk, has_next), (first.pk, True))
+        event, has_next = await get_event_window({}, self.cursor(second))
+        self.assertEqual((event.pk, has_next), (third.pk, False))
+        event, has_prev = await get_event_window({}, self.cursor(second), reverse=True)
+        self.assertEqual((event.pk, has_prev), (first.pk, False))
+        self.assertEqual(await get_event_window({"title": "Невідома"}), (None, False))
+
+    async def test_take_part_in_event(self):
+        event = self.events[0]
+
+        status, card = await take_part_in_event(200, event.pk)
+        self.assertEqual((status, card.participants_count), (JoinStatus.JOINED, 1))
+        status, card = await take_part_in_event(200, event.pk)
+        self.assertEqual((status, card.participants_count), (JoinStatus.ALREADY_JOINED, 1))
+        status, _ = await take_part_in_event(100, event.pk)
+        self.assertEqual(status, JoinStatus.FULL)
+        self.assertEqual(await take_part_in_event(200, 0), (None, None))
+
+    async def test_edit_renamed_event(self):
+        event = self.events[0]
+        # Подію перейменували через API, поки користувач переглядав її в боті
+        await Event.objects.filter(pk=event.pk).aupdate(title="Нова назва")
+
+        self.assertEqual(await edit_event_field(event.pk, "Львів", "address"), "Адреса успішно змінена")
+        self.assertEqual(await Event.objects.values_list("address", flat=True).aget(pk=event.pk), "Львів")
+        self.assertEqual(await edit_event_field(0, "Львів", "address"), "Подію не знайдено")
+
+    async def test_delete_renamed_event(self):
+        event = self.events[0]
+        await Event.objects.filter(pk=event.pk).aupdate(title="Нова назва")
+
+        self.assertEqual(await delete_event(event.pk), "Подія успішно видалена!")
+        self.assertEqual(await delete_event(event.pk), "Подія вже видалена!")
+
+    async def count_hops(self, service):
+        """Повертає результат сервісу та кількість викликів, виконаних у пулі БД"""
+        before = db_executor.stats()["completed"]
+        result = await service
+        return result, db_executor.stats()["completed"] - before
+
+    async def test_create_event(self):
+        await get_user_profile(100)
+        (event, error), hops = await self.count_hops(
+            create_event("Концерт", "Опис", "01.01.2030 19:00", "Львів", "Музика", 100),
+        )
+        self.assertEqual((error, hops), (None, 1))
+        self.assertEqual(await Event.objects.filter(title="Концерт", category__name="Музика").acount(), 1)
+
+        self.assertEqual(
+            await create_event("Концерт", "Опис", "01.01.2030 19:00", "Львів", "Музика", 100),
+            (None, "Подія з такою назвою вже існує"),
+        )
+        self.assertEqual(
+            await create_event("Лекція", "Опис", "завтра", "Львів", "Музика", 100), (None, "Неправильний формат дати."),
+        )
+
+    async def test_edit_event_field_is_one_hop(self):
+        event = self.events[0]
+        message, hops = await self.count_hops(edit_event_field(event.pk, "Музика", "category"))
+        self.assertEqual((message, hops), ("Категарія успішно змінена", 1))
+        self.assertEqual(await Event.objects.values_list("category__name", flat=True).aget(pk=event.pk), "Музика")
+
+        self.assertEqual(await edit_event_field(event.pk, "завтра", "start_time"), "Неправильний формат дати!")
+        self.assertEqual(await edit_event_field(event.pk, "Київ", "capacity"), "Невідоме поле!")
+
+    async def test_edit_profile_field(self):
+        await get_user_profile(200)
+        message, hops = await self.count_hops(edit_profile_field(200, "Бігаю щоранку", "bio"))
+        self.assertEqual((message, hops), ("Додаткова інформація успішно змінена", 1))
+        self.assertEqual((await get_user_profile(200)).bio, "Бігаю щоранку")
+
+        self.assertEqual(await edit_profile_field(200, "not-an-email", "email"), "Введено некоректну адресу електронної пошти.")
+        self.assertEqual(await edit_profile_field(200, "admin", "is_staff"), "Невідоме поле")
+
+
+def transaction_statements():
+    """Повертає SQL, виконаний атомарним блоком з одним читанням"""
+    with CaptureQueriesContext(connection) as queries:
+        with transaction.atomic():
+            User.objects.exists()
+    return [query["sql"] for query in queries.captured_queries]
+
+
+class DatabaseExecutorTests(TransactionTestCase):
+    def test_pool_transactions_begin_immediate(self):
+        self.assertIn("BEGIN IMMEDIATE", db_executor.submit(transaction_statements).result())
+        self.assertNotIn("BEGIN IMMEDIATE", transaction_statements())
+
+    def test_stats(self):
+        before = db_executor.stats()["completed"]
+        db_executor.submit(User.objects.exists).result()
+
+        stats = db_executor.stats()
+        self.assertEqual(stats["completed"], before + 1)
+        self.assertEqual((stats["queue_depth"], stats["running"]), (0, 0))
+
+
+
+@override_settings(TELEGRAM_WEBHOOK_SECRET="secret")
+class WebhookTests(SimpleTestCase):
+    url = "/webhook/1:test"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name) / "bot_state.sqlite3"
+        self.bridge = WebhookBridge(self.build_application, SQLitePersistence(self.path))
+        for target, value in (("botapp.views.TOKEN", "1:test"), ("botapp.views.bridge", self.bridge)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build_application(self):
+        return (
+            ApplicationBuilder().token("1:test")
+            .request(MockRequest()).get_updates_request(MockRequest())
+            .persistence(self.bridge.persistence).build()
+        )
+
+    async def post(self, body='{"update_id": 1}', url=None, secret="secret"):
+        response = await self.async_client.post(
+            url or self.url, body, content_type="application/json", headers={"X-Telegram-Bot-Api-Secret-Token": secret},
+        )
+        return response.status_code
+
+    async def test_status_codes(self):
+        self.assertEqual(await self.post(url="/webhook/2:other"), 404)
+        self.assertEqual(await self.post(secret="wrong"), 403)
+        self.assertIsNone(self.bridge.application)
+
+        self.assertEqual(await self.post(), 200)
+        self.assertEqual(await self.post("not json"), 400)
+        with self.settings(BOT_UPDATE_QUEUE_SIZE=0):
+            self.assertEqual(await self.post(), 429)
+        await self.bridge.stop()
+        self.assertFalse(self.bridge.running)
+
+    async def test_bot_is_not_built_without_state_lock(self):
+        # Файл стану вже закріплений за іншим воркером
+        other_worker = SQLitePersistence(self.path)
+        other_worker.acquire()
+        self.addCleanup(other_worker.release)
+
+        with self.assertLogs("botapp.views", "WARNING"):
+            self.assertEqual(await self.post(), 503)
+        self.assertIsNone(self.bridge.application)
+
+
+API_URL = "https://api.telegram.org/bot1:test"
+
+
+def failing_api(request):
+    raise httpx.ConnectError("offline", request=request)
+
+
+class MockInstrumentedRequest(InstrumentedHTTPXRequest):
+    def __init__(self, handler=telegram_api):
+        super().__init__()
+        self.handler = handler
+
+    async def initialize(self):
+        self._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@contextlib.asynccontextmanager
+async def instrumented_request(handler=telegram_api):
+    request = MockInstrumentedRequest(handler)
+    await request.initialize()
+    try:
+        yield request
+    finally:
+        await request.shutdown()
+
+
+async def send_message(update, context):
+    await context.request.do_request(f"{API_URL}/sendMessage", "POST")
+    return NAME
+
+
+async def broken(update, context):
+    raise ValueError("broken")
+
+
+class BotInstrumentationTests(SimpleTestCase):
+    def setUp(self):
+        self.summary = HandlerSummary()
+        patcher = mock.patch("botapp.instrumentation.handler_summary", self.summary)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def count(self, metric, *key):
+        return metric.values.get(key, 0)
+
+    async def test_handler_metrics(self):
+        calls = self.count(HANDLER_CALLS, "tests.send_message", "ok")
+        api_observations = HANDLER_API_DURATION.values.get(("tests.send_message",), [0])[-1]
+
+        callback = instrument_callback(send_message)
+        async with instrumented_request() as request:
+            # Наступний стан розмови повертається без змін
+            self.assertEqual(await callback(None, SimpleNamespace(request=request)), NAME)
+        self.assertIs(instrument_callback(callback), callback)
+
+        self.assertEqual(self.count(HANDLER_CALLS, "tests.send_message", "ok"), calls + 1)
+        self.assertEqual(HANDLER_API_DURATION.values[("tests.send_message",)][-1], api_observations + 1)
+        count, errors, total, worst, db, api = self.summary.drain()[1]["tests.send_message"]
+        self.assertEqual((count, errors), (1, 0))
+        # Запит до Bot API зарахований до обробника, з якого його викликано
+        self.assertGreater(api, 0)
+
+    async def test_handler_errors(self):
+        errors = self.count(HANDLER_CALLS, "tests.broken", "error")
+
+        with self.assertRaises(ValueError):
+            await instrument_callback(broken)(None, None)
+
+        self.assertEqual(self.count(HANDLER_CALLS, "tests.broken", "error"), errors + 1)
+        self.assertEqual(self.summary.drain()[1]["tests.broken"][:2], [1, 1])
+
+    async def test_api_request_metrics(self):
+        ok = self.count(API_REQUESTS, "sendMessage", "200")
+        failed = self.count(API_REQUESTS, "sendMessage", "error")
+
+        async with instrumented_request() as request:
+            await request.do_request(f"{API_URL}/sendMessage", "POST")
+        async with instrumented_request(failing_api) as request:
+            with self.assertRaises(NetworkError):
+                await request.do_request(f"{API_URL}/sendMessage", "POST")
+
+        self.assertEqual(self.count(API_REQUESTS, "sendMessage", "200"), ok + 1)
+        self.assertEqual(self.count(API_REQUESTS, "sendMessage", "error"), failed + 1)
+
+    def test_nested_handlers_are_instrumented(self):
+        application = ApplicationBuilder().token("1:test").request(MockRequest()).get_updates_request(MockRequest()).build()
+        conversation = ConversationHandler(
+            entry_points=[CommandHandler("register", start)],
+            states={NAME: [MessageHandler(filters.TEXT, get_password)]},
+            fallbacks=[CommandHandler("cancel", finish)],
+        )
+        application.add_handler(conversation)
+        application.add_handler(CommandHandler("help", finish))
+
+        instrument_handlers(application)
+
+        callbacks = [
+            conversation.entry_points[0].callback, conversation.states[NAME][0].callback,
+            conversation.fallbacks[0].callback, application.handlers[0][1].callback,
+        ]
+        self.assertTrue(all(getattr(callback, "instrumented", False) for callback in callbacks))
+
+    def test_summary_log(self):
+        self.summary.record("tests.fast", 0.01, 0.0, 0.0, False)
+        self.summary.record("tests.slow", 0.5, 0.1, 0.2, True)
+
+        with self.assertLogs("botapp.instrumentation", "INFO") as logs:
+            self.summary.log()
+
+        self.assertIn("tests.slow n=1 err=1 avg=500ms max=500ms db=100ms api=200ms; tests.fast", logs.output[0])
+        self.assertEqual(self.summary.drain()[1], {})
+
+
+def chat_update(chat_id:int) -> Update:
+    return Update.de_json({
+        "update_id": chat_id,
+        "message": {
+            "message_id": 1, "date": 0, "text": "text",
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "user"},
+        },
+    }, None)
+
+
+class ChatLaneUpdateProcessorTests(SimpleTestCase):
+    def setUp(self):
+        self.started = []
+        self.release = {}
+
+    async def handle(self, name:str):
+        self.started.append(name)
+        self.release[name] = asyncio.Event()
+        await self.release[name].wait()
+
+    async def settle(self):
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_same_chat_is_sequential(self):
+        processor = ChatLaneUpdateProcessor(max_concurrent_updates=4)
+        tasks = [
+            asyncio.create_task(processor.process_update(chat_update(1), self.handle(name)))
+            for name in ("first", "second")
+        ]
+        await self.settle()
+
+        self.assertEqual(self.started, ["first"])
+        self.assertEqual(processor.stats(), {"lanes": 1, "pending": 2, "running": 1})
+
+        self.release["first"].set()
+        await self.settle()
+        self.assertEqual(self.started, ["first", "second"])
+
+        self.release["second"].set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(processor.stats(), {"lanes": 0, "pending": 0, "running": 0})
+
+    async def test_chats_run_concurrently_up_to_limit(self):
+        processor = ChatLaneUpdateProcessor(max_concurrent_updates=2)
+        tasks = [
+            asyncio.create_task(processor.process_update(chat_update(chat_id), self.handle(chat_id)))
+            for chat_id in (1, 2, 3)
+        ]
+        await self.settle()
+
+        self.assertEqual(self.started, [1, 2])
+        self.assertEqual(processor.stats(), {"lanes": 3, "pending": 3, "running": 2})
+
+        self.release[1].set()
+        await self.settle()
+        self.assertEqual(self.started, [1, 2, 3])
+
+        for chat_id in (2, 3):
+            self.release[chat_id].set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(processor.stats()["lanes"], 0)
+
+    def test_lane_key(self):
+        self.assertEqual(ChatLaneUpdateProcessor.lane_key(chat_update(5)), ("chat", 5))
+        inline_query = Update.de_json({
+            "update_id": 1,
+            "inline_query": {"id": "1", "from": {"id": 6, "is_bot": False, "first_name": "user"}, "query": "", "offset": ""},
+        }, None)
+        self.assertEqual(ChatLaneUpdateProcessor.lane_key(inline_query), ("user", 6))
+        self.assertIsNone(ChatLaneUpdateProcessor.lane_key("job"))
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatLaneUpdateProcessor(BaseUpdateProcessor):
+    """Обробляє оновлення різних чатів паралельно, а оновлення одного чату — строго по черзі
+
+    Кожен чат (або користувач, якщо чату нема) має власну смугу — asyncio.Lock,
+    що пропускає оновлення в порядку надходження, тож ConversationHandler
+    бачить кроки розмови послідовно. Одночасно виконується не більше
+    `max_concurrent_updates` оновлень з усіх чатів.
+
+    Семафор базового класу захоплюється до `do_process_update`, і якби він
+    блокував, наступне оновлення чату могло б обігнати попереднє. Тому його
+    межа практично необмежена, а справжній ліміт застосовується вже всередині
+    смуги чату. Смуга видаляється, щойно в ній не лишається оновлень.
+    """
+
+    def __init__(self, max_concurrent_updates:int):
+        super().__init__(max_concurrent_updates=sys.maxsize)
+        self.max_running = max_concurrent_updates
+        self._running = asyncio.Semaphore(max_concurrent_updates)
+        self._lanes = {}
+        self.pending = 0
+
+    @staticmethod
+    def lane_key(update:object):
+        """Повертає ключ смуги оновлення або None, якщо порядок не важливий"""
+        if isinstance(update, Update):
+            if update.effective_chat is not None:
+                return ("chat", update.effective_chat.id)
+            if update.effective_user is not None:
+                return ("user", update.effective_user.id)
+        return None
+
+    async def do_process_update(self, update:object, coroutine):
+        key = self.lane_key(update)
+        self.pending += 1
+        try:
+            if key is None:
+                async with self._running:
+                    await coroutine
+                return
+
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = [asyncio.Lock(), 0]
+            lane[1] += 1
+            try:
+                async with lane[0]:
+                    async with self._running:
+                        await coroutine
+            finally:
+                lane[1] -= 1
+                if lane[1] == 0:
+                    del self._lanes[key]
+        finally:
+            self.pending -= 1
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        """Повертає кількість активних смуг, оновлень у смугах та оновлень, що виконуються"""
+        return {
+            "lanes": len(self._lanes),
+            "pending": self.pending,
+            "running": self.max_running - self._running._value,
+        }
@@ -1,25 +1,52 @@
-import json 
+import json
+import logging
+
+from django.conf import settings
 from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import csrf_exempt
-from telegram import Update, Bot
-from django.conf import settings
-from .telegram_bot import app
+from django.views.decorators.http import require_POST
+from telegram import Update
+
+from .persistence import StateLockedError
+from .telegram_bot import TOKEN
+from .webhook import bridge, WEBHOOK_UPDATES
+
+logger = logging.getLogger(__name__)
+
 
 @csrf_exempt
-def telegram_webhook(request):
-    if request.method == "POST":
-        update_json = json.loads(request.body.decode("utf-8"))
-        
-        # Log the incoming update for debugging
-
-        # Process the update
-        try:
-            update = Update.de_json(update_json, app)
-            dispatcher.process_update(update)
-        except Exception as e:
-            logger.error(f"Error processing Telegram update: {e}", exc_info=True)
-            return JsonResponse({"status": "error", "message": str(e)}, status=500)
-
-        return JsonResponse({"status": "ok"})
-    else:
-        return JsonResponse({"status": "method not allowed"}, status=405)
\ No newline at end of file
+@require_POST
+async def telegram_webhook(request, token):
+    """Приймає оновлення від Telegram і ставить їх у чергу бота
+
+    Працює лише під ASGI-сервером: бот запускається в його циклі подій при першому
+    оновленні. Відповідь повертається одразу, не чекаючи обробки оновлення.
+    Якщо черга бота заповнена, повертається 429, і Telegram повторить доставку пізніше.
+    """
+    if not constant_time_compare(token, TOKEN):
+        return JsonResponse({"status": "not found"}, status=404)
+
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    if secret and not constant_time_compare(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret):
+        return JsonResponse({"status": "forbidden"}, status=403)
+
+    try:
+        await bridge.ensure_started()
+    except StateLockedError as error:
+        logger.warning("Telegram bot is not started in this worker: %s", error)
+        return JsonResponse({"status": "unavailable"}, status=503)
+    except Exception:
+        logger.exception("Failed to start Telegram bot")
+        return JsonResponse({"status": "unavailable"}, status=503)
+
+    try:
+        update = Update.de_json(json.loads(request.body), bridge.application.bot)
+    except (ValueError, TypeError, KeyError):
+        WEBHOOK_UPDATES.inc(outcome="invalid")
+        return JsonResponse({"status": "invalid update"}, status=400)
+
+    if not bridge.enqueue(update):
+        return JsonResponse({"status": "busy"}, status=429, headers={"Retry-After": "1"})
+
+    return JsonResponse({"status": "ok"})
@@ -0,0 +1,165 @@
+import asyncio
+import contextvars
+import logging
+
+from django.conf import settings
+
+from get_together.metrics import registry
+
+from .persistence import SQLitePersistence
+from .telegram_bot import get_application, persistence, setup_handlers
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_UPDATES = registry.counter(
+    "bot_webhook_updates_total", "Оновлення, отримані вебхуком Django", ("outcome",),
+)
+UPDATE_QUEUE_DEPTH = registry.gauge(
+    "bot_update_queue_depth", "Оновлення в черзі бота, що ще не взяті в обробку",
+)
+UPDATES_PENDING = registry.gauge(
+    "bot_updates_pending", "Оновлення в смугах чатів, що чекають або виконуються",
+)
+UPDATE_LANES = registry.gauge(
+    "bot_update_lanes", "Чати, для яких є необроблені оновлення",
+)
+
+
+class WebhookBridge:
+    """Запускає Application бота в циклі подій ASGI-сервера Django
+
+    Бот створюється та ініціалізується ліниво при першому оновленні і далі обробляє
+    оновлення з `update_queue` у фоні, тож представлення лише кладе оновлення в чергу
+    і одразу відповідає Telegram. Воркер, що не отримав блокування файлу стану,
+    бота не створює і відповідає на вебхук 503, тож API можна запускати в кількох воркерах.
+    """
+
+    def __init__(self, build_application, persistence:SQLitePersistence):
+        self.build_application = build_application
+        self.persistence = persistence
+        self.application = None
+        self.loop = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_started(self):
+        """Ініціалізує та запускає бота, якщо він ще не запущений
+
+        Raises:
+            RuntimeError: Якщо бот уже запущений в іншому циклі подій (наприклад, під WSGI,
+                де кожен запит до асинхронного представлення отримує власний цикл)
+        """
+        if self.running:
+            self.check_loop()
+            return
+
+        async with self._lock:
+            if self.running:
+                return
+
+            # Лише один процес (воркер) обробляє оновлення з цим файлом стану
+            self.persistence.acquire()
+            if self.application is None:
+                self.application = self.build_application()
+            setup_handlers(self.application)
+            # Фонові завдання бота копіюють контекст, у якому їх створено. Без чистого контексту
+            # вони успадкували б ContextVar першого запиту (наприклад, лічильник запитів до БД
+            # QueryInstrumentationMiddleware) на весь час роботи процесу
+            await asyncio.create_task(self._start(), context=contextvars.Context())
+            self.loop = asyncio.get_running_loop()
+            logger.info("Telegram bot started in-process")
+
+    async def _start(self):
+        await self.application.initialize()
+        if self.application.post_init:
+            await self.application.post_init(self.application)
+        await self.application.start()
+
+    async def stop(self):
+        """Обробляє вже прийняті оновлення, записує стан розмов і зупиняє бота
+
+        Викликається під час завершення воркера ASGI (див. LifespanApplication).
+        """
+        async with self._lock:
+            if not self.running:
+                return
+
+            # stop() дочікується оновлень з черги та смуг чатів, shutdown() записує persistence
+            await self.application.stop()
+            await self.application.shutdown()
+            if self.application.post_shutdown:
+                await self.application.post_shutdown(self.application)
+            self.loop = None
+            logger.info("Telegram bot stopped")
+
+    @property
+    def running(self) -> bool:
+        return self.application is not None and self.application.running
+
+    def check_loop(self):
+        if self.loop is not asyncio.get_running_loop():
+            raise RuntimeError("The in-process Telegram webhook requires an ASGI server")
+
+    def backlog(self) -> int:
+        """Повертає кількість оновлень, прийнятих, але ще не оброблених"""
+        return self.application.update_queue.qsize() + getattr(self.application.update_processor, "pending", 0)
+
+    def enqueue(self, update) -> bool:
+        """Кладе оновлення в чергу бота без очікування
+
+        Returns:
+            bool: False, якщо черга заповнена
+        """
+        try:
+            # Оновлення одразу переходять з черги в смуги чатів, тож ліміт стосується обох
+            if self.backlog() >= settings.BOT_UPDATE_QUEUE_SIZE:
+                raise asyncio.QueueFull
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            WEBHOOK_UPDATES.inc(outcome="rejected")
+            return False
+
+        WEBHOOK_UPDATES.inc(outcome="queued")
+        return True
+
+
+bridge = WebhookBridge(get_application, persistence)
+
+
+class LifespanApplication:
+    """ASGI-обгортка, що обробляє події lifespan замість Django
+
+    Django не підтримує lifespan, тож без обгортки бот, запущений у воркері,
+    не зупинявся б: прийняті, але не оброблені оновлення та незаписаний
+    стан розмов губилися б при кожному перезапуску воркера.
+    """
+
+    def __init__(self, application, bridge:WebhookBridge):
+        self.application = application
+        self.bridge = bridge
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await self.application(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self.bridge.stop()
+                except Exception:
+                    logger.exception("Failed to stop Telegram bot")
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+def collect_update_processing():
+    if bridge.application is None:
+        return
+    UPDATE_QUEUE_DEPTH.set(bridge.application.update_queue.qsize())
+    stats = bridge.application.update_processor.stats()
+    UPDATES_PENDING.set(stats["pending"])
+    UPDATE_LANES.set(stats["lanes"])
+
+
+registry.register_collector(collect_update_processing)
@@ -12,8 +12,4 @@ class EventAdmin(admin.ModelAdmin):
     list_filter = ('category', 'start_time')
     search_fields = ('title', 'description', 'address')
     filter_horizontal = ('participants',)
-
-    def participants_count(self, obj):
-        return obj.participants.count()
-    
-    participants_count.short_description = 'Кількість учасників'
+    readonly_fields = ('participants_count',)
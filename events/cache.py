@@ -0,0 +1,116 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+from get_together.metrics import registry, CACHE_HITS, CACHE_MISSES
+
+EVENT_LIST_CACHE_ALIAS = "events"
+
+
+class EventListCache:
+    """Кеш серіалізованих відповідей списку подій
+
+    Ключ складається з номера версії та нормалізованих параметрів запиту
+    (фільтри, курсор, розмір сторінки, fields/expand). Інвалідація не видаляє
+    ключі, а замінює версію новою випадковою, тож усі попередні записи стають
+    недосяжними і з часом витісняються бекендом. Випадкова версія не
+    повторюється, навіть якщо бекенд витіснив сам ключ версії.
+
+    Ключ обчислюється один раз до читання з БД і використовується і для `get`,
+    і для `set`: якщо інвалідація відбудеться під час запиту, застарілі дані
+    збережуться під старою версією, а не під новою.
+
+    Влучання та промахи рахуються в метриках cache_hits_total та cache_misses_total,
+    які реєстр метрик підсумовує за всі процеси.
+    """
+    version_key = "events:list:version"
+    metric_label = "events_list"
+
+    def __init__(self, alias=EVENT_LIST_CACHE_ALIAS):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def new_version() -> str:
+        return uuid.uuid4().hex
+
+    def get_version(self) -> str:
+        version = self.cache.get(self.version_key)
+        if version is None:
+            version = self.new_version()
+            if not self.cache.add(self.version_key, version, timeout=None):
+                version = self.cache.get(self.version_key, version)
+        return version
+
+    def make_key(self, request) -> str:
+        """Формує ключ кешу з нормалізованих параметрів запиту
+
+        Args:
+            request (Request): Запит до списку подій
+
+        Returns:
+            str: Ключ, що не залежить від порядку параметрів у запиті
+        """
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        digest = hashlib.md5(repr(params).encode("utf-8")).hexdigest()
+        return f"events:list:{self.get_version()}:{digest}"
+
+    def get(self, key:str):
+        """Повертає закешовані дані відповіді або None
+
+        Args:
+            key (str): Ключ з `make_key`
+        """
+        data = self.cache.get(key)
+        if data is None:
+            CACHE_MISSES.inc(cache=self.metric_label)
+        else:
+            CACHE_HITS.inc(cache=self.metric_label)
+        return data
+
+    def set(self, key:str, data):
+        """Зберігає дані відповіді в кеші
+
+        Args:
+            key (str): Ключ з `make_key`, обчислений до читання даних
+            data: Серіалізовані дані відповіді
+        """
+        self.cache.set(key, data)
+
+    def invalidate(self):
+        """Робить недійсними всі закешовані відповіді"""
+        self.cache.set(self.version_key, self.new_version(), timeout=None)
+
+    def invalidate_on_commit(self):
+        """Інвалідує кеш після успішного завершення поточної транзакції
+
+        Якщо скинути кеш до коміту, паралельний запит може встигнути
+        закешувати ще старі дані під новою версією.
+        """
+        transaction.on_commit(self.invalidate)
+
+    def stats(self) -> dict:
+        """Повертає лічильники влучань та промахів, підсумовані за всі процеси"""
+        metrics = registry.collect()
+
+        def collected(name):
+            samples = metrics.get(name, {}).get("samples", [])
+            return sum(value for labels, value in samples if labels == [self.metric_label])
+
+        hits, misses = collected(CACHE_HITS.name), collected(CACHE_MISSES.name)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+
+event_list_cache = EventListCache()
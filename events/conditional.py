@@ -0,0 +1,52 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """Додає ETag та Last-Modified до GET-відповідей і повертає 304 без серіалізації
+
+    Клас-нащадок реалізує `get_fingerprint`, який дешево (одним запитом)
+    обчислює відбиток даних. Якщо клієнт надіслав If-None-Match або
+    If-Modified-Since, що відповідають відбитку, тіло відповіді не формується.
+    """
+
+    def get_fingerprint(self, request, *args, **kwargs):
+        """Повертає відбиток даних ресурсу
+
+        Returns:
+            tuple: (значення відбитку, datetime останньої зміни) або (None, None),
+            якщо ресурс не знайдено
+        """
+        raise NotImplementedError
+
+    def get_validators(self, request, *args, **kwargs):
+        """Обчислює ETag та час останньої зміни для запиту
+
+        Returns:
+            tuple: (ETag, unix timestamp останньої зміни) або (None, None)
+        """
+        fingerprint, last_modified = self.get_fingerprint(request, *args, **kwargs)
+        if fingerprint is None:
+            return None, None
+
+        params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+        source = repr((request.path, fingerprint, params, request.accepted_media_type))
+        etag = quote_etag(f'W/"{hashlib.md5(source.encode("utf-8")).hexdigest()}"')
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is not None:
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,128 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Event
+
+EVENT_EXPORT_FIELDS = (
+    "id", "title", "description", "start_time", "address", "capacity", "participants_count",
+    "category__name", "creator_id", "creator__username",
+)
+
+CSV_HEADER = (
+    "event_id", "title", "description", "start_time", "address", "capacity", "participants_count",
+    "category", "creator_id", "creator_username", "participant_id", "participant_username",
+)
+
+
+class Echo:
+    """Псевдобуфер для csv.writer, що повертає записаний рядок замість збереження"""
+
+    def write(self, value):
+        return value
+
+
+def iter_event_batches(queryset, chunk_size):
+    """Ітерує події пачками разом з їхніми учасниками
+
+    Події читаються серверним курсором через `iterator(chunk_size=...)`,
+    а учасники завантажуються одним запитом на пачку за списком id подій,
+    тому в пам'яті одночасно знаходиться не більше однієї пачки.
+
+    Args:
+        queryset (QuerySet): Відфільтрований queryset подій
+        chunk_size (int): Кількість подій у пачці
+
+    Yields:
+        list[dict]: Пачка подій з ключем "participants" — списком (id, username)
+    """
+    through = Event.participants.through
+    rows = queryset.order_by("id").values(*EVENT_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+
+        participants = defaultdict(list)
+        memberships = (
+            through.objects.filter(event_id__in=[row["id"] for row in batch])
+            .order_by("event_id", "user_id")
+            .values_list("event_id", "user_id", "user__username")
+        )
+        for event_id, user_id, username in memberships:
+            participants[event_id].append((user_id, username))
+
+        for row in batch:
+            row["participants"] = participants.pop(row["id"], [])
+        yield batch
+
+
+def iter_ndjson(queryset, chunk_size):
+    """Генерує рядки NDJSON: одна подія з учасниками на рядок"""
+    for batch in iter_event_batches(queryset, chunk_size):
+        lines = []
+        for row in batch:
+            event = {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "start_time": row["start_time"],
+                "address": row["address"],
+                "capacity": row["capacity"],
+                "participants_count": row["participants_count"],
+                "category": row["category__name"],
+                "creator": {"id": row["creator_id"], "username": row["creator__username"]},
+                "participants": [
+                    {"id": user_id, "username": username} for user_id, username in row["participants"]
+                ],
+            }
+            lines.append(json.dumps(event, cls=JSONEncoder, ensure_ascii=False))
+        yield "\n".join(lines) + "\n"
+
+
+def iter_csv(queryset, chunk_size):
+    """Генерує рядки CSV: один рядок на кожну участь у події
+
+    Події без учасників записуються одним рядком з порожніми колонками учасника.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    for batch in iter_event_batches(queryset, chunk_size):
+        lines = []
+        for row in batch:
+            event = [
+                row["id"], row["title"], row["description"], row["start_time"].isoformat(), row["address"],
+                row["capacity"], row["participants_count"], row["category__name"],
+                row["creator_id"], row["creator__username"],
+            ]
+            for user_id, username in row["participants"] or [("", "")]:
+                lines.append(writer.writerow(event + [user_id, username]))
+        yield "".join(lines)
+
+
+async def aiter_chunks(chunks):
+    """Віддає частини синхронного генератора експорту як асинхронний ітератор
+
+    Під ASGI Django читає синхронний ітератор StreamingHttpResponse повністю
+    в пам'ять, тому кожна наступна пачка готується окремо в потоці для
+    синхронного коду (з тим самим з'єднанням БД і серверним курсором).
+
+    Args:
+        chunks (Iterator[str]): Генератор iter_ndjson або iter_csv
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Якщо клієнт розірвав з'єднання, серверний курсор закривається разом з генератором
+        await sync_to_async(chunks.close)()
\ No newline at end of file
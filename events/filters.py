@@ -0,0 +1,14 @@
+from django_filters import rest_framework as filters
+
+from .models import Event
+
+
+class EventFilter(filters.FilterSet):
+    """Фільтри подій за назвою категорії та іменем автора"""
+
+    class Meta:
+        model = Event
+        fields = {
+            "category__name": ['exact', 'icontains'],
+            "creator__username": ["exact", 'icontains']
+        }
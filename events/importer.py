@@ -0,0 +1,228 @@
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from rest_framework import serializers
+
+from .cache import event_list_cache
+from .models import Event, Category
+from .search import index_events
+
+User = get_user_model()
+
+PARTICIPANTS_SEPARATOR_RE = re.compile(r"[;,\s]+")
+
+
+class EventImportSerializer(serializers.Serializer):
+    """Перевіряє один рядок імпорту без запитів до БД"""
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    start_time = serializers.DateTimeField()
+    address = serializers.CharField(max_length=255)
+    category = serializers.CharField(max_length=255)
+    capacity = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    participants = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+    def validate(self, attrs):
+        participants = list(dict.fromkeys(attrs["participants"]))
+        capacity = attrs.get("capacity")
+        if capacity is not None and len(participants) > capacity:
+            raise serializers.ValidationError("The number of participants exceeds capacity.")
+        attrs["participants"] = participants
+        return attrs
+
+
+@dataclass
+class ImportReport:
+    """Результат імпорту: кількість створених подій та помилки за номерами рядків"""
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, errors):
+        self.errors.append({"row": row, "errors": errors})
+
+
+def normalize_row(row):
+    """Приводить рядок CSV/JSONL до формату EventImportSerializer
+
+    Порожні значення CSV вважаються відсутніми, а учасники в CSV
+    передаються одним рядком id, розділених ";", "," або пробілами.
+    """
+    row = {key: value for key, value in row.items() if value != ""}
+    participants = row.get("participants")
+    if isinstance(participants, str):
+        row["participants"] = [value for value in PARTICIPANTS_SEPARATOR_RE.split(participants) if value]
+    return row
+
+
+def read_jsonl(lines):
+    """Ітерує рядки JSONL, повертаючи для некоректного рядка його текст"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+def read_csv(lines):
+    """Ітерує рядки CSV як словники за заголовком"""
+    yield from csv.DictReader(lines)
+
+
+class EventImporter:
+    """Масовий імпорт подій пачками
+
+    Для кожної пачки виконується сталий набір запитів незалежно від її розміру:
+    перевірка зайнятих назв, пошук категорій за назвами, перевірка id учасників,
+    bulk_create подій та bulk_create рядків проміжної таблиці учасників.
+    Некоректні рядки пропускаються та потрапляють у звіт, не зупиняючи імпорт.
+    """
+
+    def __init__(self, creator, batch_size=500):
+        """
+        Args:
+            creator: Об'єкт User, який стане автором імпортованих подій
+            batch_size (int): Кількість рядків в одній пачці
+        """
+        self.creator = creator
+        self.batch_size = batch_size
+        self.categories = {}
+        self.seen_titles = set()
+
+    def run(self, rows) -> ImportReport:
+        """Імпортує події
+
+        Args:
+            rows (Iterable): Рядки імпорту (словники), нумерація у звіті починається з 1
+
+        Returns:
+            ImportReport: Звіт про імпорт
+        """
+        report = ImportReport()
+        numbered = enumerate(rows, start=1)
+
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch, report)
+
+        report.errors.sort(key=lambda error: error["row"])
+        if report.created:
+            event_list_cache.invalidate_on_commit()
+        return report
+
+    def validate_batch(self, batch, report):
+        valid = []
+        for number, row in batch:
+            if not isinstance(row, dict):
+                report.add_error(number, {"non_field_errors": ["Row must be an object."]})
+                continue
+
+            serializer = EventImportSerializer(data=normalize_row(row))
+            if not serializer.is_valid():
+                report.add_error(number, serializer.errors)
+                continue
+
+            title = serializer.validated_data["title"]
+            if title in self.seen_titles:
+                report.add_error(number, {"title": ["Duplicate title in the import."]})
+                continue
+
+            self.seen_titles.add(title)
+            valid.append((number, serializer.validated_data))
+        return valid
+
+    def resolve_categories(self, names):
+        missing = set(names) - set(self.categories)
+        if not missing:
+            return
+
+        for category in Category.objects.filter(name__in=missing).order_by("-id"):
+            self.categories[category.name] = category
+
+        new = [Category(name=name) for name in missing if name not in self.categories]
+        if new:
+            created = Category.objects.bulk_create(new)
+            if any(category.pk is None for category in created):
+                created = Category.objects.filter(name__in=[category.name for category in new])
+            for category in created:
+                self.categories[category.name] = category
+
+    def import_batch(self, batch, report):
+        valid = self.validate_batch(batch, report)
+        if not valid:
+            return
+
+        existing_titles = set(
+            Event.objects.filter(title__in=[data["title"] for _, data in valid]).values_list("title", flat=True)
+        )
+        participant_ids = {user_id for _, data in valid for user_id in data["participants"]}
+        existing_users = set(User.objects.filter(pk__in=participant_ids).values_list("pk", flat=True))
+
+        rows = []
+        for number, data in valid:
+            if data["title"] in existing_titles:
+                report.add_error(number, {"title": ["Event with this title already exists."]})
+                continue
+            missing = [user_id for user_id in data["participants"] if user_id not in existing_users]
+            if missing:
+                report.add_error(number, {"participants": [f"Users not found: {missing}"]})
+                continue
+            rows.append((number, data))
+
+        if not rows:
+            return
+
+        known_categories = set(self.categories)
+        try:
+            with transaction.atomic():
+                self.resolve_categories({data["category"] for _, data in rows})
+                events = self.create_events(rows)
+                index_events(events)
+        except DatabaseError as error:
+            # Відкат видаляє категорії, створені в цій пачці, а назви подій знову вільні
+            for name in set(self.categories) - known_categories:
+                del self.categories[name]
+            self.seen_titles.difference_update(data["title"] for _, data in rows)
+            for number, _ in rows:
+                report.add_error(number, {"non_field_errors": [str(error)]})
+            return
+
+        report.created += len(events)
+
+    def create_events(self, rows):
+        events = [
+            Event(
+                title=data["title"],
+                description=data["description"],
+                start_time=data["start_time"],
+                address=data["address"],
+                capacity=data.get("capacity"),
+                category=self.categories[data["category"]],
+                creator=self.creator,
+                participants_count=len(data["participants"]),
+            )
+            for _, data in rows
+        ]
+        events = Event.objects.bulk_create(events)
+
+        if not connection.features.can_return_rows_from_bulk_insert:
+            events = list(Event.objects.filter(title__in=[event.title for event in events]))
+        by_title = {event.title: event for event in events}
+
+        through = Event.participants.through
+        memberships = [
+            through(event_id=by_title[data["title"]].pk, user_id=user_id)
+            for _, data in rows
+            for user_id in data["participants"]
+        ]
+        through.objects.bulk_create(memberships, batch_size=self.batch_size)
+        return events
@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importer import EventImporter, read_jsonl, read_csv
+
+User = get_user_model()
+
+READERS = {
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+}
+
+
+class Command(BaseCommand):
+    help = "Масово імпортує події з файлу JSONL або CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Шлях до файлу з подіями")
+        parser.add_argument(
+            "--creator",
+            required=True,
+            help="Ім'я користувача, який стане автором імпортованих подій",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Формат файлу. За замовчуванням визначається за розширенням",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EVENTS_IMPORT_BATCH_SIZE,
+            help="Кількість рядків, що імпортуються однією пачкою",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format == "ndjson":
+            file_format = "jsonl"
+        if file_format not in READERS:
+            raise CommandError(f"Невідомий формат файлу: {path.name}. Вкажіть --format")
+
+        try:
+            creator = User.objects.get(username=options["creator"])
+        except User.DoesNotExist:
+            raise CommandError(f"Користувача {options['creator']} не знайдено")
+
+        importer = EventImporter(creator, batch_size=options["batch_size"])
+        try:
+            with path.open(encoding="utf-8", newline="") as file:
+                report = importer.run(READERS[file_format](file))
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for error in report.errors:
+            self.stderr.write(f"Рядок {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Створено подій: {report.created}, помилок: {len(report.errors)}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events.search import rebuild_index, is_search_enabled
+
+
+class Command(BaseCommand):
+    help = "Повністю перебудовує повнотекстовий індекс подій"
+
+    def handle(self, *args, **kwargs):
+        if not is_search_enabled():
+            self.stdout.write("Повнотекстовий пошук підтримується лише для SQLite")
+            return
+
+        with transaction.atomic():
+            rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS("Індекс подій перебудовано"))
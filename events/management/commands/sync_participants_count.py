@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Перевіряє та виправляє збережену кількість учасників подій (participants_count)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Лише показати події з неправильною кількістю учасників, нічого не змінюючи",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Кількість подій, що виправляються одним запитом UPDATE",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Event.objects.with_actual_participants_count()
+            .exclude(participants_count=F("actual_participants_count"))
+            .order_by("id")
+            .values_list("id", "participants_count", "actual_participants_count")
+        )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Розбіжностей не знайдено"))
+            return
+
+        for event_id, stored, actual in drifted:
+            self.stdout.write(f"Подія {event_id}: збережено {stored}, насправді {actual}")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Знайдено розбіжностей: {len(drifted)}"))
+            return
+
+        batch_size = options["batch_size"]
+        fixed = 0
+        for start in range(0, len(drifted), batch_size):
+            event_ids = [event_id for event_id, _, _ in drifted[start:start + batch_size]]
+            with transaction.atomic():
+                fixed += Event.objects.filter(pk__in=event_ids).recount_participants()
+
+        self.stdout.write(self.style.SUCCESS(f"Виправлено подій: {fixed}"))
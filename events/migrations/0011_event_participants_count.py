@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_participants_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    through = Event.participants.through
+    count = (
+        through.objects.filter(event_id=OuterRef('pk'))
+        .order_by()
+        .values('event_id')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Event.objects.update(participants_count=Coalesce(Subquery(count), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_event_capacity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='participants_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість учасників'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['participants_count', 'id'], name='event_popularity_idx'),
+        ),
+        migrations.RunPython(fill_participants_count, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction, connections, router
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
 
 class Category(models.Model):
     name = models.CharField(max_length=255, verbose_name="Назва категорії")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
 
     def __str__(self):
         return self.name
@@ -11,6 +16,56 @@ class Category(models.Model):
         verbose_name = 'Категорія'
         verbose_name_plural = "Категорії"
 
+class JoinStatus(models.TextChoices):
+    JOINED = 'joined', 'Ви приєдналися до події'
+    ALREADY_JOINED = 'already_joined', 'Ви вже є учасником події'
+    FULL = 'full', 'Усі місця на подію вже зайняті'
+
+class EventQuerySet(models.QuerySet):
+    def actual_participants_count(self):
+        """Повертає підзапит, що рахує учасників події в проміжній таблиці"""
+        through = Event.participants.through
+        count = (
+            through.objects.filter(event_id=OuterRef('pk'))
+            .order_by()
+            .values('event_id')
+            .annotate(count=Count('*'))
+            .values('count')
+        )
+        return Coalesce(Subquery(count), Value(0))
+
+    def with_actual_participants_count(self):
+        """Додає до подій анотацію actual_participants_count з реальною кількістю учасників"""
+        return self.annotate(actual_participants_count=self.actual_participants_count())
+
+    def recount_participants(self) -> int:
+        """Перераховує participants_count одним UPDATE для подій queryset, де він розійшовся
+
+        Разом з лічильником оновлюється updated_at, щоб змінились ETag та Last-Modified
+        відповідей з цими подіями. Події з правильним лічильником не змінюються.
+
+        Returns:
+            int: Кількість оновлених подій
+        """
+        actual = self.actual_participants_count()
+        return self.exclude(participants_count=actual).update(participants_count=actual, updated_at=timezone.now())
+
+    def involving_user(self, user_id:int):
+        """Повертає події, автором або учасником яких є користувач"""
+        through = Event.participants.through
+        return self.filter(Q(creator_id=user_id) | Q(pk__in=through.objects.filter(user_id=user_id).values('event_id')))
+
+    def touch(self) -> int:
+        """Оновлює updated_at подій одним UPDATE
+
+        Використовується, коли змінились вкладені у відповідь дані (автор, учасники,
+        категорія), щоб ETag та Last-Modified залежали лише від колонок самої події.
+
+        Returns:
+            int: Кількість оновлених подій
+        """
+        return self.update(updated_at=timezone.now())
+
 class Event(models.Model):
     title = models.CharField(max_length=255, verbose_name='Заголовок', unique=True)
     description = models.TextField(verbose_name="Опис")
@@ -33,10 +88,81 @@ class Event(models.Model):
         verbose_name="Категорія",
         related_name='participated_events'
     )
+    capacity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Максимальна кількість учасників"
+    )
+    participants_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Кількість учасників"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
+
+    objects = EventQuerySet.as_manager()
     
     def __str__(self):
         return self.title
+
+    def add_participant(self, user) -> JoinStatus:
+        """Додає користувача до учасників події одним запитом INSERT ... SELECT
+
+        Вставка виконується лише якщо користувач ще не є учасником і не
+        перевищено capacity, тому паралельні приєднання не можуть
+        перевищити ліміт або створити дублікат. Результат визначається
+        за кількістю вставлених рядків, додатковий запит виконується лише
+        у разі відмови, щоб розрізнити її причину.
+
+        Args:
+            user: Об'єкт User
+
+        Returns:
+            JoinStatus: Результат приєднання
+        """
+        through = Event.participants.through
+        using = router.db_for_write(through, instance=self)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        event_table = qn(Event._meta.db_table)
+        through_table = qn(through._meta.db_table)
+        event_column = qn(through._meta.get_field('event').column)
+        user_column = qn(through._meta.get_field('user').column)
+
+        sql = (
+            f"INSERT INTO {through_table} ({event_column}, {user_column}) "
+            f"SELECT e.id, %s FROM {event_table} e "
+            f"WHERE e.id = %s "
+            f"AND NOT EXISTS (SELECT 1 FROM {through_table} p WHERE p.{event_column} = e.id AND p.{user_column} = %s) "
+            f"AND (e.capacity IS NULL OR (SELECT COUNT(*) FROM {through_table} p WHERE p.{event_column} = e.id) < e.capacity)"
+        )
+
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, self.pk, user.pk])
+                inserted = cursor.rowcount == 1
+
+            if inserted:
+                m2m_changed.send(
+                    sender=through,
+                    instance=self,
+                    action='post_add',
+                    reverse=False,
+                    model=user.__class__,
+                    pk_set={user.pk},
+                    using=using,
+                )
+                return JoinStatus.JOINED
+
+        if through.objects.using(using).filter(event_id=self.pk, user_id=user.pk).exists():
+            return JoinStatus.ALREADY_JOINED
+        return JoinStatus.FULL
     
     class Meta:
         verbose_name = 'Подія'
         verbose_name_plural = 'Події'
+        indexes = [
+            models.Index(fields=['start_time', 'id'], name='event_start_time_id_idx'),
+            models.Index(fields=['participants_count', 'id'], name='event_popularity_idx'),
+        ]
@@ -0,0 +1,240 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def normalize_ordering(queryset):
+    """Повертає впорядкування queryset, доповнене первинним ключем
+
+    Args:
+        queryset (QuerySet): Queryset, для якого потрібно визначити порядок
+
+    Returns:
+        tuple: Назви полів (з префіксом "-" для спадання), останнім завжди є первинний ключ
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering)
+    pk_name = model._meta.pk.name
+
+    for index, field in enumerate(ordering):
+        if not isinstance(field, str) or "__" in field or field.lstrip("-") == "?":
+            raise ValueError("Keyset pagination supports only plain model fields in ordering")
+        if field.lstrip("-") == "pk":
+            ordering[index] = field.replace("pk", pk_name)
+
+    if not any(field.lstrip("-") == pk_name for field in ordering):
+        descending = bool(ordering) and ordering[-1].startswith("-")
+        ordering.append(f"-{pk_name}" if descending else pk_name)
+
+    return tuple(ordering)
+
+
+class RowValueGreaterThan(TupleGreaterThan):
+    """(a, b) > (x, y) як порівняння значень рядка
+
+    Django для SQLite розгортає порівняння кортежів в OR-умову, хоча SQLite
+    (з версії 3.15) підтримує значення рядків і використовує для них складений індекс.
+    """
+
+    def as_sql(self, compiler, connection):
+        if connection.vendor == "sqlite":
+            return GreaterThan.as_sql(self, compiler, connection)
+        return super().as_sql(compiler, connection)
+
+
+class RowValueLessThan(TupleLessThan):
+    """(a, b) < (x, y) як порівняння значень рядка, див. RowValueGreaterThan"""
+
+    def as_sql(self, compiler, connection):
+        if connection.vendor == "sqlite":
+            return LessThan.as_sql(self, compiler, connection)
+        return super().as_sql(compiler, connection)
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Будує умову "рядки після позиції" для keyset-пагінації
+
+    Якщо всі поля впорядковані в одному напрямку, для впорядкування (a, b, id)
+    та позиції (x, y, z) повертає порівняння значень рядка (a, b, id) > (x, y, z),
+    що дозволяє БД використати складений індекс замість OFFSET.
+    Для змішаних напрямків порівняння рядка неможливе, тому умова розгортається в
+    a > x OR (a = x AND b < y) OR (a = x AND b = y AND id > z).
+
+    Args:
+        ordering (tuple): Впорядкування, отримане з `normalize_ordering`
+        values (tuple): Значення полів впорядкування в позиції курсора
+        reverse (bool): True, якщо потрібні рядки перед позицією
+
+    Returns:
+        Q: Умова фільтрації
+    """
+    directions = {field.startswith("-") != reverse for field in ordering}
+    if len(directions) == 1:
+        lookup = RowValueLessThan if directions.pop() else RowValueGreaterThan
+        columns = Tuple(*(F(field.lstrip("-")) for field in ordering))
+        return Q(lookup(columns, tuple(values)))
+
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != reverse
+        lookups = {ordering[i].lstrip("-"): values[i] for i in range(index)}
+        lookups[f"{name}__{'lt' if descending else 'gt'}"] = values[index]
+        condition |= Q(**lookups)
+    return condition
+
+
+def invert_ordering(ordering):
+    """Повертає впорядкування у зворотному напрямку"""
+    return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+
+class KeysetPagination(BasePagination):
+    """Курсорна пагінація за стабільним впорядкуванням queryset
+
+    Пагінація вмикається лише тоді, коли в запиті є параметр `cursor` або `page_size`,
+    інакше ендпоінт повертає повний список, як і раніше.
+    Вартість сторінки не залежить від її позиції, бо замість OFFSET
+    використовується умова за значеннями полів останнього рядка.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_query_param not in request.query_params
+            and self.page_size_query_param not in request.query_params
+        ):
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = normalize_ordering(queryset)
+        self.cursor = self.decode_cursor(request, queryset.model)
+
+        reverse = False
+        if self.cursor is not None:
+            reverse, values = self.cursor
+            queryset = queryset.filter(keyset_filter(self.ordering, values, reverse))
+
+        queryset = queryset.order_by(*(invert_ordering(self.ordering) if reverse else self.ordering))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        page_size = settings.EVENTS_PAGE_SIZE
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.EVENTS_MAX_PAGE_SIZE))
+
+    def get_position(self, instance):
+        fields = [instance._meta.get_field(field.lstrip("-")) for field in self.ordering]
+        return [field.value_to_string(instance) for field in fields]
+
+    def encode_cursor(self, reverse, position):
+        payload = json.dumps({"r": int(reverse), "p": position}, separators=(",", ":"))
+        token = urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            position = payload["p"]
+            if len(position) != len(self.ordering):
+                raise ValueError
+            values = tuple(
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            )
+            return bool(payload["r"]), values
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.get_position(self.page[0]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Непрозорий курсор сторінки з полів next/previous попередньої відповіді.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Кількість подій на сторінці. Вмикає курсорну пагінацію.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class SearchPagination(PageNumberPagination):
+    """Посторінкова пагінація результатів повнотекстового пошуку
+
+    Результати впорядковані за релевантністю, тому замість курсора
+    використовується номер сторінки.
+    """
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        self.page_size = settings.EVENTS_PAGE_SIZE
+        self.max_page_size = settings.EVENTS_MAX_PAGE_SIZE
+        return super().get_page_size(request)
@@ -0,0 +1,28 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+from .importer import read_jsonl, read_csv
+
+
+class JSONLinesParser(BaseParser):
+    """Парсер JSONL: один JSON-об'єкт на рядок
+
+    Рядок з некоректним JSON не зупиняє розбір, а повертається як текст,
+    щоб імпорт відзначив помилку саме для цього рядка.
+    """
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        return list(read_jsonl(codecs.getreader(encoding)(stream)))
+
+
+class CSVParser(BaseParser):
+    """Парсер CSV з рядком заголовку, що повертає список словників"""
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        return list(read_csv(codecs.getreader(encoding)(stream)))
@@ -6,7 +6,7 @@ class IsOwnerOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         
-        return self.author == request.user
+        return obj.creator_id == request.user.id
     
 
 class isAuthor(BasePermission):
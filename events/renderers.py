@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Рендерер NDJSON: один JSON-об'єкт на рядок
+
+    Дані експорту віддаються потоком напряму з view, тому рендерер
+    використовується для узгодження формату та для відповідей з помилками.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False).encode(self.charset) + b"\n"
+
+
+class CSVRenderer(BaseRenderer):
+    """Рендерер CSV для узгодження формату та відповідей з помилками"""
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if isinstance(data, dict):
+            writer.writerows(data.items())
+        else:
+            writer.writerow([data])
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,156 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+
+FTS_TABLE = "events_event_fts"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Вага стовпців для bm25: збіг у назві важливіший, ніж в адресі чи описі
+TITLE_WEIGHT, DESCRIPTION_WEIGHT, ADDRESS_WEIGHT = 10.0, 1.0, 2.0
+
+
+# Символи з області приватного використання Unicode, якими FTS5 позначає збіги у фрагменті.
+# Після екранування тексту вони замінюються на <mark>
+MATCH_START, MATCH_END = "\ue000", "\ue001"
+
+
+def is_search_enabled() -> bool:
+    """Повертає True, якщо БД підтримує повнотекстовий індекс (SQLite FTS5)"""
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(text: str) -> str:
+    """Перетворює текст користувача на запит FTS5 з пошуком за префіксом
+
+    Args:
+        text (str): Пошуковий рядок
+
+    Returns:
+        str: Запит MATCH, де кожне слово шукається за префіксом ("кон"* "львів"*),
+        або порожній рядок, якщо в тексті немає слів
+    """
+    return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def highlight_snippet(snippet: str) -> str:
+    """Екранує текст фрагмента та позначає збіги тегами <mark>
+
+    Текст подій вводять користувачі, тож HTML у ньому екранується,
+    і єдиною розміткою у фрагменті залишаються теги <mark>.
+
+    Args:
+        snippet (str): Фрагмент з FTS5 зі збігами між MATCH_START та MATCH_END
+
+    Returns:
+        str: Безпечний для вставки в HTML фрагмент
+    """
+    return escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+def index_events(events):
+    """Додає або оновлює події в повнотекстовому індексі
+
+    Args:
+        events (Iterable[Event]): Події для індексації
+    """
+    if not is_search_enabled():
+        return
+
+    rows = [(event.pk, event.title, event.description, event.address) for event in events]
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, address) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_event(event_id: int):
+    """Видаляє подію з повнотекстового індексу
+
+    Args:
+        event_id (int): id події
+    """
+    if not is_search_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event_id])
+
+
+def rebuild_index():
+    """Повністю перебудовує повнотекстовий індекс з таблиці подій"""
+    if not is_search_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, address) "
+            f"SELECT id, title, description, address FROM events_event"
+        )
+
+
+class EventSearchResults:
+    """Лінива послідовність результатів пошуку для Paginator
+
+    Кількість рахується одним запитом COUNT, а зріз виконує запит MATCH
+    з LIMIT/OFFSET, впорядкований за релевантністю (bm25), та завантажує
+    лише події поточної сторінки.
+    """
+
+    def __init__(self, text: str, queryset):
+        """
+        Args:
+            text (str): Пошуковий рядок
+            queryset (QuerySet): Queryset подій, з якого завантажуються знайдені події
+        """
+        self.match = build_match_query(text)
+        self.queryset = queryset
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            if not self.match:
+                self._count = 0
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [self.match])
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("EventSearchResults supports only slicing")
+        if not self.match:
+            return []
+
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else -1
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', 16), "
+                f"bm25({FTS_TABLE}, %s, %s, %s) AS score "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY score LIMIT %s OFFSET %s",
+                [MATCH_START, MATCH_END, TITLE_WEIGHT, DESCRIPTION_WEIGHT, ADDRESS_WEIGHT, self.match, limit, offset],
+            )
+            hits = cursor.fetchall()
+
+        events = self.queryset.in_bulk([event_id for event_id, _, _ in hits])
+        results = []
+        for event_id, snippet, score in hits:
+            event = events.get(event_id)
+            if event is None:
+                continue
+            event.search_snippet = highlight_snippet(snippet)
+            event.search_rank = -score
+            results.append(event)
+        return results
@@ -1,8 +1,93 @@
+from django.db.models import Prefetch
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.utils import html
 from .models import Event, Category
 from users.serializers import UserSerializer, User
 
 
+EVENT_FIELDS = ['title', 'description', 'start_time', 'creator', 'participants', 'address', 'category', 'capacity']
+EVENT_OPTIONAL_FIELDS = ['participants_count']
+EVENT_EXPANDABLE_FIELDS = ['creator', 'participants']
+
+
+def parse_event_fields(query_params):
+    """Розбирає параметри ?fields= та ?expand= запиту
+
+    Args:
+        query_params (QueryDict): Параметри запиту
+
+    Returns:
+        tuple: Множина полів для відповіді та множина зв'язків, які потрібно розгорнути в повні об'єкти.
+        Без ?fields= повертаються всі стандартні поля, без ?expand= розгортаються всі зв'язки.
+    """
+    fields = query_params.get('fields')
+    if fields:
+        allowed = EVENT_FIELDS + EVENT_OPTIONAL_FIELDS
+        fields = {name for name in fields.split(',') if name in allowed}
+    else:
+        fields = set(EVENT_FIELDS)
+
+    expand = query_params.get('expand')
+    if expand is None:
+        expand = set(EVENT_EXPANDABLE_FIELDS)
+    else:
+        expand = {name for name in expand.split(',') if name in EVENT_EXPANDABLE_FIELDS}
+
+    return fields, expand
+
+
+@extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
+class PrimaryKeyListField(serializers.Field):
+    """Список id пов'язаних об'єктів, що перевіряється одним запитом
+
+    На відміну від PrimaryKeyRelatedField(many=True), який робить окремий
+    SELECT для кожного id, всі id перевіряються одним запитом `pk__in`,
+    а всі відсутні id повертаються в одній помилці.
+    """
+    default_error_messages = {
+        'not_a_list': _('Expected a list of items but got type "{input_type}".'),
+        'incorrect_type': _('Incorrect type. Expected pk value, received {data_type}.'),
+        'does_not_exist': _('Invalid pk(s) {pk_values} - object(s) do not exist.'),
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def get_value(self, dictionary):
+        if html.is_html_input(dictionary):
+            if self.field_name not in dictionary and getattr(self.root, 'partial', False):
+                return empty
+            return dictionary.getlist(self.field_name)
+        return dictionary.get(self.field_name, empty)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+
+        pks = list(dict.fromkeys(pks))
+        objects = self.queryset.in_bulk(pks) if pks else {}
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_values=missing)
+        return [objects[pk] for pk in pks]
+
+    def to_representation(self, value):
+        return [obj.pk for obj in value.all()]
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -12,19 +97,94 @@ class EventSerializer(serializers.ModelSerializer):
     category = CategorySerializer()
     creator = UserSerializer(read_only=True)
     participants = UserSerializer(many=True)
+    participants_count = serializers.IntegerField(read_only=True)
 
     class Meta: 
         model = Event
-        fields = ['title', 'description', 'start_time', 'creator', 'participants', 'address', 'category']
+        fields = EVENT_FIELDS + EVENT_OPTIONAL_FIELDS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            for name in EVENT_OPTIONAL_FIELDS:
+                self.fields.pop(name)
+            return
+
+        fields, expand = parse_event_fields(request.query_params)
+        for name in set(EVENT_FIELDS + EVENT_OPTIONAL_FIELDS) - fields:
+            self.fields.pop(name)
+
+        if 'creator' in self.fields and 'creator' not in expand:
+            self.fields['creator'] = serializers.PrimaryKeyRelatedField(read_only=True)
+        if 'participants' in self.fields and 'participants' not in expand:
+            self.fields['participants'] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    @staticmethod
+    def optimize_queryset(queryset, request):
+        """Звужує queryset до полів, які запитав клієнт
+
+        Args:
+            queryset (QuerySet): Queryset подій
+            request (Request): Запит з параметрами ?fields= та ?expand=
+
+        Returns:
+            QuerySet: Queryset, що завантажує лише потрібні колонки та зв'язки.
+            participants_count завжди завантажується, бо за ним можна сортувати
+        """
+        fields, expand = parse_event_fields(request.query_params)
+        columns = {'id', 'start_time', 'participants_count'} | (fields & {'title', 'description', 'address', 'capacity'})
+
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+            columns.add('category__name')
+
+        if 'creator' in fields:
+            if 'creator' in expand:
+                queryset = queryset.select_related('creator')
+                columns.update(f'creator__{name}' for name in UserSerializer.Meta.fields)
+            else:
+                columns.add('creator')
+
+        if 'participants' in fields:
+            user_fields = UserSerializer.Meta.fields if 'participants' in expand else ['id']
+            queryset = queryset.prefetch_related(
+                Prefetch('participants', queryset=User.objects.only(*user_fields))
+            )
+
+        return queryset.only(*columns)
+
+class EventSearchSerializer(EventSerializer):
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['snippet', 'rank']
 
 class EventCreateSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(slug_field="name", queryset=Category.objects.all())
     creator = serializers.PrimaryKeyRelatedField(read_only=True)
-    participants = serializers.PrimaryKeyRelatedField(many=True, queryset=User.objects.all(), required=False)
+    participants = PrimaryKeyListField(queryset=User.objects.only('id'), required=False)
 
     class Meta: 
         model = Event
-        fields = ['title', 'description', 'start_time', 'creator', 'participants', 'address', 'category']
+        fields = ['title', 'description', 'start_time', 'creator', 'participants', 'address', 'category', 'capacity']
+
+    def validate(self, attrs):
+        """Перевіряє, що учасників не більше за максимальну кількість
+
+        При частковому оновленні відсутні capacity або participants беруться з події.
+        """
+        capacity = attrs.get('capacity', getattr(self.instance, 'capacity', None))
+        if 'participants' in attrs:
+            count = len(attrs['participants'])
+        else:
+            count = getattr(self.instance, 'participants_count', 0)
+
+        if capacity is not None and count > capacity:
+            raise serializers.ValidationError({'capacity': "The number of participants exceeds capacity."})
+        return attrs
 
     def create(self, validated_data):
         user = self.context['request'].user
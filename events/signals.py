@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import event_list_cache
+from .models import Event, Category
+from .search import index_events, remove_event
+from users.serializers import UserSerializer
+
+User = get_user_model()
+
+# Поля користувача, вкладені у відповідь списку подій (автор та учасники)
+NESTED_USER_FIELDS = tuple(name for name in UserSerializer.Meta.fields if name != 'id')
+
+
+@receiver(post_save, sender=Event)
+def update_search_index(sender, instance, **kwargs):
+    """Оновлює повнотекстовий індекс після створення або редагування події"""
+    index_events([instance])
+
+
+@receiver(post_delete, sender=Event)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Видаляє подію з повнотекстового індексу після її видалення"""
+    remove_event(instance.pk)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_event_list_cache(sender, **kwargs):
+    """Скидає кеш списку подій після зміни подій або категорій"""
+    event_list_cache.invalidate_on_commit()
+
+
+@receiver(pre_save, sender=User)
+def detect_nested_user_changes(sender, instance, raw, update_fields, **kwargs):
+    """Перевіряє, чи змінюються поля користувача, вкладені у список подій
+
+    Вхід і вихід у боті, відкликання токенів та оновлення last_login зберігають
+    інші поля, тому кеш списку подій після них не скидається.
+    """
+    instance._nested_fields_changed = False
+    fields = [name for name in NESTED_USER_FIELDS if update_fields is None or name in update_fields]
+    if raw or instance.pk is None or not fields:
+        return
+
+    saved = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._nested_fields_changed = saved is not None and any(
+        saved[name] != getattr(instance, name) for name in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def sync_events_on_user_change(sender, instance, **kwargs):
+    """Оновлює updated_at подій користувача та скидає кеш списку подій,
+    якщо змінились дані автора або учасника у відповіді"""
+    if getattr(instance, "_nested_fields_changed", False):
+        Event.objects.involving_user(instance.pk).touch()
+        event_list_cache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Category)
+def touch_category_events(sender, instance, created, **kwargs):
+    """Оновлює updated_at подій категорії, бо її назва вкладена у відповідь"""
+    if not created:
+        Event.objects.filter(category=instance).touch()
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+def invalidate_event_list_cache_on_participants(sender, action, **kwargs):
+    """Скидає кеш списку подій після зміни учасників"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        event_list_cache.invalidate_on_commit()
+
+
+def get_affected_event_ids(instance, action, reverse, pk_set):
+    """Повертає id подій, учасників яких змінив сигнал m2m_changed
+
+    Args:
+        instance: Подія (reverse=False) або користувач (reverse=True)
+        action (str): Дія сигналу m2m_changed
+        reverse (bool): True, якщо зміну зроблено з боку користувача (user.event_set)
+        pk_set (set): id змінених об'єктів протилежної сторони
+
+    Returns:
+        list: id подій
+    """
+    if not reverse:
+        return [instance.pk]
+    if action == "pre_clear":
+        instance._cleared_event_ids = list(instance.event_set.values_list("id", flat=True))
+    if action in ("pre_clear", "post_clear"):
+        return getattr(instance, "_cleared_event_ids", [])
+    return list(pk_set or [])
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+def sync_events_on_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    """Оновлює participants_count та updated_at подій після зміни учасників
+
+    Для post_add Django передає лише справді додані id, тому лічильник
+    збільшується F-виразом. Для post_remove pk_set містить усі передані id,
+    навіть якщо частина з них не була учасниками, тому лічильник
+    перераховується підзапитом.
+    """
+    event_ids = get_affected_event_ids(instance, action, reverse, pk_set)
+    if action not in ("post_add", "post_remove", "post_clear") or not event_ids:
+        return
+
+    events = Event.objects.filter(pk__in=event_ids)
+    now = timezone.now()
+
+    if action == "post_add":
+        added = len(pk_set) if not reverse else 1
+        events.update(participants_count=F("participants_count") + added, updated_at=now)
+    elif action == "post_clear" and not reverse:
+        events.update(participants_count=0, updated_at=now)
+    else:
+        events.update(participants_count=events.actual_participants_count(), updated_at=now)
+
+
+@receiver(pre_delete, sender=User)
+def remember_joined_events(sender, instance, **kwargs):
+    """Запам'ятовує події користувача, бо каскадне видалення участі не надсилає m2m_changed"""
+    instance._joined_event_ids = list(instance.event_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=User)
+def recount_joined_events(sender, instance, **kwargs):
+    """Перераховує учасників подій, з яких зник видалений користувач"""
+    event_ids = getattr(instance, "_joined_event_ids", None)
+    if event_ids:
+        Event.objects.filter(pk__in=event_ids).recount_participants()
+        event_list_cache.invalidate_on_commit()
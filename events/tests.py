@@ -1,3 +1,602 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+from .cache import event_list_cache
+from .importer import EventImporter
+from .models import Category, Event, JoinStatus
+from .search import build_match_query
+from .serializers import EVENT_FIELDS, EventCreateSerializer
+
+# Файлові кеші спільні для процесів, тому тести працюють з кешами в пам'яті
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'events', 'users', 'sessions')
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class EventTestCase(TestCase):
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.creator = User.objects.create_user(username="creator", password="password")
+        self.category = Category.objects.create(name="Спорт")
+
+    def create_event(self, title, **kwargs):
+        kwargs = {
+            'description': "Опис", 'address': "Київ", 'start_time': timezone.now() + timedelta(days=1),
+            'category': self.category, 'creator': self.creator, **kwargs,
+        }
+        return Event.objects.create(title=title, **kwargs)
+
+
+class KeysetPaginationTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        start = timezone.now() + timedelta(days=1)
+        # Однакові start_time та participants_count перевіряють порівняння за id
+        for i in range(7):
+            self.create_event(f"Подія {i}", start_time=start + timedelta(hours=i % 3), participants_count=i % 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def walk(self, query):
+        titles, previous = [], None
+        url = f"/api/events/?{query}&page_size=2&fields=title"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles.extend(event['title'] for event in response.data['results'])
+            url, previous = response.data['next'], response.data['previous']
+
+        # Попередня сторінка від останньої повертає ті самі рядки, що й передостання
+        response = self.client.get(previous)
+        self.assertEqual([event['title'] for event in response.data['results']], titles[-3:-1])
+        return titles
+
+    def test_pages_follow_ordering(self):
+        for query, ordering in (
+            ("ordering=start_time", ("start_time", "id")),
+            ("ordering=-participants_count", ("-participants_count", "-id")),
+            ("ordering=participants_count,-start_time", ("participants_count", "-start_time", "-id")),
+        ):
+            with self.subTest(query=query):
+                expected = list(Event.objects.order_by(*ordering).values_list('title', flat=True))
+                self.assertEqual(self.walk(query), expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/events/?cursor=broken").status_code, 404)
+
+
+class SparseFieldsetTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Забіг")
+        self.runner = User.objects.create_user(username="runner")
+        self.event.add_participant(self.runner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def get_event(self, query=""):
+        response = self.client.get(f"/api/events/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]
+
+    def test_default_payload(self):
+        event = self.get_event()
+        self.assertEqual(list(event), EVENT_FIELDS)
+        self.assertEqual(event['creator']['username'], "creator")
+        self.assertEqual([user['username'] for user in event['participants']], ["runner"])
+
+    def test_fields(self):
+        self.assertEqual(self.get_event("fields=title,participants_count"), {'title': "Забіг", 'participants_count': 1})
+        self.assertEqual(self.get_event("fields=title,password"), {'title': "Забіг"})
+
+    def test_expand(self):
+        event = self.get_event("expand=")
+        self.assertEqual((event['creator'], event['participants']), (self.creator.pk, [self.runner.pk]))
+
+        event = self.get_event("expand=creator")
+        self.assertEqual((event['creator']['username'], event['participants']), ("creator", [self.runner.pk]))
+
+    def test_query_count_does_not_grow_with_events(self):
+        def count_queries(query):
+            event_list_cache.invalidate()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(f"/api/events/?{query}")
+            return len(queries)
+
+        queries = ("", "expand=", "fields=title,participants_count")
+        before = [count_queries(query) for query in queries]
+        for i in range(3):
+            self.create_event(f"Подія {i}").add_participant(User.objects.create_user(username=f"user{i}"))
+        self.assertEqual([count_queries(query) for query in queries], before)
+
+
+class SearchTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def search(self, query):
+        response = self.client.get("/api/events/search", {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def titles(self, query):
+        return [event['title'] for event in self.search(query)]
+
+    def test_build_match_query(self):
+        self.assertEqual(build_match_query('футбол "Львів"'), '"футбол"* "Львів"*')
+        self.assertEqual(build_match_query('title: OR * NEAR(a'), '"title"* "OR"* "NEAR"* "a"*')
+        self.assertEqual(build_match_query('"*: ()'), '')
+
+    def test_ranking_and_prefixes(self):
+        self.create_event("Нічний забіг", address="Львів")
+        self.create_event("Концерт", description="Після концерту забіг парком")
+        self.create_event("Лекція")
+
+        self.assertEqual(self.titles("заб"), ["Нічний забіг", "Концерт"])
+        self.assertEqual(self.titles("забіг львів"), ["Нічний забіг"])
+
+    def test_query_syntax_is_escaped(self):
+        self.create_event("Забіг")
+        for query in ('"', 'title:забіг', 'забіг OR', 'NEAR(забіг', '*', '-забіг'):
+            with self.subTest(query=query):
+                self.search(query)
+        self.assertEqual(self.titles('title:забіг'), [])
+        self.assertEqual(self.client.get("/api/events/search", {'q': ' '}).status_code, 400)
+
+    def test_snippet_is_escaped(self):
+        self.create_event("Забіг", description="<script>alert(1)</script> забіг")
+        snippet = self.search("alert")[0]['snippet']
+        self.assertIn("&lt;script&gt;", snippet)
+        self.assertIn("<mark>alert</mark>", snippet)
+        self.assertNotIn("<script>", snippet)
+
+    def test_index_follows_changes(self):
+        event = self.create_event("Забіг")
+        event.title = "Велопробіг"
+        event.save()
+        self.assertEqual(self.titles("забіг"), [])
+        self.assertEqual(self.titles("велопробіг"), ["Велопробіг"])
+
+        event.delete()
+        self.assertEqual(self.titles("велопробіг"), [])
+
+
+class JoinEventTests(EventTestCase):
+    def test_add_participant(self):
+        event = self.create_event("Забіг", capacity=1)
+        user = User.objects.create_user(username="runner")
+        other = User.objects.create_user(username="late")
+
+        self.assertEqual(event.add_participant(user), JoinStatus.JOINED)
+        self.assertEqual(event.add_participant(user), JoinStatus.ALREADY_JOINED)
+        self.assertEqual(event.add_participant(other), JoinStatus.FULL)
+
+        event.refresh_from_db()
+        self.assertEqual(list(event.participants.values_list('id', flat=True)), [user.id])
+        self.assertEqual(event.participants_count, 1)
+
+    def test_take_part_view(self):
+        self.create_event("Забіг", capacity=1)
+        user = User.objects.create_user(username="runner")
+        other = User.objects.create_user(username="late")
+        client = APIClient()
+
+        client.force_authenticate(user)
+        self.assertEqual(client.post("/api/events/Забіг/join").status_code, 200)
+        self.assertEqual(client.post("/api/events/Забіг/join").status_code, 400)
+        client.force_authenticate(other)
+        self.assertEqual(client.post("/api/events/Забіг/join").status_code, 409)
+        self.assertEqual(client.post("/api/events/Невідома/join").status_code, 404)
+
+
+class EventCapacityValidationTests(EventTestCase):
+    def test_participants_exceed_capacity(self):
+        users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+        serializer = EventCreateSerializer(data={
+            'title': "Забіг", 'description': "Опис", 'start_time': timezone.now(), 'address': "Київ",
+            'category': self.category.name, 'capacity': 2, 'participants': [user.id for user in users],
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('capacity', serializer.errors)
+
+    def test_partial_update_uses_current_participants(self):
+        event = self.create_event("Забіг")
+        for i in range(3):
+            event.add_participant(User.objects.create_user(username=f"user{i}"))
+        event.refresh_from_db()
+
+        serializer = EventCreateSerializer(event, data={'capacity': 2}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('capacity', serializer.errors)
+
+        serializer = EventCreateSerializer(event, data={'capacity': 3}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class ParticipantIdsValidationTests(EventTestCase):
+    def validate(self, participants, **data):
+        serializer = EventCreateSerializer(data={
+            'title': "Забіг", 'description': "Опис", 'start_time': timezone.now(), 'address': "Київ",
+            'category': self.category.name, 'participants': participants, **data,
+        })
+        return serializer.is_valid(), serializer
+
+    def test_ids_are_checked_in_one_query(self):
+        users = [User.objects.create_user(username=f"user{i}") for i in range(5)]
+        ids = [user.pk for user in users]
+        with CaptureQueriesContext(connection) as queries:
+            valid, serializer = self.validate(ids + ids[:2])
+        self.assertTrue(valid, serializer.errors)
+        self.assertEqual(len([query for query in queries if '"users_user"' in query['sql']]), 1)
+        # Повторені id відкидаються, порядок зберігається
+        self.assertEqual([user.pk for user in serializer.validated_data['participants']], ids)
+
+    def test_missing_ids_in_one_error(self):
+        user = User.objects.create_user(username="runner")
+        valid, serializer = self.validate([user.pk, user.pk + 100, user.pk + 101])
+        self.assertFalse(valid)
+        self.assertEqual(
+            serializer.errors['participants'], [f"Invalid pk(s) {[user.pk + 100, user.pk + 101]} - object(s) do not exist."],
+        )
+
+    def test_incorrect_values(self):
+        for participants in ("1,2", {'id': 1}, [True], ["abc"], [None]):
+            with self.subTest(participants=participants):
+                valid, serializer = self.validate(participants)
+                self.assertFalse(valid)
+                self.assertIn('participants', serializer.errors)
+
+    def test_owner_can_update(self):
+        event = self.create_event("Забіг")
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="guest"))
+        self.assertEqual(client.patch("/api/events/Забіг", {'address': "Львів"}, format="json").status_code, 403)
+
+        client.force_authenticate(self.creator)
+        self.assertEqual(client.patch("/api/events/Забіг", {'address': "Львів"}, format="json").status_code, 200)
+        event.refresh_from_db()
+        self.assertEqual(event.address, "Львів")
+
+
+class ParticipantsCountTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Забіг")
+        self.other = self.create_event("Велопробіг")
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+
+    def assert_counts(self, event_count, other_count):
+        counts = dict(Event.objects.values_list('title', 'participants_count'))
+        self.assertEqual((counts["Забіг"], counts["Велопробіг"]), (event_count, other_count))
+
+    def test_forward_changes(self):
+        first, second, third = self.users
+        self.event.participants.add(first, second)
+        # Повторне додавання не змінює лічильник
+        self.event.participants.add(first)
+        self.assert_counts(2, 0)
+
+        # Видалення користувача, що не є учасником, не зменшує лічильник
+        self.event.participants.remove(second, third)
+        self.assert_counts(1, 0)
+        self.event.participants.set([second, third])
+        self.assert_counts(2, 0)
+        self.event.participants.clear()
+        self.assert_counts(0, 0)
+
+    def test_reverse_changes(self):
+        user = self.users[0]
+        user.event_set.add(self.event, self.other)
+        self.assert_counts(1, 1)
+        user.event_set.remove(self.other)
+        self.assert_counts(1, 0)
+        user.event_set.add(self.other)
+        user.event_set.clear()
+        self.assert_counts(0, 0)
+
+    def test_deleted_user(self):
+        for user in self.users:
+            self.event.participants.add(user)
+        self.other.participants.add(self.users[0])
+
+        self.users[0].delete()
+        self.assert_counts(2, 0)
+
+    def test_sync_command(self):
+        self.event.participants.add(*self.users)
+        Event.objects.filter(pk=self.event.pk).update(participants_count=7)
+
+        out = StringIO()
+        call_command("sync_participants_count", "--dry-run", stdout=out)
+        self.assertIn("збережено 7, насправді 3", out.getvalue())
+        self.assert_counts(7, 0)
+
+        call_command("sync_participants_count", stdout=StringIO())
+        self.assert_counts(3, 0)
+
+
+@override_settings(EVENTS_EXPORT_CHUNK_SIZE=2)
+class ExportTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        runners = [User.objects.create_user(username=f"runner{i}") for i in range(2)]
+        for i in range(5):
+            event = self.create_event(f"Забіг {i}")
+            if i == 0:
+                event.participants.add(*runners)
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def export(self, query=""):
+        response = self.client.get(f"/api/events/export?{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_ndjson(self):
+        with self.assertNumQueries(4):
+            chunks = self.export()
+        # Пачки по 2 події: 5 подій віддаються трьома частинами
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 2, 1])
+
+        events = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([event['title'] for event in events], [f"Забіг {i}" for i in range(5)])
+        self.assertEqual(events[0]['creator'], {'id': self.creator.pk, 'username': "creator"})
+        self.assertEqual([user['username'] for user in events[0]['participants']], ["runner0", "runner1"])
+        self.assertEqual((events[0]['participants_count'], events[1]['participants']), (2, []))
+
+    def test_csv(self):
+        rows = list(csv.reader("".join(self.export("format=csv")).splitlines()))
+        self.assertEqual(rows[0][0], "event_id")
+        # Один рядок на кожну участь і один рядок для подій без учасників
+        self.assertEqual([(row[1], row[-1]) for row in rows[1:4]], [("Забіг 0", "runner0"), ("Забіг 0", "runner1"), ("Забіг 1", "")])
+        self.assertEqual(len(rows), 1 + 2 + 4)
+
+    def test_filters_and_errors(self):
+        self.create_event("Концерт", category=Category.objects.create(name="Музика"))
+        lines = "".join(self.export("category__name=Музика")).splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ["Концерт"])
+
+        self.assertEqual(self.client.get("/api/events/export?format=xml").status_code, 404)
+        self.assertEqual(APIClient().get("/api/events/export").status_code, 401)
+
+    async def test_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.creator)
+        response = await self.async_client.get("/api/events/export")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+
+
+class ImportTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator.is_creator = True
+        self.creator.save(update_fields=['is_creator'])
+        self.runner = User.objects.create_user(username="runner")
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def row(self, title, **kwargs):
+        return {
+            'title': title, 'description': "Опис", 'start_time': "2030-01-01T10:00:00Z", 'address': "Київ",
+            'category': "Спорт", **kwargs,
+        }
+
+    def post(self, data, content_type="application/json"):
+        if content_type == "application/json":
+            data = json.dumps(data)
+        response = self.client.post("/api/events/bulk", data, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        return response.data['created'], {error['row']: error['errors'] for error in response.data['errors']}
+
+    def test_rows_are_validated_separately(self):
+        self.create_event("Існуюча")
+        created, errors = self.post([
+            self.row("Забіг", participants=[self.runner.pk], capacity=5),
+            self.row("Забіг"),
+            self.row("Існуюча"),
+            self.row("Концерт", participants=[self.runner.pk, self.runner.pk + 100]),
+            self.row("Лекція", participants=[self.runner.pk], capacity=0),
+            {'title': "Без дати"},
+            "рядок",
+            self.row("Виставка", category="Мистецтво"),
+        ])
+
+        self.assertEqual(created, 2)
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(errors[4], {'participants': [f"Users not found: [{self.runner.pk + 100}]"]})
+        self.assertIn('start_time', errors[6])
+
+        event = Event.objects.get(title="Забіг")
+        self.assertEqual((event.participants_count, list(event.participants.all())), (1, [self.runner]))
+        self.assertEqual(Event.objects.get(title="Виставка").category.name, "Мистецтво")
+        results = self.client.get("/api/events/search", {'q': "виставка"}).data['results']
+        self.assertEqual([event['title'] for event in results], ["Виставка"])
+
+    def test_jsonl_and_csv(self):
+        lines = "\n".join([json.dumps(self.row("Забіг")), "{broken", ""])
+        created, errors = self.post(lines, "application/x-ndjson")
+        self.assertEqual((created, list(errors)), (1, [2]))
+
+        table = (
+            "title,description,start_time,address,category,capacity,participants\n"
+            f"Концерт,Опис,2030-01-01T10:00:00Z,Київ,Музика,,{self.runner.pk};{self.runner.pk}\n"
+        )
+        created, errors = self.post(table, "text/csv")
+        self.assertEqual((created, errors), (1, {}))
+        self.assertEqual(Event.objects.get(title="Концерт").participants_count, 1)
+
+    def test_failed_batch_is_rolled_back(self):
+        create_events = EventImporter.create_events
+        calls = []
+
+        def fail_first_batch(importer, rows):
+            calls.append(rows)
+            if len(calls) == 1:
+                raise DatabaseError("disk I/O error")
+            return create_events(importer, rows)
+
+        rows = [self.row("Забіг", category="Нова"), self.row("Забіг", category="Нова")]
+        with mock.patch.object(EventImporter, "create_events", fail_first_batch):
+            report = EventImporter(self.creator, batch_size=1).run(rows)
+
+        # Категорія та назва з відкоченої пачки не вважаються вже створеними
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error['row'] for error in report.errors], [1])
+        self.assertEqual(Event.objects.get(title="Забіг").category.name, "Нова")
+
+    def test_permissions(self):
+        self.client.force_authenticate(User.objects.create_user(username="guest"))
+        self.assertEqual(self.client.post("/api/events/bulk", [], format="json").status_code, 403)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as file:
+            file.write(json.dumps(self.row("Забіг")) + "\n" + json.dumps(self.row("Забіг")) + "\n")
+        self.addCleanup(os.remove, file.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_events", file.name, "--creator", "creator", stdout=out, stderr=err)
+        self.assertIn("Створено подій: 1, помилок: 1", out.getvalue())
+        self.assertIn("Рядок 2", err.getvalue())
+
+
+class EventListCacheTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Забіг")
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def get_cache_status(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get("/api/events/")
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache']
+
+    def assert_invalidated(self, change):
+        self.get_cache_status()
+        self.assertEqual(self.get_cache_status(), 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.get_cache_status(), 'MISS')
+
+    def assert_kept(self, change):
+        self.get_cache_status()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.get_cache_status(), 'HIT')
+
+    def test_query_params_order_does_not_matter(self):
+        self.client.get("/api/events/?fields=title&expand=creator")
+        response = self.client.get("/api/events/?expand=creator&fields=title")
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_invalidated_by_event_changes(self):
+        self.assert_invalidated(lambda: self.create_event("Велопробіг"))
+        self.assert_invalidated(lambda: Event.objects.get(pk=self.event.pk).save())
+        self.assert_invalidated(lambda: self.event.add_participant(User.objects.create_user(username="runner")))
+        self.assert_invalidated(lambda: Category.objects.filter(pk=self.category.pk).first().save())
+
+    def test_invalidated_by_nested_user_changes(self):
+        def rename():
+            self.creator.username = "organizer"
+            self.creator.save(update_fields=['username'])
+        self.assert_invalidated(rename)
+
+    def test_kept_after_unrelated_user_changes(self):
+        self.assert_kept(self.creator.revoke_tokens)
+        self.assert_kept(lambda: self.creator.save(update_fields=['last_login']))
+        self.assert_kept(lambda: User.objects.get(pk=self.creator.pk).save())
+
+    def test_stats(self):
+        admin = User.objects.create_superuser(username="admin", password="password")
+        self.client.force_authenticate(admin)
+        before = self.client.get("/api/events/cache-stats").data
+
+        self.get_cache_status()
+        self.get_cache_status()
+        after = self.client.get("/api/events/cache-stats").data
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+        self.client.force_authenticate(self.creator)
+        self.assertEqual(self.client.get("/api/events/cache-stats").status_code, 403)
+
+
+class ConditionalGetTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = self.create_event("Забіг")
+        self.client = APIClient()
+        self.client.force_authenticate(self.creator)
+
+    def assert_changed(self, url, change):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def rename_creator(self):
+        self.creator.username = "organizer"
+        self.creator.save(update_fields=['username'])
+
+    def rename_category(self):
+        self.category.name = "Біг"
+        self.category.save()
+
+    def test_event_list(self):
+        url = "/api/events/"
+        self.assert_changed(url, self.rename_creator)
+        self.assert_changed(url, lambda: self.event.add_participant(User.objects.create_user(username="runner")))
+        self.assert_changed(url, self.rename_category)
+        self.assert_changed(url, lambda: Event.objects.filter(pk=self.event.pk).delete())
+
+    def test_participant_profile_change(self):
+        runner = User.objects.create_user(username="runner")
+        self.event.add_participant(runner)
+
+        def change_bio():
+            runner.bio += "Бігаю щоранку. "
+            runner.save(update_fields=['bio'])
+        self.assert_changed("/api/events/", change_bio)
+        self.assert_changed("/api/events/Забіг", change_bio)
+
+    def test_event_detail(self):
+        url = "/api/events/Забіг"
+        self.assert_changed(url, self.rename_creator)
+        self.assert_changed(url, lambda: self.event.add_participant(User.objects.create_user(username="runner")))
+        self.assert_changed(url, self.rename_category)
+
+    def test_categories(self):
+        self.assert_changed("/api/events/categories", lambda: Category.objects.create(name="Музика"))
+
+    def test_unchanged_after_token_revocation(self):
+        etag = self.client.get("/api/events/")['ETag']
+        self.creator.revoke_tokens()
+        self.assertEqual(self.client.get("/api/events/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -1,9 +1,13 @@
 from django.urls import path
-from .views import EventsApiView, UpdateDeleteEventsView, CreateEventsApiView, TakePartView, CategoriesApiView
+from .views import EventsApiView, UpdateDeleteEventsView, CreateEventsApiView, TakePartView, CategoriesApiView, SearchEventsApiView, EventsCacheStatsView, ExportEventsApiView, BulkCreateEventsApiView
 urlpatterns = [
     path("events/", EventsApiView.as_view()),
     path("events/create", CreateEventsApiView.as_view()),
+    path("events/bulk", BulkCreateEventsApiView.as_view()),
     path("events/categories", CategoriesApiView.as_view()),
+    path("events/search", SearchEventsApiView.as_view()),
+    path("events/export", ExportEventsApiView.as_view()),
+    path("events/cache-stats", EventsCacheStatsView.as_view()),
     path("events/<str:title>", UpdateDeleteEventsView.as_view()),
     path("events/<str:title>/join", TakePartView.as_view()),
 ]
@@ -1,17 +1,44 @@
-from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView, CreateAPIView, ListCreateAPIView
+from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView, CreateAPIView, ListCreateAPIView, GenericAPIView
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import JSONParser
 
-from .models import Event, Category
+from .models import Event, Category, JoinStatus
 
-from .serializers import EventSerializer, EventCreateSerializer, CategorySerializer
+from .serializers import EventSerializer, EventCreateSerializer, CategorySerializer, EventSearchSerializer
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+
+from .filters import EventFilter
+
+from .renderers import NDJSONRenderer, CSVRenderer
+
+from .parsers import JSONLinesParser, CSVParser
+
+from .importer import EventImporter
+
+from .export import iter_ndjson, iter_csv, aiter_chunks
+
 from .permissions import IsOwnerOrReadOnly, isAuthor
 
+from .pagination import KeysetPagination, SearchPagination
+
+from .search import EventSearchResults
+
+from .cache import event_list_cache
+
+from .conditional import ConditionalGetMixin
+
+from django.db.models import Count, Max
+
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 @extend_schema(
@@ -23,24 +50,28 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 
     -Отримувати список всіх подій
     -Фільтрувати події за назвою категорії та іменем автора
+    -Отримувати події посторінково за курсором (параметри cursor та page_size)
+    -Обирати поля відповіді (fields) та зв'язки, що повертаються повними об'єктами (expand)
+    -Сортувати події за датою початку або популярністю (ordering=-participants_count)
 '''
 )
-class EventsApiView(ListAPIView):
-    queryset = Event.objects.select_related("category", "creator").prefetch_related("participants").all()
+class EventsApiView(ConditionalGetMixin, ListAPIView):
+    queryset = Event.objects.order_by("start_time", "id")
     permission_classes = [IsAuthenticated]
     serializer_class = EventSerializer
+    pagination_class = KeysetPagination
 
-    filter_backends = [DjangoFilterBackend]
-    filterset_fileds = {
-        "category__name": ['exact', 'icontains'],
-        "creator__username": ["exact", 'icontains']
-    }
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    ordering_fields = ["start_time", "participants_count"]
+    filterset_class = EventFilter
 
     @extend_schema(
         summary="Отримати список подій",
-        description="Повертає список всіх подій. Можна застосувати фільтрацію за категорією та автором",
+        description="Повертає список всіх подій, впорядкованих за датою початку. Можна застосувати фільтрацію за категорією та автором. "
+                    "Якщо передано cursor або page_size, повертає сторінку з посиланнями next/previous",
         responses={
             200:EventSerializer(many=True),
+            304: {'description': "Дані не змінились з моменту запиту з If-None-Match / If-Modified-Since."},
             401: {'description': "Токен аутентифікації відсутній або недійсний."},
         },
         parameters=[
@@ -68,11 +99,164 @@ class EventsApiView(ListAPIView):
                 description="Фільтрування події за частиною імені автора. (Наприклад, creator__name__icontains=Admin)",
                 required=False
             ),
+            OpenApiParameter(
+                name="fields",
+                location=OpenApiParameter.QUERY,
+                description="Поля події через кому. Додатково доступне поле participants_count. (Наприклад, fields=title,start_time,participants_count)",
+                required=False
+            ),
+            OpenApiParameter(
+                name="expand",
+                location=OpenApiParameter.QUERY,
+                description="Зв'язки (creator, participants), які повертаються повними об'єктами. Решта повертаються як id. За замовчуванням розгорнуті всі. (Наприклад, expand=creator)",
+                required=False
+            ),
         ]
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_queryset(self):
+        return EventSerializer.optimize_queryset(super().get_queryset(), self.request)
+
+    def get_fingerprint(self, request, *args, **kwargs):
+        # Зміни автора, учасників та категорії оновлюють updated_at події (events/signals.py)
+        stats = self.filter_queryset(Event.objects.order_by()).aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        return (stats["count"], stats["updated_at"]), stats["updated_at"]
+
+    def list(self, request, *args, **kwargs):
+        key = event_list_cache.make_key(request)
+        data = event_list_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        event_list_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+@extend_schema(
+    tags=["Події"],
+    description='''
+    API для експорту подій з учасниками
+
+    Цей ендопоінт дозволяє:
+
+    -Отримати всі події з учасниками потоком у форматі NDJSON (format=ndjson) або CSV (format=csv)
+    -Фільтрувати події так само, як у списку подій
+'''
+)
+class ExportEventsApiView(GenericAPIView):
+    queryset = Event.objects.all()
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EventFilter
+
+    @extend_schema(
+        summary="Експортувати події",
+        description="Повертає потоком всі події з учасниками. NDJSON містить одну подію на рядок, CSV — один рядок на кожну участь",
+        responses={
+            200: {'description': "Потік NDJSON або CSV"},
+            401: {'description': "Токен аутентифікації відсутній або недійсний."},
+            404: {'description': "Невідомий формат експорту."},
+        },
+        parameters=[
+            OpenApiParameter(
+                name="format",
+                location=OpenApiParameter.QUERY,
+                description="Формат експорту: ndjson (за замовчуванням) або csv",
+                required=False
+            ),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        rows = iter_csv if renderer.format == "csv" else iter_ndjson
+        content = rows(queryset, settings.EVENTS_EXPORT_CHUNK_SIZE)
+        if isinstance(request._request, ASGIRequest):
+            # Під ASGI синхронний ітератор був би прочитаний повністю, тож пачки віддаються асинхронно
+            content = aiter_chunks(content)
+
+        response = StreamingHttpResponse(
+            content,
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response['Content-Disposition'] = f'attachment; filename="events.{renderer.format}"'
+        return response
+
+@extend_schema(
+    tags=["Події"],
+    description='''
+    API для статистики кешу списку подій
+
+    Цей ендопоінт дозволяє адміністраторам отримати кількість влучань та промахів кешу за всі процеси
+'''
+)
+class EventsCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Статистика кешу подій",
+        description="Повертає кількість влучань, промахів та частку влучань кешу списку подій",
+        responses={
+            200: {'description': "Лічильники кешу: hits, misses, hit_ratio"},
+            403: {'description': "Доступ заборонено."},
+        }
+    )
+    def get(self, request):
+        return Response(event_list_cache.stats())
+
+@extend_schema(
+    tags=["Події"],
+    description='''
+    API для повнотекстового пошуку подій
+
+    Цей ендопоінт дозволяє:
+
+    -Шукати події за словами з назви, опису та адреси (з пошуком за префіксом)
+    -Отримувати результати, впорядковані за релевантністю, посторінково
+    -Отримувати фрагмент тексту зі знайденими словами
+'''
+)
+class SearchEventsApiView(ListAPIView):
+    queryset = Event.objects.all()
+    permission_classes = [IsAuthenticated]
+    serializer_class = EventSearchSerializer
+    pagination_class = SearchPagination
+    filter_backends = []
+
+    @extend_schema(
+        summary="Пошук подій",
+        description="Повертає події, що містять усі слова запиту (кожне слово шукається за префіксом), впорядковані за релевантністю",
+        responses={
+            200: EventSearchSerializer(many=True),
+            400: {'description': "Не передано пошуковий запит."},
+            401: {'description': "Токен аутентифікації відсутній або недійсний."},
+        },
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                location=OpenApiParameter.QUERY,
+                description="Пошуковий запит. (Наприклад, q=футбол львів)",
+                required=True
+            ),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        query = self.request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+
+        events = EventSerializer.optimize_queryset(super().get_queryset(), self.request)
+        return EventSearchResults(query, events)
+
 @extend_schema(
     tags=['Події'],
     description='''
@@ -101,6 +285,48 @@ class CreateEventsApiView(CreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
+@extend_schema(
+    tags=['Події'],
+    description='''
+    API для масового створення подій
+
+    Цей ендопоінт дозволяє авторам (is_creator=True) створити багато подій одним запитом.
+    Приймає JSON-масив, JSONL (application/x-ndjson) або CSV (text/csv).
+    Некоректні рядки не зупиняють імпорт, а повертаються у списку помилок
+'''
+)
+class BulkCreateEventsApiView(APIView):
+    permission_classes = [IsAuthenticated, isAuthor]
+    parser_classes = [JSONParser, JSONLinesParser, CSVParser]
+
+    @extend_schema(
+        summary="Масово створити події",
+        description="Створює події пачками. Кожен рядок містить title, description, start_time, address, category (назва, "
+                    "відсутні категорії створюються), необов'язкові capacity та participants (у CSV — id через ';'). "
+                    "Повертає кількість створених подій та помилки за номерами рядків",
+        request={
+            'application/json': {'type': 'array', 'items': {'type': 'object'}},
+            'application/x-ndjson': {'type': 'string'},
+            'text/csv': {'type': 'string'},
+        },
+        responses={
+            200: {'description': "Звіт імпорту: created та errors (row, errors)"},
+            400: {"description": "Тіло запиту не є списком подій"},
+            401: {'description': "Токен аутентифікації відсутній або недійсний."},
+            403: {'description': "Доступ заборонено. У вас немає дозволу для створення подій."},
+        }
+    )
+    def post(self, request):
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get("events")
+        if not isinstance(rows, list):
+            raise ValidationError({"detail": "Expected a list of events."})
+
+        report = EventImporter(request.user, batch_size=settings.EVENTS_IMPORT_BATCH_SIZE).run(rows)
+        return Response({"created": report.created, "errors": report.errors}, status=status.HTTP_200_OK)
+
+
 @extend_schema(
     tags=["Події"],
     description='''
@@ -116,7 +342,7 @@ class CreateEventsApiView(CreateAPIView):
     Доступ до цього ендпоінту має тільки автор події
 '''
 )
-class UpdateDeleteEventsView(RetrieveUpdateDestroyAPIView):
+class UpdateDeleteEventsView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     queryset = Event.objects.select_related("category", "creator").prefetch_related("participants").all()
     lookup_field = "title"
     serializer_class = EventCreateSerializer
@@ -127,6 +353,7 @@ class UpdateDeleteEventsView(RetrieveUpdateDestroyAPIView):
         description="Повертає повну інформацію про подію, отриману за її назвою",
         responses={
             200:EventSerializer,
+            304: {'description': "Подія не змінилась з моменту запиту з If-None-Match / If-Modified-Since."},
             403: {'description': "Доступ заборонено."},
             404: {'description': 'Подію з такою назвою не знайдено.'},
         },
@@ -142,6 +369,12 @@ class UpdateDeleteEventsView(RetrieveUpdateDestroyAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_fingerprint(self, request, *args, **kwargs):
+        row = Event.objects.filter(title=kwargs["title"]).values_list("id", "updated_at").first()
+        if row is None:
+            return None, None
+        return row, row[1]
+
     @extend_schema(
         summary="Повністю оновити подію",
         description="Оновляє повну інформацію про подію, отриману за її назвою",
@@ -224,6 +457,7 @@ class TakePartView(APIView):
             400:{'description': "Ви вже є учасником події"},
             401:{'description': "Токен аутентифікації відсутній або недійсний."},
             404:{'description': "Події з такою назваою не існує"},
+            409:{'description': "Усі місця на подію вже зайняті"},
         },
         parameters=[
             OpenApiParameter(
@@ -236,14 +470,16 @@ class TakePartView(APIView):
     )
     def post(self, request, title):
         try:
-            event = Event.objects.get(title=title)
+            event = Event.objects.only("id").get(title=title)
         except Event.DoesNotExist:
             return Response({"detail":"Event not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        if request.user in event.participants.all():
-            return Response({'detail':"You are already participated"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        event.participants.add(request.user)
+        match event.add_participant(request.user):
+            case JoinStatus.ALREADY_JOINED:
+                return Response({'detail':"You are already participated"}, status=status.HTTP_400_BAD_REQUEST)
+            case JoinStatus.FULL:
+                return Response({'detail':"Event is full"}, status=status.HTTP_409_CONFLICT)
+
         return Response({"detail":"You have joined the event"}, status=status.HTTP_200_OK)
 
 @extend_schema(
@@ -259,7 +495,7 @@ class TakePartView(APIView):
     Доступ до ендопоінту мають тільки авторизовані користувачі
 '''    
 )
-class CategoriesApiView(ListCreateAPIView):
+class CategoriesApiView(ConditionalGetMixin, ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
@@ -269,12 +505,17 @@ class CategoriesApiView(ListCreateAPIView):
         description="Дозволяє отримати список всіх категорій",
         responses={
             201:CategorySerializer,
+            304: {'description': "Категорії не змінились з моменту запиту з If-None-Match / If-Modified-Since."},
             401: {'description': "У користувача нема прав доступу"},
         }
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_fingerprint(self, request, *args, **kwargs):
+        stats = Category.objects.aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        return (stats["count"], stats["updated_at"]), stats["updated_at"]
+
     @extend_schema(
         summary="Створити нову категорію",
         description="Дозволяє створити нову категорію. Потрібно вказати лише назву категорії (name) ",
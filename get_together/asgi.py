@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'get_together.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Імпортується після налаштування Django. Обгортка зупиняє бота, запущеного вебхуком у процесі,
+# під час завершення воркера
+from botapp.webhook import LifespanApplication, bridge  # noqa: E402
+
+application = LifespanApplication(django_application, bridge)
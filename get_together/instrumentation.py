@@ -0,0 +1,143 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?|N)\s*,)+\s*(?:%s|\?|N)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql:str) -> str:
+    """Нормалізує SQL, щоб однакові запити з різними параметрами мали один відбиток
+
+    Рядки та числа замінюються на `S` та `N`, списки параметрів `IN (%s, %s, ...)`
+    згортаються в `(...)`.
+    """
+    sql = _STRING.sub("S", sql)
+    sql = _NUMBER.sub("N", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """Лічильники запитів до БД в межах одного HTTP-запиту або оновлення бота
+
+    Запити бота виконуються в пулі потоків, тож запис захищений блокуванням.
+    """
+
+    def __init__(self, track_fingerprints:bool = True):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.track_fingerprints = track_fingerprints
+        self._lock = threading.Lock()
+
+    def record(self, sql:str, duration:float):
+        key = fingerprint(sql) if self.track_fingerprints else None
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            if key is not None:
+                self.fingerprints[key] += 1
+
+    def repeated(self, threshold:int) -> list:
+        """Повертає відбитки запитів, що виконались щонайменше `threshold` разів (ймовірні N+1)"""
+        with self._lock:
+            return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+    def problems(self) -> list:
+        """Повертає список перевищень бюджету: кількість запитів, час у БД, повторювані запити"""
+        problems = []
+        if self.count > settings.DB_QUERY_BUDGET:
+            problems.append(f"{self.count} queries (budget {settings.DB_QUERY_BUDGET})")
+        if self.duration * 1000 > settings.DB_TIME_BUDGET_MS:
+            problems.append(f"{self.duration * 1000:.1f} ms in DB (budget {settings.DB_TIME_BUDGET_MS:g} ms)")
+        for sql, count in self.repeated(settings.DB_REPEATED_QUERY_THRESHOLD)[:3]:
+            problems.append(f"{count}x {sql[:200]}")
+        return problems
+
+
+# Активні QueryStats: блоки collect_queries можуть бути вкладені (метрики та бюджет)
+_current_stats:ContextVar[tuple] = ContextVar("query_stats", default=())
+
+
+def record_query(execute, sql, params, many, context):
+    """Обгортка `connection.execute_wrapper`, що записує запит у всі активні QueryStats
+
+    Поза вибраним запитом або оновленням коштує одне читання ContextVar.
+    """
+    active = _current_stats.get()
+    if not active:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for stats in active:
+            stats.record(sql, duration)
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Обгортка додається до кожного з'єднання, включно з потоками пулу БД бота.
+# ContextVar копіюється в ці потоки `sync_to_async`, тож запити потрапляють
+# у QueryStats оновлення, яке їх викликало
+connection_created.connect(install_query_wrapper)
+
+
+def should_sample() -> bool:
+    rate = settings.DB_INSTRUMENTATION_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+@contextmanager
+def collect_queries(track_fingerprints:bool = True):
+    """Збирає статистику запитів до БД у межах блоку
+
+    Args:
+        track_fingerprints (bool): Чи рахувати повтори SQL для пошуку N+1
+
+    Yields:
+        QueryStats: Статистика, що заповнюється під час виконання блоку
+    """
+    # З'єднання, відкриті до імпорту модуля, не отримали сигналу connection_created
+    for conn in connections.all(initialized_only=True):
+        install_query_wrapper(conn)
+
+    stats = QueryStats(track_fingerprints)
+    token = _current_stats.set((*_current_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def report_queries(stats:QueryStats, label:str) -> list:
+    """Записує в лог попередження, якщо запит або оновлення перевищило бюджет
+
+    Returns:
+        list: Список перевищень, порожній, якщо бюджет не перевищено
+    """
+    problems = stats.problems()
+    if problems:
+        logger.warning("DB budget exceeded in %s: %s", label, "; ".join(problems))
+    return problems
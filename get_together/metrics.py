@@ -0,0 +1,317 @@
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+ARCHIVE_FILE = "metrics-archive.json"
+
+
+class Metric:
+    """Метрика з фіксованим набором міток
+
+    Значення зберігаються в словнику {кортеж значень міток: значення}.
+    """
+    type = None
+
+    def __init__(self, registry, name:str, help:str, labelnames:tuple = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def key(self, labels:dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self) -> dict:
+        return {"type": self.type, "help": self.help, "labels": list(self.labelnames)}
+
+    def dump(self) -> dict:
+        return {**self.describe(), "samples": [[list(key), value] for key, value in self.values.items()]}
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount:float = 1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set_total(self, value:float, **labels):
+        """Встановлює значення зі стороннього лічильника процесу (наприклад, статистики кешу)"""
+        with self.registry.lock:
+            self.values[self.key(labels)] = value
+
+
+class Gauge(Metric):
+    """Поточне значення в процесі. Не переноситься в архів після завершення процесу"""
+    type = "gauge"
+
+    def set(self, value:float, **labels):
+        with self.registry.lock:
+            self.values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    """Гістограма з кумулятивними кошиками, як у форматі Prometheus
+
+    Значення для кожного набору міток: [лічильники кошиків..., сума, кількість].
+    """
+    type = "histogram"
+
+    def __init__(self, registry, name:str, help:str, labelnames:tuple = (), buckets:tuple = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def describe(self) -> dict:
+        return {**super().describe(), "buckets": list(self.buckets)}
+
+    def observe(self, value:float, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+
+class MetricsRegistry:
+    """Реєстр метрик процесу з агрегацією між процесами через файли
+
+    Кожен процес (воркер gunicorn, бот) не частіше ніж раз на `flush_interval`
+    секунд атомарно записує свої метрики в `metrics-<pid>.json` у спільному
+    каталозі. Ендпоінт /metrics підсумовує файли всіх процесів. Лічильники та
+    гістограми завершених процесів переносяться в архівний файл, щоб сумарні
+    значення не зменшувались після перезапуску воркерів, а їхні gauge
+    відкидаються.
+
+    Колектори — функції, які викликаються перед записом і оновлюють метрики
+    зі сторонніх лічильників (статистика кешів, пулів потоків).
+    """
+
+    def __init__(self, directory = None, flush_interval:float = 5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self.collectors = []
+        self._last_flush = 0.0
+
+    def _register(self, cls, name:str, *args, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(self, name, *args, **kwargs)
+            return metric
+
+    def counter(self, name:str, help:str, labelnames:tuple = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name:str, help:str, labelnames:tuple = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name:str, help:str, labelnames:tuple = (), buckets:tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def register_collector(self, collector):
+        """Додає функцію без аргументів, що оновлює метрики перед записом"""
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def dump(self) -> dict:
+        for collector in self.collectors:
+            collector()
+        with self.lock:
+            return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"metrics-{os.getpid()}.json"
+
+    def maybe_flush(self):
+        """Записує метрики у файл процесу, якщо з останнього запису минуло `flush_interval`"""
+        if self.directory is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.directory is None:
+            return
+        with self.lock:
+            self._last_flush = time.monotonic()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self.dump()), encoding="utf-8")
+            os.replace(temporary, self.path)
+
+    def collect(self) -> dict:
+        """Повертає метрики, підсумовані за всі процеси"""
+        if self.directory is None:
+            return self.dump()
+
+        self.flush()
+        self.archive_dead_processes()
+
+        merged = {}
+        for path in self.directory.glob("metrics-*.json"):
+            try:
+                merge(merged, json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return merged
+
+    def archive_dead_processes(self):
+        """Переносить лічильники та гістограми завершених процесів в архівний файл"""
+        if fcntl is None:
+            return
+
+        with open(self.directory / "metrics.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            dead = [path for path in self.directory.glob("metrics-*.json") if not process_alive(path)]
+            if not dead:
+                return
+
+            archive_path = self.directory / ARCHIVE_FILE
+            archive = json.loads(archive_path.read_text(encoding="utf-8")) if archive_path.exists() else {}
+            for path in dead:
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    data = {}
+                merge(archive, {name: metric for name, metric in data.items() if metric["type"] != "gauge"})
+
+            temporary = archive_path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(archive), encoding="utf-8")
+            os.replace(temporary, archive_path)
+            for path in dead:
+                path.unlink(missing_ok=True)
+
+    def render(self) -> str:
+        """Повертає метрики всіх процесів у текстовому форматі Prometheus"""
+        metrics = self.collect()
+        add_hit_ratio(metrics)
+        return render(metrics)
+
+
+def add_hit_ratio(metrics:dict):
+    """Додає cache_hit_ratio, обчислений із сумарних влучань і промахів усіх процесів"""
+    hits = metrics.get("cache_hits_total")
+    misses = metrics.get("cache_misses_total")
+    if hits is None or misses is None:
+        return
+
+    totals = {}
+    for samples, index in ((hits["samples"], 0), (misses["samples"], 1)):
+        for key, value in samples:
+            totals.setdefault(tuple(key), [0, 0])[index] += value
+
+    metrics["cache_hit_ratio"] = {
+        "type": "gauge",
+        "help": "Частка влучань у кеш за всі процеси",
+        "labels": hits["labels"],
+        "samples": [[list(key), hit / (hit + miss) if hit + miss else 0.0] for key, (hit, miss) in totals.items()],
+    }
+
+
+def cache_collector(name:str, stats):
+    """Повертає колектор, що переносить статистику кешу в cache_hits_total та cache_misses_total
+
+    Args:
+        name (str): Значення мітки cache
+        stats: Функція, що повертає словник з ключами hits та misses
+    """
+    def collect():
+        values = stats()
+        CACHE_HITS.set_total(values["hits"], cache=name)
+        CACHE_MISSES.set_total(values["misses"], cache=name)
+    return collect
+
+
+def process_alive(path:Path) -> bool:
+    pid = path.stem.removeprefix("metrics-")
+    if not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(target:dict, source:dict):
+    """Додає значення метрик `source` до `target`"""
+    for name, metric in source.items():
+        merged = target.setdefault(name, {**metric, "samples": []})
+        samples = {tuple(key): value for key, value in merged["samples"]}
+        for key, value in metric["samples"]:
+            key = tuple(key)
+            current = samples.get(key)
+            if current is None:
+                samples[key] = value
+            elif isinstance(value, list):
+                samples[key] = [a + b for a, b in zip(current, value)]
+            else:
+                samples[key] = current + value
+        merged["samples"] = [[list(key), value] for key, value in samples.items()]
+
+
+def escape(value:str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra:tuple = ()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def format_value(value:float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics:dict) -> str:
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        names = metric["labels"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for values, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{format_labels(names, values)} {format_value(value)}")
+                continue
+
+            for bound, count in zip(metric["buckets"], value):
+                lines.append(f"{name}_bucket{format_labels(names, values, (('le', format_value(float(bound))),))} {count}")
+            lines.append(f"{name}_bucket{format_labels(names, values, (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{name}_sum{format_labels(names, values)} {format_value(float(value[-2]))}")
+            lines.append(f"{name}_count{format_labels(names, values)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(directory=settings.METRICS_DIR, flush_interval=settings.METRICS_FLUSH_INTERVAL)
+
+CACHE_HITS = registry.counter("cache_hits_total", "Влучання в кеш", ("cache",))
+CACHE_MISSES = registry.counter("cache_misses_total", "Промахи кешу", ("cache",))
@@ -0,0 +1,123 @@
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import collect_queries, report_queries, should_sample
+from .metrics import registry, SIZE_BUCKETS
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Час обробки HTTP-запиту", ("view", "method"),
+)
+RESPONSES = registry.counter(
+    "http_responses_total", "Кількість відповідей за кодом статусу", ("view", "method", "status"),
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "Розмір тіла відповіді", ("view", "method"), buckets=SIZE_BUCKETS,
+)
+DB_DURATION = registry.histogram(
+    "http_request_db_duration_seconds", "Час запитів до БД за один HTTP-запит", ("view", "method"),
+)
+DB_QUERIES = registry.counter(
+    "http_request_db_queries_total", "Кількість запитів до БД", ("view", "method"),
+)
+
+
+def view_name(view_func) -> str:
+    """Повертає назву класу представлення (EventsApiView, UserApiView, ...) або функції"""
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    return (view_class or view_func).__name__
+
+
+class ObservingMiddleware:
+    """Основа для middleware, що спостерігає за обробкою запиту, під WSGI та ASGI
+
+    Підкласи реалізують контекстний менеджер `observe(request, result)`:
+    після виходу з блоку відповідь доступна в `result["response"]`.
+    Під ASGI ланцюжок лишається асинхронним і не переходить у потоки.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        result = {}
+        with self.observe(request, result):
+            result["response"] = self.get_response(request)
+        return result["response"]
+
+    async def __acall__(self, request):
+        result = {}
+        with self.observe(request, result):
+            result["response"] = await self.get_response(request)
+        return result["response"]
+
+    def observe(self, request, result):
+        raise NotImplementedError
+
+
+class MetricsMiddleware(ObservingMiddleware):
+    """Записує час обробки, код статусу, розмір відповіді та час у БД для кожного запиту
+
+    Мітки — клас представлення та метод HTTP. Запити, що не потрапили
+    до жодного представлення (404 від резолвера), мають view="unmatched".
+    """
+
+    @contextmanager
+    def observe(self, request, result):
+        started = time.perf_counter()
+        with collect_queries(track_fingerprints=False) as stats:
+            yield
+        duration = time.perf_counter() - started
+        response = result["response"]
+
+        labels = {"view": getattr(request, "metrics_view", "unmatched"), "method": request.method}
+        REQUEST_DURATION.observe(duration, **labels)
+        RESPONSES.inc(status=response.status_code, **labels)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), **labels)
+        DB_DURATION.observe(stats.duration, **labels)
+        DB_QUERIES.inc(stats.count, **labels)
+
+        registry.maybe_flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_name(view_func)
+
+
+class QueryInstrumentationMiddleware(ObservingMiddleware):
+    """Рахує запити до БД та час у БД для вибраної частки HTTP-запитів
+
+    Частка задається DB_INSTRUMENTATION_SAMPLE_RATE. Якщо запит перевищив
+    бюджет (кількість запитів, час у БД або повторюваний SQL, типовий для N+1),
+    у лог записується попередження. З DB_INSTRUMENTATION_HEADERS відповідь
+    отримує заголовки X-DB-Queries, X-DB-Time та X-DB-Budget-Exceeded.
+    """
+
+    @contextmanager
+    def observe(self, request, result):
+        if not should_sample():
+            yield
+            return
+
+        with collect_queries() as stats:
+            yield
+        response = result["response"]
+
+        label = f"{request.method} {getattr(request.resolver_match, 'view_name', None) or request.path}"
+        problems = report_queries(stats, label)
+
+        if settings.DB_INSTRUMENTATION_HEADERS:
+            response["X-DB-Queries"] = str(stats.count)
+            response["X-DB-Time"] = f"{stats.duration * 1000:.2f}"
+            if problems:
+                response["X-DB-Budget-Exceeded"] = str(len(problems))
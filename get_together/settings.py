@@ -48,10 +48,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'get_together.middleware.MetricsMiddleware',
+    'get_together.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,6 +61,11 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
@@ -67,6 +74,79 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Час життя токенів API в секундах
+API_ACCESS_TOKEN_LIFETIME = int(os.environ.get("API_ACCESS_TOKEN_LIFETIME", 5 * 60))
+API_REFRESH_TOKEN_LIFETIME = int(os.environ.get("API_REFRESH_TOKEN_LIFETIME", 7 * 24 * 60 * 60))
+
+# Час життя закешованого знімка користувача для токенів та сесій в секундах
+USER_SNAPSHOT_TIMEOUT = int(os.environ.get("USER_SNAPSHOT_TIMEOUT", API_ACCESS_TOKEN_LIFETIME))
+
+# Курсорна пагінація списку подій (?cursor=..., ?page_size=...)
+EVENTS_PAGE_SIZE = int(os.environ.get("EVENTS_PAGE_SIZE", 20))
+EVENTS_MAX_PAGE_SIZE = int(os.environ.get("EVENTS_MAX_PAGE_SIZE", 100))
+
+# Кількість подій в одній пачці потокового експорту
+EVENTS_EXPORT_CHUNK_SIZE = int(os.environ.get("EVENTS_EXPORT_CHUNK_SIZE", 500))
+
+# Кількість рядків в одній пачці масового імпорту подій
+EVENTS_IMPORT_BATCH_SIZE = int(os.environ.get("EVENTS_IMPORT_BATCH_SIZE", 500))
+
+# Кеш відповідей списку подій: EVENTS_CACHE_BACKEND=file|locmem
+# file спільний для всіх процесів (воркерів і бота), тож зміна подій в одному процесі
+# скидає кеш в усіх. locmem придатний лише для одного процесу
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+EVENTS_CACHE_BACKEND = os.environ.get("EVENTS_CACHE_BACKEND", "file")
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS['locmem'],
+    },
+    'events': {
+        'BACKEND': CACHE_BACKENDS[EVENTS_CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            "EVENTS_CACHE_LOCATION",
+            str(BASE_DIR / 'cache' / 'events') if EVENTS_CACHE_BACKEND == 'file' else 'events',
+        ),
+        'TIMEOUT': int(os.environ.get("EVENTS_CACHE_TIMEOUT", 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("EVENTS_CACHE_MAX_ENTRIES", 1000)),
+        },
+    },
+    # Знімки користувачів для аутентифікації (users.snapshots), спільні для всіх процесів
+    'users': {
+        'BACKEND': CACHE_BACKENDS['file'],
+        'LOCATION': os.environ.get("USER_SNAPSHOT_CACHE_LOCATION", str(BASE_DIR / 'cache' / 'users')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("USER_SNAPSHOT_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # Спільний для всіх процесів, інакше вихід в одному воркері не завершує сесію в інших
+    'sessions': {
+        'BACKEND': CACHE_BACKENDS['file'],
+        'LOCATION': os.environ.get("SESSION_CACHE_LOCATION", str(BASE_DIR / 'cache' / 'sessions')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+}
+
+# Сховище сесій: SESSION_BACKEND=db|cached_db|cache|signed_cookies
+# cached_db читає сесії з кешу та записує їх і в кеш, і в БД.
+# cache зберігає сесії лише в кеші. Обидва використовують файловий кеш 'sessions',
+# спільний для процесів на одному сервері. signed_cookies зберігає сесію в підписаному cookie
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "db")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sessions'
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Get-Together API',
     'DESCRIPTION': 'API for managing events, categories, profiles',
@@ -101,6 +181,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Скільки секунд чекати на блокування SQLite, коли пишуть кілька потоків.
+        # Транзакції пулу БД бота починаються з BEGIN IMMEDIATE (див. botapp/executor.py)
+        'OPTIONS': {
+            'timeout': int(os.environ.get("DB_TIMEOUT", 20)),
+        },
+        # Під ASGI з'єднання веб-запитів не перевикористовуються (див. BOT_DB_CONN_MAX_AGE для бота)
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -167,4 +255,62 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "")
+
+# Кеш профілів користувачів у процесі бота (кількість записів та час життя в секундах)
+BOT_PROFILE_CACHE_SIZE = int(os.environ.get("BOT_PROFILE_CACHE_SIZE", 1024))
+BOT_PROFILE_CACHE_TTL = float(os.environ.get("BOT_PROFILE_CACHE_TTL", 60))
+
+# Кількість потоків, у яких бот виконує запити до БД
+BOT_DB_WORKERS = int(os.environ.get("BOT_DB_WORKERS", 4))
+# Скільки секунд потік пулу БД бота тримає відкрите з'єднання
+BOT_DB_CONN_MAX_AGE = int(os.environ.get("BOT_DB_CONN_MAX_AGE", 60))
+
+# Кількість процесів для хешування паролів у боті та ліміт спроб входу/реєстрації
+# для одного telegram id за вікно в секундах
+BOT_HASHING_WORKERS = int(os.environ.get("BOT_HASHING_WORKERS", 2))
+BOT_PASSWORD_ATTEMPTS = int(os.environ.get("BOT_PASSWORD_ATTEMPTS", 5))
+BOT_PASSWORD_ATTEMPTS_WINDOW = float(os.environ.get("BOT_PASSWORD_ATTEMPTS_WINDOW", 300))
+
+# Скільки прийнятих оновлень бот може мати в черзі та в обробці. Далі вебхук Django відповідає 429
+BOT_UPDATE_QUEUE_SIZE = int(os.environ.get("BOT_UPDATE_QUEUE_SIZE", 1000))
+# Скільки оновлень бот обробляє одночасно (оновлення одного чату завжди по черзі)
+BOT_CONCURRENT_UPDATES = int(os.environ.get("BOT_CONCURRENT_UPDATES", 16))
+# Кількість з'єднань до Bot API (за замовчуванням як у ApplicationBuilder). Не менше за BOT_CONCURRENT_UPDATES,
+# інакше одночасні обробники чекають вільного з'єднання і отримують TimedOut
+BOT_API_CONNECTION_POOL_SIZE = max(int(os.environ.get("BOT_API_CONNECTION_POOL_SIZE", 256)), BOT_CONCURRENT_UPDATES)
+# Секрет, який Telegram надсилає в заголовку X-Telegram-Bot-Api-Secret-Token
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
+
+# Стан розмов бота та user_data: файл SQLite, інтервал запису змін у секундах,
+# через скільки секунд неактивності user_data вивантажується з пам'яті та як часто перевіряється неактивний стан
+BOT_STATE_PATH = os.environ.get("BOT_STATE_PATH", str(BASE_DIR / 'cache' / 'bot_state.sqlite3'))
+BOT_STATE_FLUSH_INTERVAL = float(os.environ.get("BOT_STATE_FLUSH_INTERVAL", 10))
+BOT_STATE_IDLE_TIMEOUT = float(os.environ.get("BOT_STATE_IDLE_TIMEOUT", 30 * 60))
+BOT_STATE_SWEEP_INTERVAL = float(os.environ.get("BOT_STATE_SWEEP_INTERVAL", 5 * 60))
+
+# Через скільки секунд без відповіді розмова (вхід, реєстрація, створення події) завершується,
+# а введений пароль видаляється, та через скільки секунд неактивності user_data видаляється повністю
+BOT_CONVERSATION_TTL = float(os.environ.get("BOT_CONVERSATION_TTL", 15 * 60))
+BOT_USER_DATA_TTL = float(os.environ.get("BOT_USER_DATA_TTL", 24 * 60 * 60))
+
+# Інтервал у секундах, з яким бот записує в лог підсумок часу обробників (0 — вимкнено)
+BOT_METRICS_SUMMARY_INTERVAL = float(os.environ.get("BOT_METRICS_SUMMARY_INTERVAL", 60))
+
+# Статистика запитів до БД для HTTP-запитів та оновлень бота: частка запитів,
+# що вимірюються (0..1), бюджет кількості запитів, часу в БД у мілісекундах
+# та кількість повторів одного SQL, після якої він вважається N+1
+DB_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get("DB_INSTRUMENTATION_SAMPLE_RATE", 1.0 if DEBUG else 0.1))
+DB_QUERY_BUDGET = int(os.environ.get("DB_QUERY_BUDGET", 30))
+DB_TIME_BUDGET_MS = float(os.environ.get("DB_TIME_BUDGET_MS", 200))
+DB_REPEATED_QUERY_THRESHOLD = int(os.environ.get("DB_REPEATED_QUERY_THRESHOLD", 5))
+# Заголовки X-DB-Queries, X-DB-Time та X-DB-Budget-Exceeded у відповідях
+DB_INSTRUMENTATION_HEADERS = os.environ.get("DB_INSTRUMENTATION_HEADERS", str(DEBUG)) == "True"
+
+# Метрики /metrics: спільний каталог, куди кожен процес записує свої метрики
+# не частіше ніж раз на METRICS_FLUSH_INTERVAL секунд (порожній рядок — лише метрики
+# поточного процесу), та необов'язковий токен для доступу до ендпоінта
+METRICS_DIR = os.environ.get("METRICS_DIR", str(BASE_DIR / 'cache' / 'metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 RAILWAY_STATIC_URL = os.getenv("RAILWAY_STATIC_URL", "")
\ No newline at end of file
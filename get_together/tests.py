@@ -0,0 +1,172 @@
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+from .instrumentation import collect_queries, fingerprint
+from .metrics import ARCHIVE_FILE, MetricsRegistry, registry
+
+# Файлові кеші спільні для процесів, тому тести працюють з кешами в пам'яті
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'events', 'users', 'sessions')
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProjectTestCase(TestCase):
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.user = User.objects.create_user(username="user", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class FingerprintTests(TestCase):
+    def test_parameters_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'O''Brien'   LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = S LIMIT N",
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s)"), fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+        )
+
+
+@override_settings(
+    DB_INSTRUMENTATION_SAMPLE_RATE=1.0, DB_INSTRUMENTATION_HEADERS=True, DB_REPEATED_QUERY_THRESHOLD=3,
+)
+class QueryInstrumentationTests(ProjectTestCase):
+    def test_repeated_queries(self):
+        with collect_queries() as outer:
+            with collect_queries() as inner:
+                for i in range(3):
+                    list(User.objects.filter(pk=i))
+            User.objects.count()
+
+        self.assertEqual((inner.count, outer.count), (3, 4))
+        self.assertEqual([count for _, count in outer.repeated(3)], [3])
+        self.assertEqual(len(outer.problems()), 1)
+
+    def test_headers(self):
+        response = self.client.get("/api/events/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response["X-DB-Queries"]), 0)
+        self.assertIn("X-DB-Time", response)
+        self.assertNotIn("X-DB-Budget-Exceeded", response)
+
+    def test_budget_exceeded(self):
+        with self.settings(DB_QUERY_BUDGET=0), self.assertLogs("get_together.instrumentation", "WARNING") as logs:
+            response = self.client.get("/api/events/")
+        self.assertEqual(response["X-DB-Budget-Exceeded"], "1")
+        self.assertIn("DB budget exceeded in GET", logs.output[0])
+
+    @override_settings(DB_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get("/api/events/")
+        self.assertNotIn("X-DB-Queries", response)
+
+
+def finished_pid() -> int:
+    """Повертає pid процесу, який уже завершився"""
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.registry = MetricsRegistry(directory=self.directory)
+        self.requests = self.registry.counter("requests_total", "Запити", ("view",))
+        self.workers = self.registry.gauge("workers", "Воркери")
+        self.duration = self.registry.histogram("duration_seconds", "Час", buckets=(0.1, 1))
+
+    def write_process(self, pid:int, metrics:dict):
+        (self.directory / f"metrics-{pid}.json").write_text(json.dumps(metrics), encoding="utf-8")
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.05, 0.5, 5):
+            self.duration.observe(value)
+
+        text = self.registry.render()
+        self.assertIn('duration_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('duration_seconds_bucket{le="1.0"} 2\n', text)
+        self.assertIn('duration_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn("duration_seconds_sum 5.55\n", text)
+        self.assertIn("duration_seconds_count 3\n", text)
+
+    def test_processes_are_summed(self):
+        self.requests.inc(2, view="EventsApiView")
+        other = MetricsRegistry()
+        other.counter("requests_total", "Запити", ("view",)).inc(3, view="EventsApiView")
+        with mock.patch("get_together.metrics.process_alive", return_value=True):
+            self.write_process(1, other.dump())
+            text = self.registry.render()
+
+        self.assertIn('requests_total{view="EventsApiView"} 5\n', text)
+
+    def test_dead_processes_are_archived(self):
+        pid = finished_pid()
+        other = MetricsRegistry()
+        other.counter("requests_total", "Запити", ("view",)).inc(3, view="EventsApiView")
+        other.gauge("workers", "Воркери").set(4)
+        self.write_process(pid, other.dump())
+        self.requests.inc(view="EventsApiView")
+        self.workers.set(1)
+
+        metrics = self.registry.collect()
+
+        self.assertFalse((self.directory / f"metrics-{pid}.json").exists())
+        self.assertTrue((self.directory / ARCHIVE_FILE).exists())
+        self.assertEqual(metrics["requests_total"]["samples"], [[["EventsApiView"], 4]])
+        # gauge завершеного процесу відкидається
+        self.assertEqual(metrics["workers"]["samples"], [[[], 1]])
+
+        # архівні значення не зникають і не дублюються при наступних зборах
+        self.assertEqual(self.registry.collect()["requests_total"]["samples"], [[["EventsApiView"], 4]])
+
+    def test_cache_hit_ratio(self):
+        hits = self.registry.counter("cache_hits_total", "Влучання", ("cache",))
+        misses = self.registry.counter("cache_misses_total", "Промахи", ("cache",))
+        hits.set_total(3, cache="events")
+        misses.set_total(1, cache="events")
+
+        self.assertIn('cache_hit_ratio{cache="events"} 0.75\n', self.registry.render())
+
+
+class MetricsEndpointTests(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        # Метрики лише поточного процесу, без файлів у спільному METRICS_DIR
+        patcher = mock.patch.object(registry, "directory", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_metrics(self):
+        self.client.get("/api/events/")
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn('http_responses_total{view="EventsApiView",method="GET",status="200"}', text)
+        self.assertIn('http_response_size_bytes_count{view="EventsApiView",method="GET"}', text)
+        self.assertIn('http_request_db_queries_total{view="EventsApiView",method="GET"}', text)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from botapp.views import telegram_webhook
+from .views import metrics
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 
@@ -12,7 +13,9 @@ urlpatterns = [
     path('api/', include("users.urls")),
     path("api/", include("events.urls")),
 
-    path("webhook/", telegram_webhook),
+    path("webhook/<str:token>", telegram_webhook),
+
+    path("metrics", metrics),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
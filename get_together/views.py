@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry
+
+
+def metrics(request):
+    """Повертає метрики всіх процесів у текстовому форматі Prometheus
+
+    Якщо задано METRICS_TOKEN, запит має містити заголовок `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(request.headers.get("Authorization", ""), expected):
+            return HttpResponseForbidden()
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,48 @@
+from django.core import signing
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework import authentication, exceptions
+
+from .snapshots import get_user_snapshot
+from .tokens import load_access_token
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """Аутентифікація за підписаним access-токеном у заголовку `Authorization: Bearer <token>`
+
+    Перевірка підпису не звертається до БД і не хешує пароль, а користувач
+    береться зі знімка в кеші. Токен відхиляється, якщо його версія не
+    збігається з `User.token_version` (токени відкликано).
+    """
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        try:
+            payload = load_access_token(header[1].decode())
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed("Token has expired.")
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        user = get_user_snapshot(payload["uid"])
+        if user is None or not user.is_active or user.token_version != payload["ver"]:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenAuthenticationScheme(OpenApiAuthenticationExtension):
+    target_class = "users.authentication.SignedTokenAuthentication"
+    name = "bearerAuth"
+
+    def get_security_definition(self, auto_schema):
+        return {"type": "http", "scheme": "bearer"}
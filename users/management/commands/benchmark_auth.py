@@ -0,0 +1,86 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users.snapshots import invalidate_user_snapshot
+
+User = get_user_model()
+
+DJANGO_AUTH_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CACHED_AUTH_MIDDLEWARE = 'users.middleware.CachedAuthenticationMiddleware'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Вимірює кількість запитів до БД та час обробки запиту з сесією "
+        "для різних сховищ сесій зі стандартним та кешованим request.user"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Користувач, від імені якого виконуються запити")
+        parser.add_argument("--path", help="Адреса, що запитується. За замовчуванням профіль користувача")
+        parser.add_argument("--requests", type=int, default=200, help="Кількість запитів для кожного варіанта")
+        parser.add_argument(
+            "--sessions",
+            nargs="+",
+            choices=sorted(settings.SESSION_ENGINES),
+            default=["db", "cached_db", "cache", "signed_cookies"],
+            help="Сховища сесій для порівняння",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Користувача {options['username']} не знайдено")
+
+        path = options["path"] or f"/api/users/{user.username}"
+        self.stdout.write(f"{'сесії':<16}{'request.user':<14}{'запитів/запит':>14}{'мс/запит':>10}")
+
+        # Вхід оновлює last_login і створює сесії, тому всі зміни відкочуються
+        try:
+            with transaction.atomic():
+                for backend in options["sessions"]:
+                    for label, middleware in (("django", DJANGO_AUTH_MIDDLEWARE), ("cached", CACHED_AUTH_MIDDLEWARE)):
+                        queries, elapsed = self.measure(user, backend, middleware, path, options["requests"])
+                        self.stdout.write(f"{backend:<16}{label:<14}{queries:>14.2f}{elapsed * 1000:>10.2f}")
+                raise Rollback
+        except Rollback:
+            invalidate_user_snapshot(user.pk)
+
+    def measure(self, user, backend, middleware, path, requests):
+        """Повертає середню кількість запитів до БД та середній час одного запиту
+
+        Перший запит прогріває кеші і не враховується.
+        """
+        middlewares = [middleware if name in (DJANGO_AUTH_MIDDLEWARE, CACHED_AUTH_MIDDLEWARE) else name for name in settings.MIDDLEWARE]
+
+        with override_settings(
+            SESSION_ENGINE=settings.SESSION_ENGINES[backend],
+            MIDDLEWARE=middlewares,
+            ALLOWED_HOSTS=["testserver"],
+        ):
+            caches[settings.SESSION_CACHE_ALIAS].clear()
+            client = Client()
+            client.force_login(user)
+            client.get(path)
+
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                for _ in range(requests):
+                    client.get(path)
+                elapsed = time.perf_counter() - started
+
+            client.logout()
+
+        return len(context.captured_queries) / requests, elapsed / requests
@@ -0,0 +1,64 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+from .snapshots import get_session_user_snapshot
+
+
+def resolve_session_user(request):
+    """Визначає користувача сесії за закешованим знімком
+
+    Повторює `django.contrib.auth.get_user` для ModelBackend, але бере користувача
+    та хеш сесії з кешу замість запиту до `users_user`. У всіх нетипових
+    випадках (інший бекенд, неактивний або видалений користувач, хеш сесії
+    не збігся, наприклад, після зміни SECRET_KEY) рішення приймає Django.
+    """
+    session = request.session
+    try:
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+
+    if backend_path not in settings.AUTHENTICATION_BACKENDS or not issubclass(import_string(backend_path), ModelBackend):
+        return auth.get_user(request)
+
+    user, session_auth_hash = get_session_user_snapshot(user_id)
+    session_hash = session.get(HASH_SESSION_KEY)
+    if user is None or not user.is_active or not session_hash or not constant_time_compare(session_hash, session_auth_hash):
+        return auth.get_user(request)
+
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = resolve_session_user(request)
+    return request._cached_user
+
+
+async def auser(request):
+    if not hasattr(request, "_acached_user"):
+        request._acached_user = await sync_to_async(resolve_session_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Заміна `AuthenticationMiddleware`, що бере `request.user` з кешу
+
+    Знімок користувача видаляється після зміни профілю, пароля або виходу,
+    тож кожен запит з сесією не робить запиту до таблиці користувачів.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(auser, request)
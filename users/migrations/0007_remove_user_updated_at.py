@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='updated_at',
+        ),
+    ]
@@ -6,6 +6,13 @@ class User(AbstractUser):
     bio = models.TextField(blank=True, verbose_name="Біо користувача")
     telegram_id = models.BigIntegerField(blank=True, null=True, unique=True)
     is_creator = models.BooleanField(default=False, verbose_name="Автор подій")
+    token_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="Версія токенів")
+
+    def revoke_tokens(self):
+        """Робить недійсними всі видані користувачу токени API"""
+        self.token_version = models.F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
 
     def __str__(self):
         return self.username
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .snapshots import invalidate_user_snapshot
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot_on_change(sender, instance, using, **kwargs):
+    """Видаляє закешований знімок користувача після його зміни або видалення
+
+    Знімок видаляється після коміту: інакше паралельний запит може встигнути
+    закешувати ще старий рядок (наприклад, попередній token_version або is_active).
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id), using=using)
+
+
+@receiver(user_logged_out)
+def invalidate_user_snapshot_on_logout(sender, request, user, **kwargs):
+    """Видаляє знімок користувача після виходу з сесії"""
+    if user is not None:
+        invalidate_user_snapshot(user.pk)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+
+# Поля користувача, що зберігаються в кеші. Пароль не кешується і завантажується
+# з БД лише при зверненні (відкладене поле)
+USER_SNAPSHOT_FIELDS = (
+    "id", "username", "email", "first_name", "last_name", "bio", "telegram_id",
+    "is_creator", "is_active", "is_staff", "is_superuser", "token_version",
+)
+
+
+USER_SNAPSHOT_CACHE_ALIAS = "users"
+
+
+def snapshot_cache():
+    # Кеш спільний для всіх процесів: відкликання токенів, деактивація або зняття
+    # is_staff в одному воркері одразу діють і в інших
+    return caches[USER_SNAPSHOT_CACHE_ALIAS]
+
+
+def snapshot_cache_key(user_id:int) -> str:
+    return f"users:snapshot:{user_id}"
+
+
+def _snapshot_field_names() -> list:
+    # from_db очікує значення в порядку полів моделі
+    User = get_user_model()
+    return [field.attname for field in User._meta.concrete_fields if field.attname in USER_SNAPSHOT_FIELDS]
+
+
+def _load_snapshot(user_id:int):
+    """Повертає закешовані значення полів користувача та хеш його сесії
+
+    Замість пароля кешується лише `get_session_auth_hash()` (HMAC від хеша пароля),
+    за яким перевіряються сесії.
+
+    Returns:
+        tuple: (значення полів, хеш сесії) або None, якщо користувача не існує
+    """
+    key = snapshot_cache_key(user_id)
+    snapshot = snapshot_cache().get(key)
+    if snapshot is not None:
+        return snapshot
+
+    User = get_user_model()
+    row = User.objects.filter(pk=user_id).values_list(*_snapshot_field_names(), "password").first()
+    if row is None:
+        return None
+
+    snapshot = (row[:-1], User(password=row[-1]).get_session_auth_hash())
+    snapshot_cache().set(key, snapshot, timeout=settings.USER_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def _build_user(values):
+    User = get_user_model()
+    return User.from_db(router.db_for_read(User), _snapshot_field_names(), values)
+
+
+def get_user_snapshot(user_id:int):
+    """Повертає користувача з кешу без запиту до БД
+
+    Знімок видаляється сигналом після будь-якого збереження, видалення
+    або виходу користувача.
+
+    Args:
+        user_id (int): id користувача
+
+    Returns:
+        User: Об'єкт User з відкладеним полем password або None, якщо користувача не існує
+    """
+    snapshot = _load_snapshot(user_id)
+    return _build_user(snapshot[0]) if snapshot is not None else None
+
+
+def get_session_user_snapshot(user_id:int):
+    """Повертає користувача з кешу разом з хешем для перевірки сесії
+
+    Returns:
+        tuple: (User, хеш сесії) або (None, None), якщо користувача не існує
+    """
+    snapshot = _load_snapshot(user_id)
+    if snapshot is None:
+        return None, None
+    return _build_user(snapshot[0]), snapshot[1]
+
+
+def invalidate_user_snapshot(user_id:int):
+    snapshot_cache().delete(snapshot_cache_key(user_id))
@@ -1,3 +1,147 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .middleware import CachedAuthenticationMiddleware
+from .models import User
+from .snapshots import get_user_snapshot, snapshot_cache, snapshot_cache_key
+
+# Файлові кеші спільні для процесів, тому тести працюють з кешами в пам'яті
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'events', 'users', 'sessions')
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class UserTestCase(TestCase):
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.user = User.objects.create_user(username="user", password="password")
+        self.client = APIClient()
+
+
+class SignedTokenTests(UserTestCase):
+    def obtain(self):
+        response = self.client.post("/api/users/token", {"username": "user", "password": "password"})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def refresh(self, token):
+        return self.client.post("/api/users/token/refresh", {"refresh": token})
+
+    def get_profile(self, access):
+        return self.client.get("/api/users/user", HTTP_AUTHORIZATION=f"Bearer {access}").status_code
+
+    def test_access_token(self):
+        tokens = self.obtain()
+        self.assertEqual(self.get_profile(tokens["access"]), 200)
+        self.assertEqual(self.get_profile(tokens["refresh"]), 401)
+        self.assertEqual(self.get_profile("broken"), 401)
+
+    def test_wrong_password(self):
+        response = self.client.post("/api/users/token", {"username": "user", "password": "wrong"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_refresh_rotates_token(self):
+        tokens = self.obtain()
+        response = self.refresh(tokens["refresh"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], tokens["refresh"])
+        self.assertEqual(self.get_profile(response.data["access"]), 200)
+
+    def test_refresh_token_reuse_revokes_tokens(self):
+        tokens = self.obtain()
+        rotated = self.refresh(tokens["refresh"]).data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.refresh(tokens["refresh"]).status_code, 401)
+        self.assertEqual(self.get_profile(rotated["access"]), 401)
+        self.assertEqual(self.refresh(rotated["refresh"]).status_code, 401)
+
+    def test_revoke(self):
+        tokens = self.obtain()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/users/token/revoke", HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.get_profile(tokens["access"]), 401)
+        self.assertEqual(self.refresh(tokens["refresh"]).status_code, 401)
+
+    def test_inactive_user(self):
+        tokens = self.obtain()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get_profile(tokens["access"]), 401)
+
+
+class UserSnapshotTests(UserTestCase):
+    def test_snapshot_is_cached(self):
+        get_user_snapshot(self.user.pk)
+        with self.assertNumQueries(0):
+            snapshot = get_user_snapshot(self.user.pk)
+        self.assertEqual(snapshot.username, "user")
+
+    def test_invalidated_after_commit(self):
+        get_user_snapshot(self.user.pk)
+        key = snapshot_cache_key(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.revoke_tokens()
+            # До коміту інший запит прочитав би старий рядок і закешував його знову
+            self.assertIsNotNone(snapshot_cache().get(key))
+        self.assertIsNone(snapshot_cache().get(key))
+        self.assertEqual(get_user_snapshot(self.user.pk).token_version, 1)
+
+
+class CachedAuthenticationMiddlewareTests(UserTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def make_request(self):
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        # Сесія завантажується заздалегідь, щоб рахувати лише запити за користувачем
+        request.session.keys()
+        return request
+
+    def resolve_user(self, request=None):
+        request = request or self.make_request()
+        CachedAuthenticationMiddleware(lambda request: None).process_request(request)
+        request.user._setup()
+        return request.user._wrapped
+
+    def test_user_from_snapshot(self):
+        for backend, engine in settings.SESSION_ENGINES.items():
+            with self.subTest(backend=backend), self.settings(SESSION_ENGINE=engine):
+                caches['users'].clear()
+                self.client.force_login(self.user)
+                self.assertEqual(self.resolve_user(), self.user)
+                request = self.make_request()
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.resolve_user(request), self.user)
+
+    def test_password_change_ends_session(self):
+        self.resolve_user()
+        self.user.set_password("new password")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsInstance(self.resolve_user(), AnonymousUser)
+
+    def test_inactive_user(self):
+        self.resolve_user()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['is_active'])
+        self.assertIsInstance(self.resolve_user(), AnonymousUser)
+
+    def test_logout_invalidates_snapshot(self):
+        self.resolve_user()
+        self.assertIsNotNone(snapshot_cache().get(snapshot_cache_key(self.user.pk)))
+        self.client.logout()
+        self.assertIsNone(snapshot_cache().get(snapshot_cache_key(self.user.pk)))
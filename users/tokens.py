@@ -0,0 +1,69 @@
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+from .snapshots import snapshot_cache
+
+ACCESS_TOKEN_SALT = "users.tokens.access"
+REFRESH_TOKEN_SALT = "users.tokens.refresh"
+
+
+def issue_tokens(user) -> dict:
+    """Видає пару токенів для користувача
+
+    Токени підписані HMAC (`django.core.signing` з SECRET_KEY) і містять
+    id користувача та його `token_version`. Збільшення версії відкликає
+    всі раніше видані токени. Refresh-токен додатково має унікальний id (jti)
+    і обмінюється на нову пару лише один раз (див. `use_refresh_token`).
+
+    Args:
+        user: Об'єкт User
+
+    Returns:
+        dict: access, refresh та час життя access-токена в секундах (expires_in)
+    """
+    payload = {"uid": user.pk, "ver": user.token_version}
+    return {
+        "access": signing.dumps(payload, salt=ACCESS_TOKEN_SALT),
+        "refresh": signing.dumps({**payload, "jti": uuid.uuid4().hex}, salt=REFRESH_TOKEN_SALT),
+        "expires_in": settings.API_ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def load_access_token(token:str) -> dict:
+    """Перевіряє підпис і термін дії access-токена
+
+    Raises:
+        signing.BadSignature: Якщо токен підроблений або прострочений (SignatureExpired)
+    """
+    return signing.loads(token, salt=ACCESS_TOKEN_SALT, max_age=settings.API_ACCESS_TOKEN_LIFETIME)
+
+
+def load_refresh_token(token:str) -> dict:
+    """Перевіряє підпис і термін дії refresh-токена
+
+    Raises:
+        signing.BadSignature: Якщо токен підроблений або прострочений (SignatureExpired)
+    """
+    return signing.loads(token, salt=REFRESH_TOKEN_SALT, max_age=settings.API_REFRESH_TOKEN_LIFETIME)
+
+
+def use_refresh_token(payload:dict) -> bool:
+    """Позначає refresh-токен використаним
+
+    Позначка зберігається в спільному для процесів кеші до закінчення терміну
+    дії токена. Повторне використання означає, що токен викрадено або
+    скопійовано, тож обмінювати його на нову пару не можна.
+
+    Args:
+        payload (dict): Дані refresh-токена з `load_refresh_token`
+
+    Returns:
+        bool: True, якщо токен використано вперше
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    return snapshot_cache().add(f"users:refresh:{jti}", True, timeout=settings.API_REFRESH_TOKEN_LIFETIME)
+
@@ -1,9 +1,12 @@
 from django.urls import path, include
-from .views import UserApiView, CreateUserView
+from .views import UserApiView, CreateUserView, TokenObtainView, TokenRefreshView, TokenRevokeView
 
 urlpatterns = [
     path("users/", include('rest_framework.urls')),
     path('users/register', CreateUserView.as_view()),
+    path('users/token', TokenObtainView.as_view()),
+    path('users/token/refresh', TokenRefreshView.as_view()),
+    path('users/token/revoke', TokenRevokeView.as_view()),
     path('users/<str:username>', UserApiView.as_view()),
     
 ]
\ No newline at end of file
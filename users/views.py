@@ -1,7 +1,13 @@
 from .models import User
-from .serializers import UserSerializer, RegisterUserSerializer
-from rest_framework import permissions
+from .serializers import UserSerializer, RegisterUserSerializer, TokenObtainSerializer, TokenRefreshSerializer, TokenPairSerializer
+from .tokens import issue_tokens, load_refresh_token, use_refresh_token
+from .authentication import SignedTokenAuthentication
+from django.core import signing
+from rest_framework import permissions, status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema
 
 @extend_schema(
@@ -99,5 +105,105 @@ class CreateUserView(CreateAPIView):
     )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
-    
 
+
+@extend_schema(
+    tags=["Авторизація"],
+    description='''
+    API для отримання токенів доступу
+
+    Цей ендопоінт дозволяє обміняти ім'я користувача та пароль на пару токенів:
+
+    -access: короткостроковий токен для заголовка Authorization: Bearer <token>
+    -refresh: довгостроковий токен для отримання нового access-токена
+    '''
+)
+class TokenObtainView(APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(
+        summary="Отримати токени",
+        description="Перевіряє ім'я користувача та пароль і повертає access та refresh токени",
+        request=TokenObtainSerializer,
+        responses={
+            200: TokenPairSerializer,
+            400: {'description': "Неправильне ім'я користувача або пароль"},
+        }
+    )
+    def post(self, request):
+        serializer = TokenObtainSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_tokens(serializer.validated_data['user']), status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Авторизація"],
+    description='''
+    API для оновлення токенів доступу
+
+    Цей ендопоінт дозволяє обміняти refresh-токен на нову пару токенів
+    '''
+)
+class TokenRefreshView(APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get_authenticate_header(self, request):
+        # Без класів аутентифікації DRF перетворює 401 на 403
+        return SignedTokenAuthentication.keyword
+
+    @extend_schema(
+        summary="Оновити токени",
+        description="Перевіряє refresh-токен та повертає нову пару токенів. Кожен refresh-токен можна використати лише раз: "
+                    "повторне використання відкликає всі токени користувача. Токени, видані до відкликання, не приймаються",
+        request=TokenRefreshSerializer,
+        responses={
+            200: TokenPairSerializer,
+            401: {'description': "Refresh-токен недійсний, прострочений, відкликаний або вже використаний"},
+        }
+    )
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            payload = load_refresh_token(serializer.validated_data['refresh'])
+        except signing.BadSignature:
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+
+        user = User.objects.only('id', 'is_active', 'token_version').filter(pk=payload['uid']).first()
+        if user is None or not user.is_active or user.token_version != payload['ver']:
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+
+        if not use_refresh_token(payload):
+            # Використаний refresh-токен повторно пред'явлено: відкликаються всі токени користувача
+            user.revoke_tokens()
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Авторизація"],
+    description='''
+    API для відкликання токенів доступу
+
+    Цей ендопоінт робить недійсними всі access та refresh токени поточного користувача
+    '''
+)
+class TokenRevokeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        summary="Відкликати токени",
+        description="Відкликає всі видані користувачу токени, наприклад, при виході з усіх пристроїв",
+        request=None,
+        responses={
+            204: {'description': "Токени відкликано"},
+            401: {'description': "Токен аутентифікації відсутній або недійсний."},
+        }
+    )
+    def post(self, request):
+        request.user.revoke_tokens()
+        return Response(status=status.HTTP_204_NO_CONTENT)